@@ -0,0 +1,76 @@
+"""
+FastAPI service over a MatchingService.
+
+Run it with the catalog named by environment variables:
+
+    TARGET_CATALOG=catalog.xlsx TARGET_COLUMN=DataItemName \
+        uvicorn api:create_app_from_env --factory --port 8000
+
+Endpoints are async; scoring runs in the service's worker pool.
+"""
+import os
+from typing import List, Optional
+
+from fastapi import FastAPI, File, Form, HTTPException, Query, UploadFile
+from pydantic import BaseModel
+
+from matching_service import DEFAULT_WORKERS, MatchingService
+
+
+class BatchRequest(BaseModel):
+    values: List[str]
+
+
+def create_app(service: MatchingService) -> FastAPI:
+    app = FastAPI(title="Fuzzy Column Matcher")
+    app.state.service = service
+
+    @app.on_event("shutdown")
+    def shutdown():
+        service.close()
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok", **service.info()}
+
+    @app.get("/match")
+    async def match_value(value: str, k: int = Query(1, ge=1, le=100)):
+        """Best target of one value, and the k best candidates when k > 1."""
+        return await service.run("match", service.lookup, value, k)
+
+    @app.post("/match/batch")
+    async def match_batch(request: BatchRequest):
+        """Two-way match of a JSON list of source values."""
+        return await service.run("match_batch", service.match_batch, request.values)
+
+    @app.post("/match/upload")
+    async def match_upload(file: UploadFile = File(...), column: str = Form(...)):
+        """Two-way match of one column of an uploaded .csv, .xlsx or .parquet file."""
+        data = await file.read()
+        try:
+            return await service.run(
+                "match_upload", service.match_upload, data, file.filename, column
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    @app.get("/stats")
+    async def stats():
+        """Latency percentiles per endpoint, in milliseconds."""
+        return {"latency": service.latency.percentiles(), **service.info()}
+
+    return app
+
+
+def create_app_from_env(environ: Optional[dict] = None) -> FastAPI:
+    """App for the catalog in TARGET_CATALOG, indexed once at startup."""
+    environ = os.environ if environ is None else environ
+    service = MatchingService.from_catalog(
+        environ["TARGET_CATALOG"],
+        environ["TARGET_COLUMN"],
+        id_column=environ.get("TARGET_ID_COLUMN", "DataItemID"),
+        threshold=int(environ.get("MATCH_THRESHOLD", 70)),
+        engine=environ.get("MATCH_ENGINE", "batch"),
+        workers=int(environ.get("MATCH_WORKERS", DEFAULT_WORKERS))
+    )
+    return create_app(service)
@@ -0,0 +1,168 @@
+import numpy as np
+from rapidfuzz import fuzz, process
+from typing import List, Tuple
+
+# Upper bound on the size of the intermediate score blocks, in bytes
+DEFAULT_BLOCK_BYTES = 64 * 1024 * 1024
+
+
+class TermTable:
+    """
+    Expanded synonym terms for a list of unique values, flattened so that
+    whole columns can be scored with a single cdist call.
+    """
+
+    def __init__(self, values: List[str], synonym_handler):
+        self.values = values
+        term_ids = {}
+        flat = []
+        offsets = []
+        for value in values:
+            offsets.append(len(flat))
+            for term in synonym_handler.get_expanded_terms(value):
+                flat.append(term_ids.setdefault(term, len(term_ids)))
+
+        self.terms = list(term_ids)
+        self.flat = np.asarray(flat, dtype=np.intp)
+        self.offsets = np.asarray(offsets + [len(flat)], dtype=np.intp)
+        # Set on tables made by take()
+        self.base = None
+        self.rows = None
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def take(self, rows) -> "TermTable":
+        """
+        The values at the given positions, with only their own terms.
+        ``base`` and ``rows`` record the full table they were taken from.
+        """
+        rows = [int(row) for row in rows]
+        pieces = [self.flat[self.offsets[row]:self.offsets[row + 1]] for row in rows]
+        flat = np.concatenate(pieces) if pieces else np.empty(0, dtype=np.intp)
+        used, flat = np.unique(flat, return_inverse=True)
+
+        table = TermTable.__new__(TermTable)
+        table.values = [self.values[row] for row in rows]
+        table.terms = [self.terms[t] for t in used]
+        table.flat = flat.astype(np.intp)
+        table.offsets = np.concatenate(
+            ([0], np.cumsum([len(piece) for piece in pieces], dtype=np.intp))
+        ).astype(np.intp)
+        table.base = self.base if self.base is not None else self
+        table.rows = [self.rows[row] for row in rows] if self.rows is not None else rows
+        return table
+
+
+class BatchScorer:
+    """
+    Score every query value against every choice value with rapidfuzz.
+
+    The score of a value pair is the best token_set_ratio over the cross
+    product of their expanded terms, exactly like
+    FuzzyMatcher.calculate_similarity, but each block of the matrix is
+    computed in one native, multi-threaded call.
+    """
+
+    def __init__(self, workers: int = -1, block_bytes: int = DEFAULT_BLOCK_BYTES):
+        self.workers = workers
+        self.block_bytes = block_bytes
+        self.stats = {"pairs_total": 0, "pairs_scored": 0, "pairs_pruned": 0}
+
+    def _block_ends(self, query: TermTable, width: int) -> List[int]:
+        """Split query values into blocks whose term rows fit the byte budget."""
+        max_rows = max(1, self.block_bytes // (4 * max(width, 1)))
+        ends = []
+        start = 0
+        while start < len(query):
+            end = start + 1
+            while (end < len(query)
+                   and query.offsets[end + 1] - query.offsets[start] <= max_rows):
+                end += 1
+            ends.append(end)
+            start = end
+        return ends
+
+    def iter_blocks(self, query: TermTable, choices: TermTable):
+        """
+        Yield (start, end, scores) where scores is a float32 array of shape
+        (end - start, len(choices)) holding the value-level similarity.
+        """
+        choice_offsets = choices.offsets[:-1]
+        start = 0
+        for end in self._block_ends(query, len(choices.flat)):
+            flat = query.flat[query.offsets[start]:query.offsets[end]]
+            unique_terms, inverse = np.unique(flat, return_inverse=True)
+            term_scores = process.cdist(
+                [query.terms[t] for t in unique_terms],
+                choices.terms,
+                scorer=fuzz.token_set_ratio,
+                dtype=np.float32,
+                workers=self.workers
+            )
+            # Reduce term rows to query values, then term columns to choice values
+            row_offsets = query.offsets[start:end] - query.offsets[start]
+            scores = np.maximum.reduceat(term_scores[inverse], row_offsets, axis=0)
+            scores = np.maximum.reduceat(scores[:, choices.flat], choice_offsets, axis=1)
+            yield start, end, scores
+            start = end
+
+    def score(self, query: TermTable, choices: TermTable) -> "ScoreReduction":
+        """
+        Score query values against choice values in one pass and reduce the
+        matrix in both directions while each block is still in memory.
+        """
+        reduction = ScoreReduction(len(query), len(choices))
+        pairs = len(query) * len(choices)
+        self.stats = {"pairs_total": pairs, "pairs_scored": pairs, "pairs_pruned": 0}
+        if pairs == 0:
+            return reduction
+
+        for start, end, scores in self.iter_blocks(query, choices):
+            reduction.update(start, end, np.rint(scores))
+        return reduction
+
+
+class ScoreReduction:
+    """
+    Row-wise and column-wise best matches of a score matrix.
+
+    Blocks are folded in as they are produced, so the full matrix is never
+    held and memory stays O(rows + columns) whatever the input size. Ties
+    resolve to the earliest row or column; rows or columns with nothing to
+    compare against keep index -1 and score -1.
+    """
+
+    def __init__(self, n_rows: int, n_cols: int):
+        self.row_best_index = np.full(n_rows, -1, dtype=np.intp)
+        self.row_best_score = np.full(n_rows, -1, dtype=np.int16)
+        self.col_best_index = np.full(n_cols, -1, dtype=np.intp)
+        self.col_best_score = np.full(n_cols, -1, dtype=np.int16)
+
+    def update(self, start: int, end: int, scores: np.ndarray):
+        """Fold the rounded scores of rows [start, end) into the reductions."""
+        self.row_best_index[start:end] = scores.argmax(axis=1)
+        self.row_best_score[start:end] = scores.max(axis=1)
+
+        block_index = scores.argmax(axis=0)
+        block_score = scores.max(axis=0)
+        # Strictly greater, so earlier blocks win ties
+        improved = block_score > self.col_best_score
+        self.col_best_index[improved] = block_index[improved] + start
+        self.col_best_score[improved] = block_score[improved]
+
+    def merge(self, start: int, other: "ScoreReduction"):
+        """Fold in the reduction of a shard whose rows start at ``start``."""
+        end = start + len(other.row_best_index)
+        self.row_best_index[start:end] = other.row_best_index
+        self.row_best_score[start:end] = other.row_best_score
+
+        improved = other.col_best_score > self.col_best_score
+        self.col_best_index[improved] = other.col_best_index[improved] + start
+        self.col_best_score[improved] = other.col_best_score[improved]
+
+    def row_best(self) -> Tuple[np.ndarray, np.ndarray]:
+        return self.row_best_index, self.row_best_score
+
+    def col_best(self) -> Tuple[np.ndarray, np.ndarray]:
+        return self.col_best_index, self.col_best_score
@@ -0,0 +1,339 @@
+"""
+Reproducible throughput and memory benchmarks of the matcher.
+
+Synthetic catalogs of business attribute names, with the abbreviations,
+punctuation and concatenations real extracts have, are matched at several
+sizes and engines. Each case records its best time over a few repeats and
+its peak traced memory; a report can be saved as a baseline and later runs
+compared with it. Run it as::
+
+    python benchmark_suite.py --save-baseline benchmark_baseline.json
+    python benchmark_suite.py --baseline benchmark_baseline.json --tolerance 0.25
+
+The second form exits with status 1 when a case is slower, or uses more
+memory, than the baseline by more than the tolerance. Timings only compare
+on the same machine; the baseline records the environment it came from.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import rapidfuzz
+
+from fuzzy_matcher import FuzzyMatcher
+from result_export import export_results
+from synonym_handler import SynonymHandler
+
+DEFAULT_SIZES = ((200, 500), (1000, 2000))
+DEFAULT_ENGINES = ("batch", "index")
+DEFAULT_REPEAT = 3
+DEFAULT_TOLERANCE = 0.25
+# Pairs scored by the calculate_similarity case
+SIMILARITY_PAIRS = 2000
+
+# Words of business attribute names, with the abbreviations extracts use
+WORDS = {
+    "account": ["acct", "acc"],
+    "amount": ["amt"],
+    "quantity": ["qty"],
+    "number": ["num", "no"],
+    "description": ["desc"],
+    "balance": ["bal"],
+    "customer": ["cust"],
+    "product": ["prod"],
+    "reference": ["ref"],
+    "identifier": ["id"],
+    "total": ["tot"],
+    "net": [],
+    "gross": [],
+    "income": [],
+    "revenue": ["rev"],
+    "expense": ["exp"],
+    "cash": [],
+    "equity": [],
+    "preferred": ["pref"],
+    "asset": [],
+    "liability": ["liab"],
+    "interest": ["int"],
+    "tax": [],
+    "operating": ["op", "oper"],
+    "current": ["curr"],
+    "deferred": ["def"],
+    "payable": [],
+    "receivable": ["recv"],
+    "inventory": ["inv"],
+    "depreciation": ["depr"],
+    "dividend": ["div"],
+    "share": [],
+    "capital": ["cap"],
+    "reserve": ["res"],
+    "long": ["lt"],
+    "short": ["st"],
+    "term": [],
+    "debt": [],
+    "loan": [],
+    "margin": [],
+    "cost": [],
+    "sales": [],
+    "price": [],
+    "date": ["dt"],
+    "period": ["per"],
+    "year": ["yr"],
+    "quarter": ["qtr"],
+    "adjusted": ["adj"],
+    "other": ["oth"],
+    "unit": []
+}
+SUFFIXES = ["", "", "", " (USD)", " %", " - Q4", " YTD"]
+
+
+def _variant(name: str, rng: random.Random) -> str:
+    """A source-side spelling of a catalog name."""
+    words = name.split()
+    words = [
+        rng.choice(WORDS[word]) if WORDS.get(word) and rng.random() < 0.4 else word
+        for word in words
+    ]
+    style = rng.random()
+    if style < 0.2:
+        # Concatenated, as in column names: NetIncomeAmt
+        text = "".join(word.capitalize() for word in words)
+    elif style < 0.4:
+        text = "_".join(words).upper()
+    elif style < 0.5:
+        text = "-".join(words)
+    elif style < 0.6 and len(words) > 1:
+        words[0], words[1] = words[1], words[0]
+        text = " ".join(words).title()
+    else:
+        text = " ".join(words).title()
+    if rng.random() < 0.15 and len(text) > 4:
+        # One dropped character
+        position = rng.randrange(len(text))
+        text = text[:position] + text[position + 1:]
+    return text + rng.choice(SUFFIXES)
+
+
+def synthetic_columns(
+    n_source: int,
+    n_target: int,
+    seed: int = 0,
+    unmatched: float = 0.2
+) -> Tuple[pd.DataFrame, pd.DataFrame, Dict[str, str]]:
+    """
+    A catalog of n_target distinct attribute names with DataItemIDs, and
+    n_source source values: variants of catalog names, plus a share of
+    names absent from the catalog. Also returns the catalog name each
+    variant was made from.
+    """
+    rng = random.Random(seed)
+    vocabulary = list(WORDS)
+
+    def names(count: int, taken: set) -> List[str]:
+        made = []
+        while len(made) < count:
+            name = " ".join(rng.sample(vocabulary, rng.randint(2, 4)))
+            if name not in taken:
+                taken.add(name)
+                made.append(name)
+        return made
+
+    taken = set()
+    catalog = names(n_target, taken)
+    absent = names(int(n_source * unmatched), taken)
+    source, expected = [], {}
+    for _ in range(n_source - len(absent)):
+        name = rng.choice(catalog)
+        value = _variant(name, rng)
+        source.append(value)
+        expected.setdefault(value, name.title())
+    source += [_variant(name, rng) for name in absent]
+    rng.shuffle(source)
+
+    target_df = pd.DataFrame({
+        "DataItemName": [name.title() for name in catalog],
+        "DataItemID": np.arange(1, n_target + 1)
+    })
+    source_df = pd.DataFrame({"Attribute": source})
+    return source_df, target_df, expected
+
+
+def measure(function: Callable[[], Any], repeat: int = DEFAULT_REPEAT) -> Dict[str, Any]:
+    """
+    Best wall time of function over repeat calls, and its peak traced
+    memory and result from one further call, so tracing does not slow the
+    timed ones. Memory allocated by numpy is traced; rapidfuzz's C buffers
+    are not.
+    """
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        seconds.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        result = function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": min(seconds), "peak_mb": peak / 1e6, "result": result}
+
+
+def run_suite(
+    sizes: Sequence[Tuple[int, int]] = DEFAULT_SIZES,
+    engines: Sequence[str] = DEFAULT_ENGINES,
+    repeat: int = DEFAULT_REPEAT,
+    seed: int = 0
+) -> List[Dict]:
+    """
+    Time synonym expansion, pairwise similarity, match_columns per engine and
+    export per format at each size. Each row names its case, engine and
+    size, and gives seconds, peak_mb and items per second; match_columns
+    rows also give the share of source variants matched to the catalog
+    name they were made from.
+    """
+    rows = []
+
+    def add(case: str, engine: str, n_source: int, n_target: int, items: int, function: Callable):
+        result = measure(function, repeat)
+        rows.append({
+            "case": case,
+            "engine": engine,
+            "n_source": n_source,
+            "n_target": n_target,
+            "seconds": result["seconds"],
+            "peak_mb": result["peak_mb"],
+            "items_per_second": items / max(result["seconds"], 1e-9)
+        })
+        return result["result"]
+
+    for n_source, n_target in sizes:
+        source_df, target_df, expected = synthetic_columns(n_source, n_target, seed)
+        values = source_df["Attribute"].tolist() + target_df["DataItemName"].tolist()
+
+        def expand():
+            # A new handler every call: expansion cost, not LRU hits
+            handler = SynonymHandler()
+            return [handler.get_expanded_terms(value) for value in values]
+
+        add("get_expanded_terms", "-", n_source, n_target, len(values), expand)
+
+        rng = random.Random(seed)
+        pairs = [
+            (rng.choice(values), rng.choice(values)) for _ in range(SIMILARITY_PAIRS)
+        ]
+        similarity_matcher = FuzzyMatcher()
+        add("calculate_similarity", "-", n_source, n_target, len(pairs),
+            lambda: [similarity_matcher.calculate_similarity(s, t) for s, t in pairs])
+
+        for engine in engines:
+            matcher = FuzzyMatcher(threshold=70, engine=engine)
+            results = add("match_columns", engine, n_source, n_target, n_source * n_target,
+                          lambda: matcher.match_columns(source_df, target_df, "Attribute", "DataItemName"))
+            matched = {(m["source_value"], m["target_value"]) for m in results["matches"]}
+            rows[-1]["accuracy"] = sum(
+                1 for value, name in expected.items() if (value, name) in matched
+            ) / max(len(expected), 1)
+
+        matcher = FuzzyMatcher(threshold=70)
+        table = matcher.result_table(
+            matcher.score_columns(source_df, target_df, "Attribute", "DataItemName")
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            for fmt in ("xlsx", "csv", "parquet"):
+                path = os.path.join(directory, f"results.{fmt}")
+                add(f"export_{fmt}", "-", n_source, n_target, len(table),
+                    lambda: export_results(table, path))
+    return rows
+
+
+def environment() -> Dict[str, str]:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": str(os.cpu_count()),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "rapidfuzz": rapidfuzz.__version__
+    }
+
+
+def save_baseline(rows: List[Dict], path: str):
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump({"environment": environment(), "results": rows}, handle, indent=2)
+
+
+def load_baseline(path: str) -> Dict:
+    with open(path, encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def compare(rows: List[Dict], baseline: Dict, tolerance: float = DEFAULT_TOLERANCE) -> pd.DataFrame:
+    """
+    Current rows against the baseline's, matched on case, engine and size:
+    time and memory ratios (current / baseline), flagged as a regression
+    beyond 1 + tolerance, as is any accuracy drop of more than a point.
+    Cases missing from the baseline have no ratios.
+    """
+    key = ["case", "engine", "n_source", "n_target"]
+    current = pd.DataFrame(rows)
+    if "accuracy" not in current:
+        current["accuracy"] = np.nan
+    reference = pd.DataFrame(baseline["results"])
+    if "accuracy" not in reference:
+        reference["accuracy"] = np.nan
+    reference = reference[key + ["seconds", "peak_mb", "accuracy"]]
+    report = current.merge(reference, on=key, how="left", suffixes=("", "_baseline"))
+    report["time_ratio"] = report["seconds"] / report["seconds_baseline"]
+    report["memory_ratio"] = report["peak_mb"] / report["peak_mb_baseline"]
+    # Sub-millisecond and sub-megabyte cases are too noisy to flag
+    slower = (report["time_ratio"] > 1 + tolerance) & (report["seconds"] > 1e-3)
+    larger = (report["memory_ratio"] > 1 + tolerance) & (report["peak_mb"] > 1)
+    worse = report["accuracy"] < report["accuracy_baseline"] - 0.01
+    report["regression"] = slower | larger | worse
+    return report
+
+
+def _size(text: str) -> Tuple[int, int]:
+    n_source, n_target = text.lower().split("x")
+    return int(n_source), int(n_target)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark matcher throughput, scaling and memory")
+    parser.add_argument("--sizes", nargs="*", type=_size, default=list(DEFAULT_SIZES),
+                        help="Source x target sizes, e.g. 200x500 1000x2000")
+    parser.add_argument("--engines", nargs="*", default=list(DEFAULT_ENGINES))
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", help="Compare with this baseline file")
+    parser.add_argument("--save-baseline", help="Save the results as a baseline file")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    rows = run_suite(args.sizes, args.engines, args.repeat, args.seed)
+    pd.set_option("display.width", 200)
+    if args.save_baseline:
+        save_baseline(rows, args.save_baseline)
+    if not args.baseline:
+        print(pd.DataFrame(rows).to_string(index=False, float_format="{:.3f}".format))
+        sys.exit(0)
+
+    baseline = load_baseline(args.baseline)
+    if baseline["environment"] != environment():
+        print("Warning: the baseline comes from another environment:", baseline["environment"])
+    report = compare(rows, baseline, args.tolerance)
+    print(report.to_string(index=False, float_format="{:.3f}".format))
+    regressions = report[report["regression"]]
+    if len(regressions):
+        print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+        sys.exit(1)
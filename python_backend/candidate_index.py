@@ -0,0 +1,200 @@
+import numpy as np
+from rapidfuzz import fuzz, process
+from typing import Dict, List, Set
+
+from batch_engine import BatchScorer, ScoreReduction, TermTable
+
+
+def term_grams(term: str, ngram_size: int = 3) -> Set[str]:
+    """Character n-grams of every token of a term, padded with spaces."""
+    grams = set()
+    for token in term.split():
+        padded = f" {token} "
+        for start in range(max(len(padded) - ngram_size + 1, 1)):
+            grams.add(padded[start:start + ngram_size])
+    return grams
+
+
+class CandidateIndex:
+    """
+    Inverted character n-gram index over the expanded terms of a column.
+
+    A query term only considers the indexed terms sharing enough grams to
+    possibly reach ``threshold``, and a query value is then scored against
+    the values owning those terms. Each insertion or deletion changes at
+    most ``ngram_size`` grams, and a ratio of at least threshold allows at
+    most (1 - threshold / 100) * (len(a) + len(b)) of them, so a term pair
+    needs the grams of the shorter term minus that many edits' worth (and
+    always at least one gram). ``min_overlap`` raises the requirement to
+    that share of the shorter term's grams, pruning more pairs at the cost
+    of recall. Short, dissimilar spellings may share no trigram at all;
+    ``ngram_size=2`` catches more of them for a smaller speedup.
+    """
+
+    def __init__(
+        self,
+        table: TermTable,
+        ngram_size: int = 3,
+        min_overlap: float = 0.0,
+        threshold: float = 0
+    ):
+        self.table = table
+        self.ngram_size = ngram_size
+        self.min_overlap = min_overlap
+        # Raw scores half a point short still round up to the threshold
+        self.max_edit_share = 1 - max(threshold - 0.5, 0) / 100
+
+        postings: Dict[str, List[int]] = {}
+        gram_counts = []
+        for term_id, term in enumerate(table.terms):
+            grams = term_grams(term, ngram_size)
+            gram_counts.append(len(grams))
+            for gram in grams:
+                postings.setdefault(gram, []).append(term_id)
+        self.postings = {gram: np.asarray(ids, dtype=np.intp) for gram, ids in postings.items()}
+        self.gram_counts = np.asarray(gram_counts, dtype=np.intp)
+        self.term_lengths = np.asarray([len(term) for term in table.terms], dtype=np.intp)
+
+        # Which values own each term, as a CSR layout over table.flat
+        owners = np.repeat(np.arange(len(table), dtype=np.intp), np.diff(table.offsets))
+        order = np.argsort(table.flat, kind="stable")
+        self.term_owners = owners[order]
+        self.term_owner_offsets = np.searchsorted(
+            table.flat[order], np.arange(len(table.terms) + 1)
+        )
+
+    def candidate_terms(self, term: str) -> np.ndarray:
+        """Ids of indexed terms sharing enough grams with a query term."""
+        grams = term_grams(term, self.ngram_size)
+        hits = [self.postings[gram] for gram in grams if gram in self.postings]
+        if not hits:
+            return np.empty(0, dtype=np.intp)
+        term_ids, shared = np.unique(np.concatenate(hits), return_counts=True)
+        shorter = np.minimum(self.gram_counts[term_ids], len(grams))
+        edits = np.floor(self.max_edit_share * (self.term_lengths[term_ids] + len(term)))
+        needed = np.maximum.reduce([
+            np.ceil(self.min_overlap * shorter), shorter - self.ngram_size * edits, np.ones(len(term_ids))
+        ])
+        return term_ids[shared >= needed]
+
+    def candidate_values(self, term_ids: np.ndarray) -> np.ndarray:
+        """Sorted ids of the values owning any of the given terms."""
+        if len(term_ids) == 0:
+            return term_ids
+        owners = [
+            self.term_owners[self.term_owner_offsets[t]:self.term_owner_offsets[t + 1]]
+            for t in term_ids
+        ]
+        return np.unique(np.concatenate(owners))
+
+
+class IndexedScorer:
+    """
+    Score query values only against the candidates proposed by a
+    CandidateIndex over the choice values, counting the pruned pairs.
+    Query values without any candidate, and choice values no query value
+    proposed, are scored against everything instead, so they report the
+    same best match as the other engines.
+    """
+
+    def __init__(
+        self,
+        ngram_size: int = 3,
+        min_overlap: float = 0.0,
+        workers: int = 1,
+        threshold: float = 0
+    ):
+        self.ngram_size = ngram_size
+        self.min_overlap = min_overlap
+        self.workers = workers
+        self.threshold = threshold
+        self.stats = {"pairs_total": 0, "pairs_scored": 0, "pairs_pruned": 0}
+
+    def score(self, query: TermTable, choices: TermTable) -> ScoreReduction:
+        """
+        Reduce the sparse candidate scores in both directions. Choice values
+        are credited with the query values that proposed them; those
+        without any are reduced over every query value.
+        """
+        reduction = ScoreReduction(len(query), len(choices))
+        pairs_total = len(query) * len(choices)
+        pairs_scored = 0
+        if pairs_total == 0:
+            self._record(pairs_total, pairs_scored)
+            return reduction
+
+        index = CandidateIndex(choices, self.ngram_size, self.min_overlap, self.threshold)
+        # Candidates are resolved once per unique term, not once per value
+        term_candidates = [
+            index.candidate_values(index.candidate_terms(term)) for term in query.terms
+        ]
+
+        open_rows = []
+        for row in range(len(query)):
+            query_terms = query.flat[query.offsets[row]:query.offsets[row + 1]]
+            candidates = np.unique(np.concatenate([term_candidates[t] for t in query_terms]))
+            if len(candidates) == 0:
+                open_rows.append(row)
+                continue
+            pairs_scored += len(candidates)
+
+            # Terms of every candidate value, laid out contiguously
+            starts = choices.offsets[candidates]
+            ends = choices.offsets[candidates + 1]
+            flat = np.concatenate([choices.flat[s:e] for s, e in zip(starts, ends)])
+            unique_terms, inverse = np.unique(flat, return_inverse=True)
+            term_scores = process.cdist(
+                [query.terms[t] for t in query_terms],
+                [choices.terms[t] for t in unique_terms],
+                scorer=fuzz.token_set_ratio,
+                dtype=np.float32,
+                workers=self.workers
+            ).max(axis=0)
+            candidate_offsets = np.concatenate(([0], np.cumsum(ends - starts)[:-1]))
+            scores = np.rint(np.maximum.reduceat(term_scores[inverse], candidate_offsets))
+
+            best = scores.argmax()
+            reduction.row_best_index[row] = candidates[best]
+            reduction.row_best_score[row] = scores[best]
+            # Rows arrive in order, so strictly greater keeps the earliest tie
+            improved = scores > reduction.col_best_score[candidates]
+            reduction.col_best_index[candidates[improved]] = row
+            reduction.col_best_score[candidates[improved]] = scores[improved]
+
+        open_cols = np.flatnonzero(reduction.col_best_index == -1)
+        if open_rows:
+            pairs_scored += self._score_open_rows(query, choices, open_rows, reduction)
+        if len(open_cols):
+            pairs_scored += self._score_open_cols(query, choices, open_cols, reduction)
+        self._record(pairs_total, min(pairs_scored, pairs_total))
+        return reduction
+
+    def _score_open_rows(self, query, choices, rows, reduction) -> int:
+        """Score query rows without candidates against every choice value."""
+        rows = np.asarray(rows, dtype=np.intp)
+        full = BatchScorer(workers=self.workers).score(query.take(rows), choices)
+        reduction.row_best_index[rows] = full.row_best_index
+        reduction.row_best_score[rows] = full.row_best_score
+        # These rows come out of order, so ties go to the earlier row explicitly
+        best_rows = rows[full.col_best_index]
+        improved = (full.col_best_score > reduction.col_best_score) | (
+            (full.col_best_score == reduction.col_best_score)
+            & (best_rows < reduction.col_best_index)
+        )
+        reduction.col_best_index[improved] = best_rows[improved]
+        reduction.col_best_score[improved] = full.col_best_score[improved]
+        return len(rows) * len(choices)
+
+    def _score_open_cols(self, query, choices, cols, reduction) -> int:
+        """Reduce choice values no query value proposed over every query value."""
+        full = BatchScorer(workers=self.workers).score(choices.take(cols), query)
+        reduction.col_best_index[cols] = full.row_best_index
+        reduction.col_best_score[cols] = full.row_best_score
+        return len(cols) * len(query)
+
+    def _record(self, pairs_total: int, pairs_scored: int):
+        self.stats = {
+            "pairs_total": pairs_total,
+            "pairs_scored": pairs_scored,
+            "pairs_pruned": pairs_total - pairs_scored
+        }
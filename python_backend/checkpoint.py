@@ -0,0 +1,191 @@
+"""
+Checkpoints of long scoring runs, so a restarted run resumes where it died.
+
+A run is identified by a hash of its inputs: the source values, the target
+catalog and everything that changes scores. Its checkpoint is a directory of
+numbered segments, each holding the best targets of the source values
+finished since the previous segment, plus the reverse state at that point
+(the running best source and score of every target) and the counters.
+Segments are JSON, with the score array in a separate ``.npy`` file, so
+nothing read back from disk is unpickled. The checkpoint directory must
+belong to the current user, and a run holds a lock on its checkpoint while
+it is active, so concurrent runs of the same inputs never share segments.
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from column_cache import private_directory, user_temp_path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+DEFAULT_CHECKPOINT_DIR = os.environ.get(
+    "MATCH_CHECKPOINT_DIR", user_temp_path("fuzzy_matcher_checkpoints")
+)
+DEFAULT_INTERVAL = 60.0
+SEGMENT_SUFFIX = ".json"
+SCORES_SUFFIX = ".npy"
+
+
+class CheckpointBusy(Exception):
+    """Raised when another active run holds the checkpoint of the same inputs."""
+
+
+def run_key(source_values: List[str], namespace: str) -> str:
+    """Content hash of the source values and a namespace for everything else."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(namespace.encode("utf-8"))
+    for value in source_values:
+        digest.update(b"\0")
+        digest.update(value.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class Checkpoint:
+    """
+    Segments of one run under ``directory/key``. ``due`` tells when the
+    interval has passed since the last save; ``save`` appends a segment and
+    ``load`` merges them all back. Creating one takes the run's lock, or
+    raises CheckpointBusy; ``release`` gives it up.
+    """
+
+    def __init__(self, directory: str, key: str, interval: float = DEFAULT_INTERVAL):
+        private_directory(directory)
+        self._lock_path = os.path.join(directory, f"{key}.lock")
+        self._lock_file = open(self._lock_path, "a+b")
+        # A lock file removed by a finishing run no longer guards anything
+        if not _try_lock(self._lock_file) or not _same_file(self._lock_file, self._lock_path):
+            self._lock_file.close()
+            raise CheckpointBusy(key)
+        try:
+            self.path = private_directory(os.path.join(directory, key))
+        except BaseException:
+            self.release()
+            raise
+        self.interval = interval
+        self.last_saved = time.monotonic()
+        self._segments = len(self._segment_names())
+
+    def _segment_names(self) -> List[str]:
+        return sorted(
+            name[:-len(SEGMENT_SUFFIX)] for name in os.listdir(self.path)
+            if name.endswith(SEGMENT_SUFFIX)
+        )
+
+    def _replace(self, name: str, write):
+        """Write a file under a temporary name, then move it into place."""
+        temp_path = os.path.join(self.path, f"{name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(temp_path, "wb") as handle:
+            write(handle)
+        os.replace(temp_path, os.path.join(self.path, name))
+
+    def due(self) -> bool:
+        return time.monotonic() - self.last_saved >= self.interval
+
+    def save(self, done: int, source_best: Dict, best_source: List, best_score, totals: Dict):
+        """
+        Append a segment: the best targets of values finished since the last
+        save (source_best), and the state after the first ``done`` values.
+        The scores are written first; the segment counts once its JSON is.
+        """
+        name = f"{self._segments:06d}"
+        self._replace(
+            name + SCORES_SUFFIX,
+            lambda handle: np.save(handle, np.asarray(best_score), allow_pickle=False)
+        )
+        segment = {
+            "done": done,
+            "source_best": [[value, target, score] for value, (target, score) in source_best.items()],
+            "best_source": best_source,
+            "totals": totals
+        }
+        # Counters may be numpy scalars
+        data = json.dumps(segment, default=lambda value: value.item()).encode("utf-8")
+        self._replace(name + SEGMENT_SUFFIX, lambda handle: handle.write(data))
+        self._segments += 1
+        self.last_saved = time.monotonic()
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """
+        The merged state of all segments, or None without any. A segment
+        that cannot be read ends the checkpoint there; the run resumes from
+        the segments before it.
+        """
+        state = None
+        source_best = {}
+        names = self._segment_names()
+        for number, name in enumerate(names):
+            try:
+                with open(os.path.join(self.path, name + SEGMENT_SUFFIX), "rb") as handle:
+                    segment = json.load(handle)
+                segment["best_score"] = np.load(
+                    os.path.join(self.path, name + SCORES_SUFFIX), allow_pickle=False
+                )
+            except (OSError, ValueError, KeyError):
+                # Later saves continue from here
+                for stale in os.listdir(self.path):
+                    if stale.split(".")[0] >= name:
+                        os.remove(os.path.join(self.path, stale))
+                self._segments = number
+                break
+            source_best.update(
+                (value, (target, score)) for value, target, score in segment["source_best"]
+            )
+            state = segment
+        if state is None:
+            return None
+        return {**state, "source_best": source_best}
+
+    def clear(self):
+        """Remove the checkpoint once the run is complete, and release it."""
+        shutil.rmtree(self.path, ignore_errors=True)
+        try:
+            os.remove(self._lock_path)
+        except OSError:
+            # Open in another run on Windows; it stays for the next run
+            pass
+        self.release()
+
+    def release(self):
+        """Let another run of the same inputs take the checkpoint."""
+        if not self._lock_file.closed:
+            _unlock(self._lock_file)
+            self._lock_file.close()
+
+
+def _try_lock(handle) -> bool:
+    """Exclusive lock on an open file without waiting, released if the process dies."""
+    try:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+def _same_file(handle, path: str) -> bool:
+    try:
+        return os.path.samestat(os.fstat(handle.fileno()), os.stat(path))
+    except OSError:
+        return False
+
+
+def _unlock(handle):
+    if fcntl is not None:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+    else:
+        handle.seek(0)
+        msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
@@ -0,0 +1,216 @@
+"""
+Cache of parsed columns and prepared target indexes, keyed by content.
+
+Streamlit reruns the app from the top on every interaction, and several
+sessions may work on the same file. Parsed columns are spilled to Parquet
+under a directory shared by all sessions, and target indexes are kept in
+memory by the process; both are keyed by the hash of the file contents plus
+the sheet and columns read, so a rerun with the same inputs does no parsing
+or preprocessing at all. The directory must belong to the current user and
+be closed to everyone else.
+"""
+import hashlib
+import os
+import stat
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import pandas as pd
+import pyarrow as pa
+
+
+def user_temp_path(name: str) -> str:
+    """A path under the temp directory that other users do not share."""
+    if hasattr(os, "getuid"):
+        return os.path.join(tempfile.gettempdir(), f"{name}-{os.getuid()}")
+    # Windows temp directories are per user already
+    return os.path.join(tempfile.gettempdir(), name)
+
+
+def private_directory(path: str) -> str:
+    """
+    Create path for this user only, or check that the existing directory is
+    a real directory owned by this user that nobody else can read or write.
+    Raises PermissionError otherwise: another user could have planted files
+    in it.
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode):
+        raise PermissionError(f"{path} is not a directory")
+    # No owner or permission bits to check on Windows
+    if hasattr(os, "getuid") and (info.st_uid != os.getuid() or info.st_mode & 0o077):
+        raise PermissionError(f"{path} must be owned by the current user with mode 0700")
+    return path
+
+
+DEFAULT_CACHE_DIR = os.environ.get("COLUMN_CACHE_DIR", user_temp_path("fuzzy_matcher_cache"))
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def content_hash(data: bytes) -> str:
+    """Hex digest identifying file contents."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def frame_hash(df: pd.DataFrame, columns) -> str:
+    """Content hash of some columns of a DataFrame, whatever their source."""
+    hashes = pd.util.hash_pandas_object(df[list(columns)], index=False).values
+    return hashlib.blake2b(hashes.tobytes(), digest_size=16).hexdigest()
+
+
+def cache_key(*parts) -> str:
+    """File-name-safe key for a content hash plus sheet, columns and so on."""
+    return hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class MemoryLRU:
+    """Thread-safe mapping keeping the ``max_entries`` most recently used items."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._items: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            self.misses += 1
+        # Computed outside the lock; two sessions may race to the same value
+        value = compute()
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+class ColumnCache:
+    """
+    Parsed columns on disk, evicted least recently used first once the
+    directory exceeds ``max_bytes``, plus small in-memory caches for sheet
+    listings and prepared target indexes.
+    """
+
+    def __init__(
+        self,
+        directory: str = DEFAULT_CACHE_DIR,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_indexes: int = 4,
+        max_metadata: int = 256
+    ):
+        self.directory = private_directory(directory)
+        self.max_bytes = max_bytes
+        self.indexes = MemoryLRU(max_indexes)
+        self.metadata = MemoryLRU(max_metadata)
+        self.column_hits = 0
+        self.column_misses = 0
+
+    def _path(self, key: str, extension: str) -> str:
+        return os.path.join(self.directory, f"{key}.{extension}")
+
+    def column(self, key: str, load: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """The cached frame for a key, loading and storing it on a miss."""
+        df = self._read(key)
+        if df is not None:
+            self.column_hits += 1
+            return df
+        self.column_misses += 1
+        df = self._write(key, load())
+        self._evict()
+        return df
+
+    def target_index(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        """A prepared target index, built on a miss and kept in memory."""
+        return self.indexes.get_or_compute(key, build)
+
+    def remember(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Small derived values such as sheet names and header rows."""
+        return self.metadata.get_or_compute(key, compute)
+
+    def _read(self, key: str) -> Optional[pd.DataFrame]:
+        path = self._path(key, "parquet")
+        try:
+            df = pd.read_parquet(path)
+            # Touch so eviction sees it as recently used
+            os.utime(path)
+        except (OSError, ValueError):
+            # Missing, evicted meanwhile or unreadable: treat as a miss
+            return None
+        return df
+
+    def _write(self, key: str, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Write atomically so concurrent sessions never read a partial file,
+        and return the frame as stored. Columns mixing types (numbers and
+        text, as worksheets often do) have no Parquet type and are stored as
+        text, so a miss returns the same values a later hit reads back.
+        Frames Parquet still cannot hold are not cached.
+        """
+        temp_path = self._path(key, f"{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            df.to_parquet(temp_path, index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            df = df.copy()
+            for name in df.columns[df.dtypes == object]:
+                df[name] = df[name].where(df[name].isna(), df[name].astype(str))
+            try:
+                df.to_parquet(temp_path, index=False)
+            except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                return df
+        os.replace(temp_path, self._path(key, "parquet"))
+        return df
+
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".tmp"):
+                continue
+            try:
+                info = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            entries.append((info.st_mtime, info.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            "columns": {"hits": self.column_hits, "misses": self.column_misses},
+            "indexes": {"hits": self.indexes.hits, "misses": self.indexes.misses},
+            "metadata": {"hits": self.metadata.hits, "misses": self.metadata.misses}
+        }
+
+
+_default_cache: Optional[ColumnCache] = None
+_default_lock = threading.Lock()
+
+
+def default_cache() -> ColumnCache:
+    """Process-wide cache shared by every Streamlit session."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = ColumnCache()
+        return _default_cache
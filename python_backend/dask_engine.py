@@ -0,0 +1,52 @@
+import os
+from typing import Dict
+
+from stream_engine import ReverseBest
+from target_index import TargetIndex, column_values
+
+
+def match_partition(
+    matcher,
+    partition,
+    partition_number: int,
+    source_column: str,
+    target_index: TargetIndex,
+    output_path: str
+) -> Dict:
+    """
+    Match one source partition against the broadcast target index, write its
+    match and source mismatch rows to their own parquet file and return what
+    the reverse pass needs: the best source per target and the matched targets.
+    """
+    source_values = column_values(partition, source_column)
+    with matcher._run_scorer() as scorer:
+        source_best, best_source, best_score, stats = matcher._score_sources(
+            source_values, target_index, scorer
+        )
+    matches, source_mismatches = matcher._forward_records(source_values, source_best, target_index)
+
+    part = matcher.format_results_for_export({
+        "matches": matches,
+        "source_mismatches": source_mismatches,
+        "target_mismatches": []
+    })
+    part.astype(str).to_parquet(
+        os.path.join(output_path, f"part-{partition_number:05d}.parquet"), index=False
+    )
+
+    return {
+        "best_source": best_source,
+        "best_score": best_score,
+        "matched": {m["target_value"] for m in matches},
+        "match_count": len(matches),
+        "source_mismatch_count": len(source_mismatches),
+        "stats": stats
+    }
+
+
+def merge_partitions(partition_results, n_targets: int):
+    """Combine the per-partition reverse reductions in partition order."""
+    reverse = ReverseBest(n_targets)
+    for result in partition_results:
+        reverse.add(result["best_source"], result["best_score"], result["matched"])
+    return reverse.best_source, reverse.best_score, reverse.matched
@@ -0,0 +1,107 @@
+"""
+Streaming, column-projected reads of Excel workbooks.
+
+Sheet names and the header row are read without parsing the sheet body,
+and a body read keeps only the requested columns, so memory does not grow
+with the width of the sheet. ``.xlsx`` files are streamed with openpyxl's
+read-only mode; legacy ``.xls`` files fall back to pandas.
+"""
+import io
+import pandas as pd
+from pandas.io.parsers import TextParser
+from openpyxl import load_workbook
+from typing import List, Optional, Sequence
+
+# Every .xlsx workbook is a zip archive
+ZIP_MAGIC = b"PK"
+
+
+def is_xlsx(data: bytes) -> bool:
+    return data[:2] == ZIP_MAGIC
+
+
+def _open(data: bytes):
+    return load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+
+
+def header_names(row: Sequence) -> List:
+    """Column names as pd.read_excel gives them for a header row."""
+    names = []
+    seen = {}
+    for position, name in enumerate(row):
+        if name is None:
+            name = f"Unnamed: {position}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    # Trailing header cells without a name (e.g. styled but empty) are dropped
+    while names and row[len(names) - 1] is None:
+        names.pop()
+    return names
+
+
+def sheet_names(data: bytes) -> List[str]:
+    """Worksheet names of a workbook."""
+    if not is_xlsx(data):
+        return pd.ExcelFile(io.BytesIO(data)).sheet_names
+    workbook = _open(data)
+    try:
+        return workbook.sheetnames
+    finally:
+        workbook.close()
+
+
+def sheet_header(data: bytes, sheet: str) -> List:
+    """Column names of a worksheet, read from its first row only."""
+    if not is_xlsx(data):
+        return pd.read_excel(io.BytesIO(data), sheet_name=sheet, nrows=0).columns.tolist()
+    workbook = _open(data)
+    try:
+        worksheet = workbook[sheet]
+        worksheet.reset_dimensions()
+        for row in worksheet.iter_rows(max_row=1, values_only=True):
+            return header_names(row)
+        return []
+    finally:
+        workbook.close()
+
+
+def read_columns(
+    data: bytes,
+    sheet: str,
+    columns: Sequence,
+    header: Optional[List] = None
+) -> pd.DataFrame:
+    """
+    Stream the body of a worksheet, keeping only the given columns.
+
+    Columns missing from the sheet are skipped. Rows are counted like
+    pd.read_excel: trailing rows that are empty across the whole sheet are
+    dropped, empty rows in between are kept.
+    """
+    header = header if header is not None else sheet_header(data, sheet)
+    columns = [column for column in dict.fromkeys(columns) if column in header]
+    if not columns:
+        return pd.DataFrame()
+    if not is_xlsx(data):
+        return pd.read_excel(io.BytesIO(data), sheet_name=sheet, usecols=columns)[columns]
+
+    positions = [header.index(column) for column in columns]
+    rows = [tuple(columns)]
+    n_rows = 0
+    workbook = _open(data)
+    try:
+        worksheet = workbook[sheet]
+        worksheet.reset_dimensions()
+        for row in worksheet.iter_rows(min_row=2, values_only=True):
+            rows.append(tuple(row[p] if p < len(row) else None for p in positions))
+            if any(value is not None for value in row):
+                n_rows = len(rows) - 1
+    finally:
+        workbook.close()
+
+    # Same value parsing as pd.read_excel, applied to the projected rows only
+    return TextParser(rows[:n_rows + 1], header=0).read()
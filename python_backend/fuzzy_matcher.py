@@ -1,31 +1,127 @@
+import os
+import time
 import pandas as pd
-import dask.dataframe as dd
-from fuzzywuzzy import fuzz
-from typing import Dict, List, Tuple
+from collections import Counter
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 import numpy as np
 from synonym_handler import SynonymHandler
+from batch_engine import BatchScorer, ScoreReduction, TermTable
+from checkpoint import DEFAULT_INTERVAL, Checkpoint, CheckpointBusy, run_key
+from candidate_index import IndexedScorer
+from match_results import MatchResults
+from parallel_engine import ParallelScorer
+from previous_run import PreviousRun
+from instrumentation import StageTimer, add_stats, run_summary
+from pruning import TermProfile, best_term_score, improves_on, score_bound
+from score_cache import PairScoreCache, pair_key
+from scored_run import ScoredRun
+from stream_engine import ReverseBest, iter_batches
+from target_index import TargetIndex, column_values
+from top_k import TopKMatches, top_k_columns
+
+ENGINES = ("batch", "index", "parallel", "loop")
+# Unique source values scored between two progress reports
+PROGRESS_BATCH_SIZE = 2_000
 
 class FuzzyMatcher:
-    def __init__(self, threshold: int = 70):
+    def __init__(
+        self,
+        threshold: int = 70,
+        engine: str = "batch",
+        workers: int = -1,
+        ngram_size: int = 3,
+        min_overlap: float = 0.0,
+        chunk_size: int = 256,
+        fast_path: bool = True,
+        score_cache: Optional[PairScoreCache] = None,
+        canonical: bool = False,
+        concept_pos: Optional[Sequence[str]] = None,
+        checkpoint_dir: Optional[str] = None,
+        checkpoint_interval: float = DEFAULT_INTERVAL
+    ):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine '{engine}', expected one of {ENGINES}")
         self.threshold = threshold
-        self.synonym_handler = SynonymHandler()
+        self.engine = engine
+        self.workers = workers
+        # Candidate index settings for engine="index"; candidates must share
+        # enough grams to reach the threshold, and raising min_overlap
+        # trades recall for speed
+        self.ngram_size = ngram_size
+        self.min_overlap = min_overlap
+        # Unique source values per task for engine="parallel"
+        self.chunk_size = chunk_size
+        # Resolve values equal after normalization by hash join at 100
+        # before fuzzy scoring (all engines except "loop")
+        self.fast_path = fast_path
+        # Optional persistent cache of scores from earlier runs
+        self.score_cache = score_cache
+        # Compare one canonical concept string per value instead of every
+        # pair of synonym expansions; concept_pos limits the WordNet senses
+        # used, e.g. ("n",) for nouns only
+        self.synonym_handler = SynonymHandler(canonical=canonical, concept_pos=concept_pos)
+        # Save finished batches of a run under checkpoint_dir every
+        # checkpoint_interval seconds; the same run restarted resumes there
+        self.checkpoint_dir = checkpoint_dir
+        self.checkpoint_interval = checkpoint_interval
+
+    def _score_namespace(self) -> str:
+        """Cache namespace of pair scores: the scorer and the synonym version."""
+        return f"token_set_ratio:{self.synonym_handler.version}"
+
+    def _best_namespace(self, target_index: TargetIndex) -> str:
+        """
+        Cache namespace of best targets, which also depend on the catalog and,
+        for the index engine, on its candidate settings.
+        """
+        engine = (
+            f"index-{self.ngram_size}-{self.min_overlap}-{self.threshold}"
+            if self.engine == "index" else "exact"
+        )
+        return f"best:{engine}:{self._score_namespace()}:{target_index.fingerprint}"
 
-    def calculate_similarity(self, source: str, target: str) -> int:
+    def calculate_similarity(self, source: str, target: str, score_cutoff: float = 0) -> int:
         """
         Calculate similarity between two strings using fuzzy matching and synonyms.
+        Like rapidfuzz, a (rounded) score below score_cutoff is returned as 0.
         """
+        return self.similarity_scores(source, [target], score_cutoff)[0]
+
+    def similarity_scores(self, source: str, targets: List[str], score_cutoff: float = 0) -> List[int]:
+        """
+        calculate_similarity of one source against each of the targets, with
+        a single score cache lookup and store for the whole row.
+        """
+        keys = None
+        cached = {}
+        if self.score_cache is not None:
+            preprocess = self.synonym_handler.preprocess_column_name
+            source_key = preprocess(source)
+            keys = [pair_key(source_key, preprocess(target)) for target in targets]
+            cached = self.score_cache.get_scores(self._score_namespace(), keys)
+
         # Get expanded terms for both strings
-        source_terms = self.synonym_handler.get_expanded_terms(source)
-        target_terms = self.synonym_handler.get_expanded_terms(target)
-        
-        # Calculate maximum similarity score among all term combinations
-        max_score = 0
-        for s_term in source_terms:
-            for t_term in target_terms:
-                score = fuzz.token_set_ratio(s_term, t_term)
-                max_score = max(max_score, score)
-        
-        return max_score
+        source_terms = tuple(self.synonym_handler.get_expanded_terms(source))
+        # Raw scores half a point short may still round up to the cutoff
+        raw_cutoff = max(score_cutoff - 0.5, 0)
+        scores = []
+        computed = {}
+        for position, target in enumerate(targets):
+            key = keys[position] if keys is not None else None
+            score = cached.get(key, computed.get(key))
+            if score is None:
+                target_terms = tuple(self.synonym_handler.get_expanded_terms(target))
+                # Maximum similarity among all term combinations, stopping at 100
+                max_score, _ = best_term_score(source_terms, target_terms, raw_cutoff)
+                score = int(round(max_score))
+                # Scores cut off below the cutoff are not exact and are not cached
+                if keys is not None and max_score >= raw_cutoff:
+                    computed[key] = score
+            scores.append(score if score >= score_cutoff else 0)
+        if computed:
+            self.score_cache.put_scores(self._score_namespace(), computed)
+        return scores
 
     def match_columns(
         self,
@@ -33,16 +129,840 @@ class FuzzyMatcher:
         target_df: pd.DataFrame,
         source_column: str,
         target_column: str,
-        id_column: str = "DataItemID"
+        id_column: str = "DataItemID",
+        target_index: Optional[TargetIndex] = None
     ) -> Dict[str, List[Dict]]:
         """
         Perform two-way matching between source and target columns.
-        Returns both matches and mismatches with confidence levels.
+        Returns both matches and mismatches with confidence levels, and a
+        stats block: pair counts, seconds per stage, cache hit rates,
+        term-expansion sizes and peak memory.
+
+        A target_index prepared by build_target_index for the same target
+        column is reused instead of being rebuilt (the loop engine ignores it).
+        With checkpoint_dir set, the columns are scored in checkpointed
+        batches by score_columns and partitioned by apply_threshold.
+        """
+        start = time.perf_counter()
+        if self.engine == "loop":
+            results = self._match_columns_loop(
+                source_df, target_df, source_column, target_column, id_column
+            )
+        elif self.checkpoint_dir is not None:
+            results = self.apply_threshold(self.score_columns(
+                source_df, target_df, source_column, target_column, id_column, target_index
+            ))
+        else:
+            results = self._match_columns_batch(
+                source_df, target_df, source_column, target_column, id_column, target_index
+            )
+        results["stats"]["seconds_total"] = time.perf_counter() - start
+        return results
+
+    def score_columns(
+        self,
+        source_df: pd.DataFrame,
+        target_df: pd.DataFrame,
+        source_column: str,
+        target_column: str,
+        id_column: str = "DataItemID",
+        target_index: Optional[TargetIndex] = None,
+        progress: Optional[Callable[[int, int, Dict], None]] = None,
+        batch_size: int = PROGRESS_BATCH_SIZE
+    ) -> ScoredRun:
+        """
+        Score the columns once, independently of the threshold, so that
+        apply_threshold can produce the results for any threshold without
+        rescoring. The loop engine has no reductions to keep and scores with
+        the batch engine here. The index engine only proposes targets that
+        can reach the matcher's threshold, so its runs are exact at that
+        threshold and above.
+
+        With a progress callback, unique source values are scored batch_size
+        at a time and progress(done, total, batch_best) is called after each
+        batch with the best targets of that batch; it may raise to stop the
+        run. The outcome is the same as in a single pass. With checkpoint_dir
+        set, batches are also checkpointed, and a run with the same inputs
+        resumes after the last checkpoint (reported as one batch).
+        """
+        start = time.perf_counter()
+        index_stats = {}
+        if target_index is None:
+            with StageTimer(index_stats).stage("index"):
+                target_index = self.build_target_index(target_df, target_column, id_column)
+        source_values = column_values(source_df, source_column)
+        if progress is None and self.checkpoint_dir is None:
+            with self._run_scorer() as scorer:
+                source_best, best_source, best_source_score, stats = self._score_sources(
+                    source_values, target_index, scorer, all_targets=True
+                )
+        else:
+            source_best, best_source, best_source_score, stats = self._score_in_batches(
+                source_values, target_index, progress, batch_size
+            )
+        return ScoredRun(
+            source_values, source_best, target_index, best_source, best_source_score,
+            {
+                "engine": self.engine,
+                **index_stats,
+                **stats,
+                **run_summary(self, target_index),
+                "seconds_total": time.perf_counter() - start
+            }
+        )
+
+    def _score_in_batches(
+        self,
+        source_values: List[str],
+        target_index: TargetIndex,
+        progress: Optional[Callable[[int, int, Dict], None]],
+        batch_size: int
+    ) -> Tuple[Dict[str, Tuple[Optional[str], int]], List[Optional[str]], np.ndarray, Dict]:
+        """
+        _score_sources over consecutive batches of unique source values.
+        Later batches hold later values, so merging the best sources with
+        strictly greater scores keeps the earliest source on ties, and a run
+        resumed from a checkpoint merges exactly as an uninterrupted one.
+        While another run of the same inputs holds the checkpoint, this one
+        scores without checkpointing.
+        """
+        row_counts = Counter(source_values)
+        unique_sources = list(row_counts)
+        source_best = {}
+        reverse = ReverseBest(len(target_index))
+        totals: Dict[str, int] = {}
+        done = 0
+
+        checkpoint = None
+        if self.checkpoint_dir is not None:
+            key = run_key(source_values, f"{self._best_namespace(target_index)}:{self.fast_path}")
+            try:
+                checkpoint = Checkpoint(self.checkpoint_dir, key, self.checkpoint_interval)
+            except CheckpointBusy:
+                pass
+        try:
+            with self._run_scorer() as scorer:
+                if checkpoint is not None:
+                    state = checkpoint.load()
+                    if state is not None:
+                        done = state["done"]
+                        source_best = state["source_best"]
+                        reverse.best_source = state["best_source"]
+                        reverse.best_score = state["best_score"]
+                        totals = state["totals"]
+                        if progress is not None:
+                            progress(done, len(unique_sources), source_best)
+                    unsaved = {}
+
+                for start in range(done, len(unique_sources), batch_size):
+                    batch = unique_sources[start:start + batch_size]
+                    # Each value repeated by its row count, for the row statistics
+                    rows = [value for value in batch for _ in range(row_counts[value])]
+                    batch_best, best_source, best_source_score, stats = self._score_sources(
+                        rows, target_index, scorer, all_targets=True
+                    )
+                    source_best.update(batch_best)
+                    reverse.add(best_source, best_source_score, set())
+                    add_stats(totals, stats)
+                    done = start + len(batch)
+                    if checkpoint is not None:
+                        unsaved.update(batch_best)
+                        if checkpoint.due() and done < len(unique_sources):
+                            checkpoint.save(done, unsaved, reverse.best_source, reverse.best_score, totals)
+                            unsaved = {}
+                    if progress is not None:
+                        progress(done, len(unique_sources), batch_best)
+
+                if not unique_sources:
+                    _, _, _, totals = self._score_sources([], target_index, scorer, all_targets=True)
+                if checkpoint is not None:
+                    checkpoint.clear()
+        finally:
+            if checkpoint is not None:
+                checkpoint.release()
+        return source_best, reverse.best_source, reverse.best_score, totals
+
+    def apply_threshold(self, run: ScoredRun, threshold: Optional[int] = None) -> Dict[str, List[Dict]]:
+        """
+        Partition a scored run into matches and mismatches at a threshold
+        (the matcher's own by default), as match_columns would report them.
+        """
+        stats = {key: value for key, value in run.stats.items() if key != "seconds_records"}
+        with StageTimer(stats).stage("records"):
+            matches, source_mismatches = self._forward_records(
+                run.source_values, run.source_best, run.target_index, threshold
+            )
+            target_mismatches = self._reverse_records(
+                run.target_index,
+                {m["target_value"] for m in matches},
+                run.best_source,
+                run.best_source_score,
+                threshold
+            )
+        return {
+            "matches": matches,
+            "source_mismatches": source_mismatches,
+            "target_mismatches": target_mismatches,
+            "stats": stats
+        }
+
+    def result_table(self, run: ScoredRun, threshold: Optional[int] = None) -> MatchResults:
+        """
+        Columnar counterpart of apply_threshold: the same records as arrays
+        of value indices and numeric confidences, built without a dict per
+        record. Use MatchResults.from_results for results already in dicts.
+        """
+        return MatchResults.from_run(run, self.threshold if threshold is None else threshold)
+
+    def match_delta(
+        self,
+        previous,
+        source_df: pd.DataFrame,
+        target_df: pd.DataFrame,
+        source_column: str,
+        target_column: str,
+        id_column: str = "DataItemID",
+        target_index: Optional[TargetIndex] = None
+    ) -> Dict[str, List[Dict]]:
+        """
+        Match changed inputs again starting from an earlier run: its results,
+        its export frame or the path of its exported file (see
+        PreviousRun.load). Returns what match_columns would, provided the
+        earlier run used the same synonyms and engine settings.
+
+        A source value whose earlier best target is still present is only
+        scored against the targets the earlier run did not report, the only
+        ones that can displace it; new values and values whose best target
+        is gone are scored against every target. Removed values are dropped.
+        Unmatched targets keep their reported best source unless it is gone,
+        and only targets with no usable earlier best are scored against the
+        remaining sources. Ties assume unchanged values kept their order.
+        """
+        previous = PreviousRun.load(previous)
+        if target_index is None:
+            target_index = self.build_target_index(target_df, target_column, id_column)
+        source_values = column_values(source_df, source_column)
+        unique_sources = list(dict.fromkeys(source_values))
+        position = {value: i for i, value in enumerate(unique_sources)}
+        target_position = {value: j for j, value in enumerate(target_index.unique_values)}
+        all_targets = list(range(len(target_index)))
+        with self._run_scorer() as scorer:
+            counters = {"pairs_scored": 0}
+
+            # Forward direction
+            resolved = self._exact_matches(unique_sources, target_index) if self.fast_path else {}
+            seen_targets = previous.targets
+            added_targets = [j for j in all_targets if target_index.unique_values[j] not in seen_targets]
+            kept = [
+                value for value in unique_sources if value not in resolved
+                and previous.source_best.get(value, (None, -1))[0] in target_position
+            ]
+            kept_set = set(kept)
+            fresh = [value for value in unique_sources if value not in resolved and value not in kept_set]
+
+            source_best = {value: (target_index.value(index), 100) for value, index in resolved.items()}
+            fresh_reduction = self._score_subset(scorer, fresh, all_targets, target_index, counters)
+            best_target, best_target_score = fresh_reduction.row_best()
+            for i, value in enumerate(fresh):
+                source_best[value] = (target_index.value(int(best_target[i])), int(best_target_score[i]))
+
+            added_reduction = self._score_subset(scorer, kept, added_targets, target_index, counters)
+            added_index, added_score = added_reduction.row_best()
+            for i, value in enumerate(kept):
+                target, score = previous.source_best[value]
+                if added_index[i] >= 0:
+                    j = added_targets[added_index[i]]
+                    if added_score[i] > score or (added_score[i] == score and j < target_position[target]):
+                        target, score = target_index.unique_values[j], int(added_score[i])
+                source_best[value] = (target, score)
+            matches, source_mismatches = self._forward_records(source_values, source_best, target_index)
+
+            # Reverse direction, only for the targets no source matched
+            best_source = [None] * len(target_index)
+            best_source_score = np.full(len(target_index), -1, dtype=np.int16)
+            self._fold_best_sources(
+                best_source, best_source_score, fresh, all_targets, fresh_reduction, position
+            )
+            self._fold_best_sources(
+                best_source, best_source_score, kept, added_targets, added_reduction, position
+            )
+            matched = {m["target_value"] for m in matches}
+            added_set = set(added_targets)
+            resolved_sources = [value for value in unique_sources if value in resolved]
+            new_resolved = [value for value in resolved_sources if value not in previous.source_best]
+            known = []      # best source reported earlier and still present
+            unknown = []    # old targets with no usable earlier best
+            for j, value in enumerate(target_index.unique_values):
+                if value in matched or j in added_set:
+                    continue
+                source, score = previous.target_best.get(value, (None, -1))
+                if source in position:
+                    if score > best_source_score[j] or (
+                        score == best_source_score[j] and position[source] < position[best_source[j]]
+                    ):
+                        best_source[j], best_source_score[j] = source, score
+                    known.append(j)
+                    continue
+                # Still matched by a remaining source: its best is at least that score
+                bound = [
+                    (score, source) for source, score in previous.matched_by.get(value, {}).items()
+                    if source in position
+                ]
+                if bound and max(bound)[0] >= self.threshold:
+                    best_source_score[j], best_source[j] = max(bound)
+                else:
+                    unknown.append(j)
+            open_added = [j for j in added_targets if target_index.unique_values[j] not in matched]
+            for sources, targets in (
+                (resolved_sources, open_added + unknown),
+                (new_resolved, known),
+                (kept, unknown)
+            ):
+                reduction = self._score_subset(scorer, sources, targets, target_index, counters)
+                self._fold_best_sources(best_source, best_source_score, sources, targets, reduction, position)
+            target_mismatches = self._reverse_records(target_index, matched, best_source, best_source_score)
+
+            pairs_total = len(unique_sources) * len(target_index)
+            stats = {
+                "engine": self.engine,
+                "pairs_total": pairs_total,
+                "pairs_scored": counters["pairs_scored"],
+                "pairs_pruned": pairs_total - counters["pairs_scored"],
+                "fast_path_values": len(resolved),
+                "fast_path_rows": sum(1 for value in source_values if value in resolved),
+                "sources_added": sum(1 for value in unique_sources if value not in previous.source_best),
+                "sources_removed": len(set(previous.source_best) - set(unique_sources)),
+                "sources_rescored": len(fresh),
+                "targets_added": len(added_targets),
+                "targets_rescored": len(unknown)
+            }
+            if "term_pairs_skipped" in counters:
+                stats["term_pairs_skipped"] = counters["term_pairs_skipped"]
+            stats.update(run_summary(self, target_index))
+            return {
+                "matches": matches,
+                "source_mismatches": source_mismatches,
+                "target_mismatches": target_mismatches,
+                "stats": stats
+            }
+
+    def _score_subset(
+        self,
+        scorer,
+        sources: List[str],
+        targets: List[int],
+        target_index: TargetIndex,
+        counters: Dict[str, int]
+    ) -> ScoreReduction:
+        """Score some source values against the unique targets at the given positions."""
+        if len(targets) == len(target_index):
+            choices = target_index.table
+        else:
+            choices = target_index.table.take(targets)
+        reduction = scorer.score(TermTable(sources, self.synonym_handler), choices)
+        counters["pairs_scored"] += scorer.stats["pairs_scored"]
+        if "term_pairs_skipped" in scorer.stats:
+            counters["term_pairs_skipped"] = (
+                counters.get("term_pairs_skipped", 0) + scorer.stats["term_pairs_skipped"]
+            )
+        return reduction
+
+    def top_k_matches(
+        self,
+        source_df: pd.DataFrame,
+        target_df: pd.DataFrame,
+        source_column: str,
+        target_column: str,
+        k: int = 5,
+        id_column: str = "DataItemID",
+        target_index: Optional[TargetIndex] = None
+    ) -> TopKMatches:
+        """
+        Keep the k best targets of every unique source value in one pass, so
+        alternatives and other thresholds can be reviewed without rescoring.
+        Every candidate score is needed, so the batch engine's score blocks
+        are used whatever the configured engine; with fast_path, values equal
+        after normalization score 100 as in match_columns.
+        """
+        if k < 1:
+            raise ValueError(f"k must be at least 1, got {k}")
+        if target_index is None:
+            target_index = self.build_target_index(target_df, target_column, id_column)
+        source_values = column_values(source_df, source_column)
+        unique_sources = list(dict.fromkeys(source_values))
+        position = {value: i for i, value in enumerate(unique_sources)}
+        row_sources = np.asarray([position[value] for value in source_values], dtype=np.intp)
+
+        indices = np.full((len(unique_sources), k), -1, dtype=np.intp)
+        scores = np.full((len(unique_sources), k), -1, dtype=np.int16)
+        if unique_sources and len(target_index):
+            resolved = self._exact_matches(unique_sources, target_index) if self.fast_path else {}
+            exact_rows = np.asarray([position[value] for value in resolved], dtype=np.intp)
+            exact_targets = np.asarray(list(resolved.values()), dtype=np.intp)
+
+            scorer = BatchScorer(workers=self.workers)
+            query = TermTable(unique_sources, self.synonym_handler)
+            for start, end, block in scorer.iter_blocks(query, target_index.table):
+                block = np.rint(block)
+                in_block = (exact_rows >= start) & (exact_rows < end)
+                # Rank exact matches above equal fuzzy 100s, as match_columns
+                # prefers them, then report them at 100
+                block[exact_rows[in_block] - start, exact_targets[in_block]] = 101
+                indices[start:end], scores[start:end] = top_k_columns(block, k)
+            np.minimum(scores, 100, out=scores)
+
+        return TopKMatches(
+            unique_sources,
+            row_sources,
+            target_index.unique_values,
+            [target_index.id_of(value) for value in target_index.unique_values],
+            indices,
+            scores
+        )
+
+    def _make_scorer(self):
+        """Create the value scorer for the configured engine."""
+        if self.engine == "index":
+            return IndexedScorer(self.ngram_size, self.min_overlap, workers=1, threshold=self.threshold)
+        if self.engine == "parallel":
+            return ParallelScorer(self.workers, self.chunk_size)
+        return BatchScorer(workers=self.workers)
+
+    @contextmanager
+    def _run_scorer(self):
+        """
+        One scorer for a whole run, closed when the run ends, so the parallel
+        engine starts its worker pool and ships the targets once per run.
+        """
+        scorer = self._make_scorer()
+        try:
+            yield scorer
+        finally:
+            if isinstance(scorer, ParallelScorer):
+                scorer.close()
+
+    def build_target_index(
+        self,
+        target_df: pd.DataFrame,
+        target_column: str,
+        id_column: str = "DataItemID"
+    ) -> TargetIndex:
+        """
+        Deduplicate and expand a target column once so it can be matched
+        against several sources.
+        """
+        return TargetIndex.from_dataframe(target_df, target_column, id_column, self.synonym_handler)
+
+    def match_columns_dask(
+        self,
+        source,
+        target_df: pd.DataFrame,
+        source_column: str,
+        target_column: str,
+        output_path: str,
+        id_column: str = "DataItemID",
+        scheduler: str = "threads",
+        client=None
+    ) -> Dict:
+        """
+        Out-of-core matching with Dask. The source is a dask DataFrame or a
+        path to partitioned parquet and may be larger than memory; the target
+        must fit in memory and is indexed once.
+
+        Each source partition writes its rows to output_path/part-NNNNN.parquet
+        and the target mismatches go to output_path/target_mismatches.parquet,
+        all in the format_results_for_export layout, so the whole directory
+        reads back as one table. scheduler is any local Dask scheduler
+        ("threads", "processes" or "synchronous").
+
+        Only the threaded and synchronous schedulers share one copy of the
+        target index and the matcher between partitions; the processes
+        scheduler pickles both into every partition task. Pass a
+        dask.distributed client instead to scatter them once to each worker
+        and run the partitions there; scheduler is then ignored.
+        """
+        import dask
+        import dask.dataframe as dd
+        from dask_engine import match_partition, merge_partitions
+
+        if isinstance(source, str):
+            source = dd.read_parquet(source, columns=[source_column])
+        else:
+            source = source[[source_column]]
+        if isinstance(target_df, dd.DataFrame):
+            columns = [c for c in (target_column, id_column) if c in target_df.columns]
+            target_df = target_df[columns].compute()
+
+        os.makedirs(output_path, exist_ok=True)
+        target_index = self.build_target_index(target_df, target_column, id_column)
+        if client is not None:
+            shared_matcher = client.scatter(self, broadcast=True)
+            shared_index = client.scatter(target_index, broadcast=True)
+        else:
+            shared_matcher = dask.delayed(self)
+            shared_index = dask.delayed(target_index)
+        tasks = [
+            dask.delayed(match_partition)(
+                shared_matcher, partition, number, source_column, shared_index, output_path
+            )
+            for number, partition in enumerate(source.to_delayed())
+        ]
+        if client is not None:
+            partition_results = client.gather(client.compute(tasks))
+        else:
+            partition_results = dask.compute(*tasks, scheduler=scheduler)
+
+        best_source, best_score, matched = merge_partitions(partition_results, len(target_index))
+        target_mismatches = self._reverse_records(target_index, matched, best_source, best_score)
+        self.format_results_for_export({
+            "matches": [],
+            "source_mismatches": [],
+            "target_mismatches": target_mismatches
+        }).astype(str).to_parquet(
+            os.path.join(output_path, "target_mismatches.parquet"), index=False
+        )
+
+        stats = {"engine": self.engine, "partitions": len(partition_results)}
+        for result in partition_results:
+            add_stats(stats, result["stats"])
+        stats.update(run_summary(self, target_index))
+        return {
+            "output_path": output_path,
+            "match_count": sum(r["match_count"] for r in partition_results),
+            "source_mismatch_count": sum(r["source_mismatch_count"] for r in partition_results),
+            "target_mismatches": target_mismatches,
+            "stats": stats
+        }
+
+    def iter_matches(
+        self,
+        source_values: Iterable,
+        target_index: TargetIndex,
+        batch_size: int = 10_000
+    ) -> Iterator[Dict]:
+        """
+        Stream source values of any length, from a CSV reader, a SQL cursor
+        or a worksheet's rows, against a prepared target index.
+
+        Yields one result dict per batch of batch_size values, holding that
+        batch's matches and source mismatches as soon as it is scored, then a
+        last dict with the target mismatches, which are only known once every
+        source has been seen. Memory is bounded by the target index and one
+        batch: between batches only the best source of each target is kept.
+        Records are those match_columns gives for the concatenated values,
+        except that target mismatches come last.
+        """
+        reverse = ReverseBest(len(target_index))
+        totals: Dict[str, int] = {}
+        batches = rows = 0
+        with self._run_scorer() as scorer:
+            for batch in iter_batches(source_values, batch_size):
+                source_best, best_source, best_source_score, stats = self._score_sources(
+                    batch, target_index, scorer
+                )
+                matches, source_mismatches = self._forward_records(batch, source_best, target_index)
+                reverse.add(best_source, best_source_score, {m["target_value"] for m in matches})
+                add_stats(totals, stats)
+                batches += 1
+                rows += len(batch)
+                yield {
+                    "matches": matches,
+                    "source_mismatches": source_mismatches,
+                    "target_mismatches": [],
+                    "stats": {"engine": self.engine, "batch": batches, "rows": len(batch), **stats}
+                }
+
+        yield {
+            "matches": [],
+            "source_mismatches": [],
+            "target_mismatches": self._reverse_records(
+                target_index, reverse.matched, reverse.best_source, reverse.best_score
+            ),
+            "stats": {
+                "engine": self.engine,
+                "batches": batches,
+                "source_rows": rows,
+                **totals,
+                **run_summary(self, target_index)
+            }
+        }
+
+    def _match_columns_batch(
+        self,
+        source_df: pd.DataFrame,
+        target_df: pd.DataFrame,
+        source_column: str,
+        target_column: str,
+        id_column: str = "DataItemID",
+        target_index: Optional[TargetIndex] = None
+    ) -> Dict[str, List[Dict]]:
+        """
+        Batch engine: deduplicate both columns, expand each unique value once
+        and score whole blocks of the matrix with rapidfuzz's cdist. The
+        matrix is scored once and reduced in both directions, so the reverse
+        pass needs no rescoring.
+
+        The index engine shares this pipeline but only scores the pairs
+        proposed by an n-gram candidate index over the target terms, and the
+        parallel engine scores pair by pair in a process pool. With fast_path,
+        values equal after normalization are matched first by hash join.
+        """
+        index_stats = {}
+        if target_index is None:
+            with StageTimer(index_stats).stage("index"):
+                target_index = self.build_target_index(target_df, target_column, id_column)
+        source_values = column_values(source_df, source_column)
+
+        with self._run_scorer() as scorer:
+            source_best, best_source, best_source_score, stats = self._score_sources(
+                source_values, target_index, scorer
+            )
+        with StageTimer(stats).stage("records"):
+            matches, source_mismatches = self._forward_records(source_values, source_best, target_index)
+
+            # Reverse direction: similarity is symmetric, so the best source for
+            # each target is a column-wise reduction of the same scores
+            target_mismatches = self._reverse_records(
+                target_index,
+                {m["target_value"] for m in matches},
+                best_source,
+                best_source_score
+            )
+
+        return {
+            "matches": matches,
+            "source_mismatches": source_mismatches,
+            "target_mismatches": target_mismatches,
+            "stats": {"engine": self.engine, **index_stats, **stats, **run_summary(self, target_index)}
+        }
+
+    def _exact_matches(self, unique_sources: List[str], target_index: TargetIndex) -> Dict[str, int]:
+        """Hash-join source values to targets equal after normalization."""
+        resolved = {}
+        for value in unique_sources:
+            index = target_index.exact_match(self.synonym_handler.preprocess_column_name(value))
+            if index >= 0:
+                resolved[value] = index
+        return resolved
+
+    def _score_sources(
+        self,
+        source_values: List[str],
+        target_index: TargetIndex,
+        scorer,
+        all_targets: bool = False
+    ) -> Tuple[Dict[str, Tuple[Optional[str], int]], List[Optional[str]], np.ndarray, Dict]:
+        """
+        Find the best target and score for every unique source value, and the
+        best source and score for every unique target, plus scoring stats.
+
+        Values resolved by the exact fast path are not fuzzy scored against
+        the whole target column; they are only scored against the targets no
+        source matched, which are the only ones the reverse pass reports.
+        With all_targets the best sources must hold for any threshold, so
+        they are scored against every target except those with a source at
+        100, which are matched at every threshold.
+        """
+        timings = {}
+        timer = StageTimer(timings)
+        unique_sources = list(dict.fromkeys(source_values))
+        with timer.stage("fast_path"):
+            resolved = self._exact_matches(unique_sources, target_index) if self.fast_path else {}
+
+            # Best targets of sources seen in earlier runs against the same
+            # catalog; like fast-path values, they only need the reverse pass
+            cached = {}
+            if self.score_cache is not None:
+                namespace = self._best_namespace(target_index)
+                normalized = {
+                    value: self.synonym_handler.preprocess_column_name(value)
+                    for value in unique_sources if value not in resolved
+                }
+                best = self.score_cache.get_best(namespace, normalized.values())
+                cached = {value: best[key] for value, key in normalized.items() if key in best}
+        fuzzy_sources = [
+            value for value in unique_sources if value not in resolved and value not in cached
+        ]
+
+        with timer.stage("expand"):
+            source_table = TermTable(fuzzy_sources, self.synonym_handler)
+        with timer.stage("score"):
+            reduction = scorer.score(source_table, target_index.table)
+        pairs_scored = scorer.stats["pairs_scored"]
+        term_pairs_skipped = scorer.stats.get("term_pairs_skipped")
+
+        source_best = {value: (target_index.value(index), 100) for value, index in resolved.items()}
+        best_target, best_target_score = reduction.row_best()
+        for i, value in enumerate(fuzzy_sources):
+            source_best[value] = (target_index.value(int(best_target[i])), int(best_target_score[i]))
+        for value, (index, score) in cached.items():
+            source_best[value] = (target_index.value(index), score)
+        if self.score_cache is not None:
+            self.score_cache.put_best(namespace, {
+                normalized[value]: (best_target[i], best_target_score[i])
+                for i, value in enumerate(fuzzy_sources) if best_target[i] >= 0
+            })
+
+        col_index, col_score = reduction.col_best()
+        best_source = [fuzzy_sources[i] if i >= 0 else None for i in col_index]
+        best_source_score = col_score.copy()
+
+        # Fast-path and cached values against the open targets
+        if resolved or cached:
+            with timer.stage("reverse"):
+                threshold = 100 if all_targets else self.threshold
+                matched = {
+                    target for target, score in source_best.values() if score >= threshold
+                }
+                open_targets = [
+                    j for j, value in enumerate(target_index.unique_values) if value not in matched
+                ]
+                # In source order, so ties within this pass keep the earliest
+                resolved_sources = [
+                    value for value in unique_sources if value in resolved or value in cached
+                ]
+                extra = scorer.score(
+                    TermTable(resolved_sources, self.synonym_handler),
+                    target_index.table.take(open_targets)
+                )
+                pairs_scored += scorer.stats["pairs_scored"]
+                if term_pairs_skipped is not None:
+                    term_pairs_skipped += scorer.stats["term_pairs_skipped"]
+
+                position = {value: i for i, value in enumerate(unique_sources)}
+                self._fold_best_sources(
+                    best_source, best_source_score, resolved_sources, open_targets, extra, position
+                )
+
+        pairs_total = len(unique_sources) * len(target_index)
+        stats = {
+            "pairs_total": pairs_total,
+            "pairs_scored": pairs_scored,
+            "pairs_pruned": pairs_total - pairs_scored,
+            "fast_path_values": len(resolved),
+            "fast_path_rows": sum(1 for value in source_values if value in resolved),
+            "score_cache_values": len(cached),
+            "source_terms": len(source_table.flat),
+            **timings
+        }
+        # Only the pair-by-pair scorer can stop inside a value pair
+        if term_pairs_skipped is not None:
+            stats["term_pairs_skipped"] = term_pairs_skipped
+        return source_best, best_source, best_source_score, stats
+
+    def _fold_best_sources(
+        self,
+        best_source: List[Optional[str]],
+        best_source_score: np.ndarray,
+        sources: List[str],
+        targets: List[int],
+        reduction: ScoreReduction,
+        position: Dict[str, int]
+    ):
+        """
+        Merge the column-wise best of a reduction of ``sources`` against the
+        unique targets at ``targets`` into the best sources, keeping the
+        earliest source on ties, as a single pass would.
+        """
+        col_index, col_score = reduction.col_best()
+        for k, j in enumerate(targets):
+            if col_index[k] < 0:
+                continue
+            candidate = sources[col_index[k]]
+            if col_score[k] > best_source_score[j] or (
+                col_score[k] == best_source_score[j]
+                and position[candidate] < position[best_source[j]]
+            ):
+                best_source[j] = candidate
+                best_source_score[j] = col_score[k]
+
+    def _forward_records(
+        self,
+        source_values: List[str],
+        source_best: Dict[str, Tuple[Optional[str], int]],
+        target_index: TargetIndex,
+        threshold: Optional[int] = None
+    ) -> Tuple[List[Dict], List[Dict]]:
+        """Build match and source mismatch records, one per source row."""
+        threshold = self.threshold if threshold is None else threshold
+        matches = []
+        source_mismatches = []
+        for source_value in source_values:
+            target_value, score = source_best[source_value]
+            if score >= threshold:
+                matches.append({
+                    "source_value": source_value,
+                    "target_value": target_value,
+                    "data_item_id": target_index.id_of(target_value),
+                    "confidence": score,
+                    "direction": "source_to_target"
+                })
+            else:
+                source_mismatches.append({
+                    "value": source_value,
+                    "best_match": target_value,
+                    "confidence": score,
+                    "direction": "source_to_target"
+                })
+        return matches, source_mismatches
+
+    def _reverse_records(
+        self,
+        target_index: TargetIndex,
+        matched_target_values: set,
+        best_source_values: List[Optional[str]],
+        best_source_scores,
+        threshold: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        Build target mismatch records, one per unmatched target row, from the
+        best source value and score of each unique target.
+        """
+        threshold = self.threshold if threshold is None else threshold
+        target_best = {
+            value: (best_source_values[j], int(best_source_scores[j]))
+            for j, value in enumerate(target_index.unique_values)
+        }
+
+        target_mismatches = []
+        for target_value, target_id in zip(target_index.values, target_index.ids):
+            if target_value in matched_target_values:
+                continue
+            source_value, score = target_best[target_value]
+            if score < threshold:
+                target_mismatches.append({
+                    "value": target_value,
+                    "id": target_id,
+                    "best_match": source_value,
+                    "confidence": score,
+                    "direction": "target_to_source"
+                })
+        return target_mismatches
+
+    def _match_columns_loop(
+        self,
+        source_df: pd.DataFrame,
+        target_df: pd.DataFrame,
+        source_column: str,
+        target_column: str,
+        id_column: str = "DataItemID"
+    ) -> Dict[str, List[Dict]]:
+        """
+        Reference engine: score one pair at a time like calculate_similarity,
+        skipping candidates that provably cannot beat the running best.
         """
         # Initialize results
         matches = []
         source_mismatches = []
         target_mismatches = []
+        counters = {"pairs_total": 0, "pairs_pruned": 0, "term_pairs_skipped": 0, "score_cache_hits": 0}
+        profiles = {}
+        pair_scores = None
+        if self.score_cache is not None:
+            pair_scores = self._prefetch_pair_scores(
+                column_values(source_df, source_column), column_values(target_df, target_column)
+            )
+            known_pairs = set(pair_scores)
 
         # Process source to target matches
         for _, source_row in source_df.iterrows():
@@ -51,9 +971,11 @@ class FuzzyMatcher:
             best_score = -1
             
             # Find best match in target
-            for _, target_row in target_df.iterrows():
+            for position, (_, target_row) in enumerate(target_df.iterrows()):
                 target_value = str(target_row[target_column]).strip()
-                score = self.calculate_similarity(source_value, target_value)
+                score = self._bounded_similarity(
+                    source_value, target_value, best_score, profiles, counters, pair_scores
+                )
                 
                 if score > best_score:
                     best_score = score
@@ -62,6 +984,11 @@ class FuzzyMatcher:
                         "id": target_row.get(id_column),
                         "confidence": score
                     }
+                    # Nothing can beat a perfect score; ties keep the earliest
+                    if best_score == 100:
+                        counters["pairs_pruned"] += len(target_df) - position - 1
+                        break
+            counters["pairs_total"] += len(target_df)
             
             # Record match or mismatch
             if best_score >= self.threshold:
@@ -94,9 +1021,11 @@ class FuzzyMatcher:
             best_score = -1
             
             # Find best match in source
-            for _, source_row in source_df.iterrows():
+            for position, (_, source_row) in enumerate(source_df.iterrows()):
                 source_value = str(source_row[source_column]).strip()
-                score = self.calculate_similarity(target_value, source_value)
+                score = self._bounded_similarity(
+                    target_value, source_value, best_score, profiles, counters, pair_scores
+                )
                 
                 if score > best_score:
                     best_score = score
@@ -104,6 +1033,10 @@ class FuzzyMatcher:
                         "value": source_value,
                         "confidence": score
                     }
+                    if best_score == 100:
+                        counters["pairs_pruned"] += len(source_df) - position - 1
+                        break
+            counters["pairs_total"] += len(source_df)
             
             # Record mismatch if no good match found
             if best_score < self.threshold:
@@ -115,48 +1048,99 @@ class FuzzyMatcher:
                     "direction": "target_to_source"
                 })
 
+        if pair_scores is not None:
+            self._store_pair_scores(
+                {pair: score for pair, score in pair_scores.items() if pair not in known_pairs}
+            )
+
         return {
             "matches": matches,
             "source_mismatches": source_mismatches,
-            "target_mismatches": target_mismatches
+            "target_mismatches": target_mismatches,
+            "stats": {
+                "engine": "loop",
+                "pairs_total": counters["pairs_total"],
+                "pairs_scored": counters["pairs_total"] - counters["pairs_pruned"],
+                "pairs_pruned": counters["pairs_pruned"],
+                "term_pairs_skipped": counters["term_pairs_skipped"],
+                "score_cache_hits": counters["score_cache_hits"],
+                **run_summary(self)
+            }
         }
 
-    def format_results_for_export(self, results: Dict[str, List[Dict]]) -> pd.DataFrame:
+    def _prefetch_pair_scores(self, source_values: List[str], target_values: List[str]) -> Dict:
         """
-        Format matching results into a pandas DataFrame suitable for export.
+        Cached scores of every pair of the two columns, fetched in bulk and
+        keyed by the raw value pair (in either order).
         """
-        # Format matches
-        match_records = [{
-            "Type": "Match",
-            "Source Value": m["source_value"],
-            "Target Value": m["target_value"],
-            "DataItemID": m["data_item_id"],
-            "Confidence": f"{m['confidence']}%",
-            "Direction": m["direction"]
-        } for m in results["matches"]]
-        
-        # Format source mismatches
-        source_mismatch_records = [{
-            "Type": "Source Mismatch",
-            "Source Value": m["value"],
-            "Target Value": m["best_match"] if m["best_match"] else "No Match",
-            "DataItemID": "N/A",
-            "Confidence": f"{m['confidence']}%",
-            "Direction": m["direction"]
-        } for m in results["source_mismatches"]]
-        
-        # Format target mismatches
-        target_mismatch_records = [{
-            "Type": "Target Mismatch",
-            "Source Value": m["best_match"] if m["best_match"] else "No Match",
-            "Target Value": m["value"],
-            "DataItemID": m["id"],
-            "Confidence": f"{m['confidence']}%",
-            "Direction": m["direction"]
-        } for m in results["target_mismatches"]]
-        
-        # Combine all records
-        all_records = match_records + source_mismatch_records + target_mismatch_records
-        
-        # Convert to DataFrame
-        return pd.DataFrame(all_records)
+        preprocess = self.synonym_handler.preprocess_column_name
+        sources = {value: preprocess(value) for value in source_values}
+        targets = {value: preprocess(value) for value in target_values}
+        cached = self.score_cache.get_scores(
+            self._score_namespace(),
+            [(s, t) for s in set(sources.values()) for t in set(targets.values())]
+        )
+        pair_scores = {}
+        for source, source_key in sources.items():
+            for target, target_key in targets.items():
+                score = cached.get(pair_key(source_key, target_key))
+                if score is not None:
+                    pair_scores[pair_key(source, target)] = score
+        return pair_scores
+
+    def _store_pair_scores(self, pair_scores: Dict):
+        """Store exact scores keyed by raw value pairs under their normalized pairs."""
+        preprocess = self.synonym_handler.preprocess_column_name
+        self.score_cache.put_scores(self._score_namespace(), {
+            (preprocess(a), preprocess(b)): score for (a, b), score in pair_scores.items()
+        })
+
+    def _bounded_similarity(
+        self,
+        source: str,
+        target: str,
+        best_score: int,
+        profiles: Dict[str, TermProfile],
+        counters: Dict[str, int],
+        pair_scores: Optional[Dict] = None
+    ) -> int:
+        """
+        calculate_similarity for a best-match search: returns the exact score
+        when it can beat best_score and otherwise any score not above it.
+        The threshold is deliberately not used as a bound, because mismatches
+        still report their best sub-threshold candidate. Exact scores are
+        read from and added to pair_scores when given.
+        """
+        if pair_scores is not None:
+            key = pair_key(source, target)
+            if key in pair_scores:
+                counters["score_cache_hits"] += 1
+                return pair_scores[key]
+        for value in (source, target):
+            if value not in profiles:
+                profiles[value] = TermProfile(self.synonym_handler.get_expanded_terms(value))
+        cutoff = improves_on(best_score)
+        if score_bound(profiles[source], profiles[target]) < cutoff:
+            counters["pairs_pruned"] += 1
+            return 0
+        max_score, skipped = best_term_score(
+            profiles[source].terms, profiles[target].terms, cutoff
+        )
+        counters["term_pairs_skipped"] += skipped
+        if pair_scores is not None and max_score >= cutoff:
+            pair_scores[key] = int(round(max_score))
+        return int(round(max_score))
+
+    def format_results_for_export(self, results) -> pd.DataFrame:
+        """
+        Format matching results (dicts or a MatchResults) into a pandas
+        DataFrame suitable for export, with confidences as "85%" text.
+        MatchResults.to_frame gives the same layout with numeric confidences.
+        """
+        if not isinstance(results, MatchResults):
+            results = MatchResults.from_results(results)
+        export = results.to_frame().astype({
+            "Type": object, "Source Value": object, "Target Value": object, "Direction": object
+        })
+        export["Confidence"] = export["Confidence"].astype(str) + "%"
+        return export
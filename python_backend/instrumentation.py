@@ -0,0 +1,102 @@
+"""
+Run statistics and profiling hooks.
+
+Stages of a run add their wall time to flat ``seconds_<stage>`` counters in
+the run's stats, so batches and partitions sum them like the pair counts.
+``run_summary`` adds what is read once per run: synonym and score cache hit
+rates, term-expansion sizes and the process's peak resident memory.
+``profiled`` wraps any call in cProfile and dumps the profile to a file.
+"""
+import cProfile
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Stages in the order they run, for display
+STAGES = ("index", "fast_path", "expand", "score", "reverse", "records")
+
+
+class StageTimer:
+    """Accumulates wall time per stage into a stats dict."""
+
+    def __init__(self, stats: Dict):
+        self.stats = stats
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            key = f"seconds_{name}"
+            self.stats[key] = self.stats.get(key, 0.0) + time.perf_counter() - start
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident memory of this process so far, where the OS reports it."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere
+    return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+
+
+def cache_rates(counters: Dict[str, Dict]) -> Dict[str, Dict]:
+    """Hit/miss counters with their hit rate added."""
+    rates = {}
+    for name, counts in counters.items():
+        lookups = counts["hits"] + counts["misses"]
+        rates[name] = {**counts, "hit_rate": counts["hits"] / lookups if lookups else 0.0}
+    return rates
+
+
+def run_summary(matcher, target_index=None) -> Dict:
+    """Per-run figures that are read once rather than summed over batches."""
+    summary = {"synonym_cache": cache_rates(matcher.synonym_handler.cache_stats())}
+    if matcher.score_cache is not None:
+        summary["score_cache"] = matcher.score_cache.stats()
+    if target_index is not None:
+        table = target_index.table
+        summary["target_terms"] = len(table.flat)
+        summary["target_terms_per_value"] = len(table.flat) / max(len(table), 1)
+    summary["peak_rss_mb"] = peak_rss_mb()
+    return summary
+
+
+def add_stats(totals: Dict, stats: Dict):
+    """Sum the numeric counters of stats into totals."""
+    for key, value in stats.items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            totals[key] = totals.get(key, 0) + value
+
+
+def stage_seconds(stats: Dict) -> Dict[str, float]:
+    """The stage timings of a stats block, in STAGES order."""
+    return {
+        stage: stats[f"seconds_{stage}"] for stage in STAGES if f"seconds_{stage}" in stats
+    }
+
+
+@contextmanager
+def profiled(path: Optional[str]):
+    """
+    Profile the calls made in this block with cProfile and dump the stats to
+    path, readable with pstats or snakeviz. Does nothing when path is None.
+    Only the calling thread is profiled.
+    """
+    if path is None:
+        yield
+        return
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        profile.dump_stats(path)
@@ -0,0 +1,200 @@
+"""
+Background matching jobs for the Streamlit app.
+
+Streamlit reruns the script on every interaction, so a long run cannot live
+in the script thread. A job runs its work in a worker pool shared by every
+session of the process, reports progress through ``update`` and stops at
+the next report once cancelled. Each owner (a browser session) has at most
+one active job: submitting a new one cancels the previous one, so one user
+cannot fill the pool.
+"""
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+DEFAULT_WORKERS = int(os.environ.get("MATCH_JOB_WORKERS", 2))
+# Partial results kept per job; older ones are dropped as new ones arrive
+DEFAULT_PARTIAL_LIMIT = 10
+
+QUEUED, RUNNING, DONE, CANCELLED, FAILED = "queued", "running", "done", "cancelled", "failed"
+FINISHED = (DONE, CANCELLED, FAILED)
+
+
+class JobCancelled(Exception):
+    """Raised inside a job's work when it has been cancelled."""
+
+
+class MatchJob:
+    """
+    State of one background job, read by the UI while a worker updates it.
+    ``partial`` keeps the last ``partial_limit`` results the work reports
+    after each step, so results can be shown before the job finishes.
+    """
+
+    def __init__(self, owner: str, work: Callable[["MatchJob"], Any], key: Any = None,
+                 partial_limit: int = DEFAULT_PARTIAL_LIMIT):
+        self.id = uuid.uuid4().hex
+        self.owner = owner
+        self.key = key
+        self.work = work
+        self.state = QUEUED
+        self.stage = "Queued"
+        self.done = 0
+        self.total = 0
+        self.partial: Deque[Any] = deque(maxlen=partial_limit)
+        self.result = None
+        self.error: Optional[str] = None
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._cancelled = threading.Event()
+
+    def run(self):
+        if self._cancelled.is_set():
+            self._finish(CANCELLED)
+            return
+        self.state = RUNNING
+        self.started_at = time.time()
+        try:
+            self.result = self.work(self)
+            self._finish(DONE)
+        except JobCancelled:
+            self._finish(CANCELLED)
+        except Exception as e:
+            self.error = str(e)
+            self._finish(FAILED)
+
+    def _finish(self, state: str):
+        self.state = state
+        self.stage = state.capitalize()
+        self.finished_at = time.time()
+
+    def set_stage(self, stage: str):
+        self.check_cancelled()
+        self.stage = stage
+
+    def update(self, done: int, total: int, partial: Any = None):
+        """Record progress and a partial result, stopping if cancelled."""
+        self.done = done
+        self.total = total
+        if partial is not None:
+            self.partial.append(partial)
+        self.check_cancelled()
+
+    def check_cancelled(self):
+        if self._cancelled.is_set():
+            raise JobCancelled()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def finished(self) -> bool:
+        return self.state in FINISHED
+
+    @property
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    @property
+    def rate(self) -> float:
+        """Units of progress per second so far."""
+        return self.done / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def eta(self) -> Optional[float]:
+        """Seconds left at the current rate, or None before the first report."""
+        if self.finished:
+            return 0.0
+        if not self.rate or not self.total:
+            return None
+        return (self.total - self.done) / self.rate
+
+    @property
+    def fraction(self) -> float:
+        if self.state == DONE:
+            return 1.0
+        return self.done / self.total if self.total else 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "state": self.state,
+            "stage": self.stage,
+            "done": self.done,
+            "total": self.total,
+            "fraction": self.fraction,
+            "rate": self.rate,
+            "eta": self.eta,
+            "elapsed": self.elapsed,
+            "error": self.error
+        }
+
+
+class JobRunner:
+    """Bounded worker pool running MatchJobs, at most one active per owner."""
+
+    def __init__(self, workers: int = DEFAULT_WORKERS):
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="match-job")
+        self._jobs: Dict[str, MatchJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, owner: str, work: Callable[[MatchJob], Any], key: Any = None) -> MatchJob:
+        """Queue work for owner, cancelling the owner's previous job."""
+        job = MatchJob(owner, work, key)
+        with self._lock:
+            previous = self._jobs.get(owner)
+            if previous is not None:
+                previous.cancel()
+            self._jobs[owner] = job
+        self.executor.submit(job.run)
+        return job
+
+    def job(self, owner: str) -> Optional[MatchJob]:
+        with self._lock:
+            return self._jobs.get(owner)
+
+    def active(self) -> List[MatchJob]:
+        with self._lock:
+            return [job for job in self._jobs.values() if not job.finished]
+
+    def queue_position(self, job: MatchJob) -> int:
+        """Jobs queued ahead of job, 0 once it runs."""
+        if job.state != QUEUED:
+            return 0
+        return sum(
+            1 for other in self.active()
+            if other.state == QUEUED and other.submitted_at < job.submitted_at
+        )
+
+    def forget(self, owner: str):
+        """Drop the owner's finished job, e.g. once its result is stored."""
+        with self._lock:
+            job = self._jobs.get(owner)
+            if job is not None and job.finished:
+                del self._jobs[owner]
+
+    def shutdown(self):
+        for job in self.active():
+            job.cancel()
+        self.executor.shutdown(wait=True)
+
+
+_default_runner: Optional[JobRunner] = None
+_default_lock = threading.Lock()
+
+
+def default_runner() -> JobRunner:
+    """Process-wide runner shared by every Streamlit session."""
+    global _default_runner
+    with _default_lock:
+        if _default_runner is None:
+            _default_runner = JobRunner()
+        return _default_runner
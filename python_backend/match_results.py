@@ -0,0 +1,238 @@
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Iterator, List
+
+EXPORT_COLUMNS = ["Type", "Source Value", "Target Value", "DataItemID", "Confidence", "Direction"]
+RECORD_TYPES = ["Match", "Source Mismatch", "Target Mismatch"]
+DIRECTIONS = ["source_to_target", "target_to_source"]
+MATCH, SOURCE_MISMATCH, TARGET_MISMATCH = range(3)
+NO_MATCH = "No Match"
+NO_ID = "N/A"
+
+
+class _ValueLabels:
+    """
+    Categorical dtype over a value table, built once and shared by every
+    frame of the same results. Records without a value, and best matches
+    that are blank, read "No Match" as in the export.
+    """
+
+    def __init__(self, values: List[str]):
+        if NO_MATCH in values:
+            self.missing = values.index(NO_MATCH)
+        else:
+            self.missing, values = len(values), values + [NO_MATCH]
+        self.blank = values.index("") if "" in values else -1
+        self.dtype = pd.CategoricalDtype(values)
+
+    def labels(self, codes: np.ndarray, best_match: np.ndarray) -> pd.Categorical:
+        codes = np.where(codes < 0, self.missing, codes)
+        if self.blank >= 0:
+            codes[best_match & (codes == self.blank)] = self.missing
+        return pd.Categorical.from_codes(codes, dtype=self.dtype)
+
+
+class ResultSummary:
+    """Record counts and the confidence total, accumulated chunk by chunk."""
+
+    def __init__(self):
+        self.counts = np.zeros(len(RECORD_TYPES), dtype=np.int64)
+        self.confidence_total = 0
+
+    def add(self, kind: np.ndarray, confidence: np.ndarray):
+        self.counts += np.bincount(kind, minlength=len(RECORD_TYPES))
+        self.confidence_total += int(confidence.sum(dtype=np.int64))
+
+    def add_frame(self, frame: pd.DataFrame):
+        """Add a frame in the export layout, with numeric or "85%" confidences."""
+        confidence = frame["Confidence"]
+        if confidence.dtype == object:
+            confidence = confidence.astype(str).str.rstrip("%").astype(float)
+        self.add(
+            pd.Categorical(frame["Type"], categories=RECORD_TYPES).codes.astype(np.intp),
+            confidence.to_numpy()
+        )
+
+    @property
+    def records(self) -> int:
+        return int(self.counts.sum())
+
+    def to_frame(self) -> pd.DataFrame:
+        average = self.confidence_total / self.records if self.records else 0.0
+        return pd.DataFrame({
+            "Metric": [
+                "Total Records Processed",
+                "Successful Matches",
+                "Source Mismatches",
+                "Target Mismatches",
+                "Average Confidence Score (%)"
+            ],
+            "Value": pd.Series([self.records, *map(int, self.counts), round(average, 2)], dtype=object)
+        })
+
+
+class MatchResults:
+    """
+    Matches and mismatches stored column-wise: one entry per record in each
+    array, with values as indices into deduplicated value tables (-1 for
+    none) and confidences as integers. Records are ordered as in the dict
+    results: matches, source mismatches, then target mismatches.
+    """
+
+    __slots__ = (
+        "kind", "source", "target", "item", "confidence",
+        "source_values", "target_values", "ids"
+    )
+
+    def __init__(
+        self,
+        kind: np.ndarray,
+        source: np.ndarray,
+        target: np.ndarray,
+        item: np.ndarray,
+        confidence: np.ndarray,
+        source_values: List[str],
+        target_values: List[str],
+        ids: List[Any]
+    ):
+        self.kind = kind
+        self.source = source
+        self.target = target
+        self.item = item
+        self.confidence = confidence
+        self.source_values = source_values
+        self.target_values = target_values
+        self.ids = ids
+
+    def __len__(self) -> int:
+        return len(self.kind)
+
+    @classmethod
+    def from_run(cls, run, threshold: int) -> "MatchResults":
+        """
+        Partition a ScoredRun at a threshold with array operations, giving
+        the records FuzzyMatcher.apply_threshold would.
+        """
+        target_index = run.target_index
+        source_codes, source_values = pd.factorize(np.asarray(run.source_values, dtype=object))
+        source_values = source_values.tolist()
+        # Both in first-occurrence order, like target_index.unique_values
+        target_codes, _ = pd.factorize(np.asarray(target_index.values, dtype=object))
+        target_values = target_index.unique_values
+        source_position = {value: i for i, value in enumerate(source_values)}
+        target_position = {value: j for j, value in enumerate(target_values)}
+
+        best_target = np.full(len(source_values), -1, dtype=np.intp)
+        best_score = np.full(len(source_values), -1, dtype=np.int16)
+        for i, value in enumerate(source_values):
+            target, score = run.source_best[value]
+            best_target[i] = target_position[target] if target is not None else -1
+            best_score[i] = score
+        best_source = np.asarray(
+            [source_position[value] if value is not None else -1 for value in run.best_source],
+            dtype=np.intp
+        )
+        first_row = np.asarray([target_index.first_row[value] for value in target_values], dtype=np.intp)
+        target_score = np.asarray(run.best_source_score, dtype=np.int16)
+
+        row_score = best_score[source_codes]
+        is_match = row_score >= threshold
+        match_rows = np.flatnonzero(is_match)
+        mismatch_rows = np.flatnonzero(~is_match)
+        matched = np.zeros(len(target_values), dtype=bool)
+        matched[best_target[source_codes[match_rows]]] = True
+        open_rows = np.flatnonzero(~matched[target_codes] & (target_score[target_codes] < threshold))
+        open_targets = target_codes[open_rows]
+
+        match_targets = best_target[source_codes[match_rows]]
+        return cls(
+            np.repeat(
+                np.asarray([MATCH, SOURCE_MISMATCH, TARGET_MISMATCH], dtype=np.int8),
+                [len(match_rows), len(mismatch_rows), len(open_rows)]
+            ),
+            np.concatenate([
+                source_codes[match_rows], source_codes[mismatch_rows], best_source[open_targets]
+            ]).astype(np.int32),
+            np.concatenate([
+                match_targets, best_target[source_codes[mismatch_rows]], open_targets
+            ]).astype(np.int32),
+            np.concatenate([
+                first_row[match_targets], np.full(len(mismatch_rows), -1, dtype=np.intp), open_rows
+            ]).astype(np.int32),
+            np.concatenate([
+                row_score[match_rows], row_score[mismatch_rows], target_score[open_targets]
+            ]).astype(np.int16),
+            source_values,
+            target_values,
+            target_index.ids
+        )
+
+    @classmethod
+    def from_results(cls, results: Dict[str, List[Dict]]) -> "MatchResults":
+        """Convert the dict results of match_columns, apply_threshold or match_delta."""
+        sources: Dict[str, int] = {}
+        targets: Dict[str, int] = {}
+        ids: Dict[Any, int] = {}
+
+        def code(table: Dict, value) -> int:
+            return -1 if value is None else table.setdefault(value, len(table))
+
+        records = (
+            [(MATCH, m["source_value"], m["target_value"], m["data_item_id"], m["confidence"])
+             for m in results["matches"]]
+            + [(SOURCE_MISMATCH, m["value"], m["best_match"], None, m["confidence"])
+               for m in results["source_mismatches"]]
+            + [(TARGET_MISMATCH, m["best_match"], m["value"], m["id"], m["confidence"])
+               for m in results["target_mismatches"]]
+        )
+        columns = [
+            np.fromiter((kind for kind, _, _, _, _ in records), dtype=np.int8, count=len(records)),
+            np.fromiter((code(sources, s) for _, s, _, _, _ in records), dtype=np.int32, count=len(records)),
+            np.fromiter((code(targets, t) for _, _, t, _, _ in records), dtype=np.int32, count=len(records)),
+            np.fromiter(
+                (-1 if kind == SOURCE_MISMATCH else code(ids, i) for kind, _, _, i, _ in records),
+                dtype=np.int32, count=len(records)
+            ),
+            np.fromiter((c for _, _, _, _, c in records), dtype=np.int16, count=len(records))
+        ]
+        return cls(*columns, list(sources), list(targets), list(ids))
+
+    def counts(self) -> Dict[str, int]:
+        """Number of records of each type."""
+        counts = np.bincount(self.kind, minlength=len(RECORD_TYPES))
+        return {name: int(count) for name, count in zip(RECORD_TYPES, counts)}
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        The export layout with numeric confidences. Value columns are
+        categoricals over the value tables, so no per-record strings are built.
+        """
+        return next(self.iter_frames(max(len(self), 1)))
+
+    def iter_frames(self, chunk_rows: int) -> Iterator[pd.DataFrame]:
+        """to_frame in consecutive chunks of at most chunk_rows records."""
+        sources = _ValueLabels(self.source_values)
+        targets = _ValueLabels(self.target_values)
+        item_ids = np.empty(len(self.ids) + 1, dtype=object)
+        item_ids[:-1] = self.ids
+        item_ids[-1] = NO_ID
+        for start in range(0, max(len(self), 1), chunk_rows):
+            rows = slice(start, start + chunk_rows)
+            kind = self.kind[rows]
+            is_target_mismatch = kind == TARGET_MISMATCH
+            yield pd.DataFrame({
+                "Type": pd.Categorical.from_codes(kind, categories=RECORD_TYPES),
+                "Source Value": sources.labels(self.source[rows], is_target_mismatch),
+                "Target Value": targets.labels(self.target[rows], kind == SOURCE_MISMATCH),
+                "DataItemID": pd.Series(item_ids[self.item[rows]], dtype=object).infer_objects(),
+                "Confidence": self.confidence[rows],
+                "Direction": pd.Categorical.from_codes(
+                    is_target_mismatch.astype(np.int8), categories=DIRECTIONS
+                )
+            }, columns=EXPORT_COLUMNS)
+
+    def summary(self) -> pd.DataFrame:
+        """Record counts and the average confidence, computed from the numbers."""
+        summary = ResultSummary()
+        summary.add(self.kind, self.confidence)
+        return summary.to_frame()
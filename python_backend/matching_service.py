@@ -0,0 +1,207 @@
+"""
+Headless matching against a target catalog kept warm in memory.
+
+The catalog is loaded and indexed once per process; lookups and batches are
+then scored against the same TargetIndex. Scoring is synchronous and CPU
+bound, so async callers hand it to a bounded thread pool (rapidfuzz releases
+the GIL while scoring) and the event loop never blocks. Latencies are kept
+per endpoint over a sliding window and reported as percentiles.
+"""
+import asyncio
+import io
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+import excel_loader
+from fuzzy_matcher import FuzzyMatcher
+from target_index import TargetIndex, column_values
+
+DEFAULT_WORKERS = 4
+LATENCY_WINDOW = 10_000
+PERCENTILES = (50, 90, 95, 99)
+
+
+def read_column(data: bytes, filename: str, column: str, id_column: Optional[str] = None) -> pd.DataFrame:
+    """
+    Read one column (and id_column when present) of an uploaded or local
+    .csv, .xlsx/.xls or .parquet file, chosen by the file name.
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    columns = [column] + ([id_column] if id_column and id_column != column else [])
+    if extension in (".xlsx", ".xls"):
+        sheet = excel_loader.sheet_names(data)[0]
+        df = excel_loader.read_columns(data, sheet, columns)
+    elif extension == ".csv":
+        df = pd.read_csv(io.BytesIO(data), usecols=lambda name: name in columns)
+    elif extension == ".parquet":
+        df = pd.read_parquet(io.BytesIO(data))
+        df = df[[name for name in columns if name in df.columns]]
+    else:
+        raise ValueError(f"Unsupported file type '{extension}', expected .csv, .xlsx, .xls or .parquet")
+    if column not in df.columns:
+        raise ValueError(f"Column '{column}' not found in {filename}")
+    return df
+
+
+class LatencyStats:
+    """Per-endpoint latencies over the last ``window`` calls, thread-safe."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.window = window
+        self._samples: Dict[str, deque] = {}
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, seconds: float):
+        with self._lock:
+            self._samples.setdefault(endpoint, deque(maxlen=self.window)).append(seconds)
+            self._counts[endpoint] = self._counts.get(endpoint, 0) + 1
+
+    def percentiles(self) -> Dict[str, Dict[str, float]]:
+        """Call count and p50/p90/p95/p99/max latency in milliseconds per endpoint."""
+        with self._lock:
+            samples = {endpoint: list(values) for endpoint, values in self._samples.items()}
+            counts = dict(self._counts)
+        report = {}
+        for endpoint, values in samples.items():
+            milliseconds = np.asarray(values) * 1000
+            report[endpoint] = {
+                "count": counts[endpoint],
+                **{
+                    f"p{p}_ms": round(float(value), 3)
+                    for p, value in zip(PERCENTILES, np.percentile(milliseconds, PERCENTILES))
+                },
+                "max_ms": round(float(milliseconds.max()), 3)
+            }
+        return report
+
+
+class MatchingService:
+    """
+    A FuzzyMatcher and the TargetIndex of one catalog, shared by every
+    request, plus the worker pool that scores off the event loop.
+
+    Give the matcher workers=1 (as from_catalog does) so that concurrent
+    requests share the cores rather than each using all of them.
+    """
+
+    def __init__(
+        self,
+        matcher: FuzzyMatcher,
+        target_index: TargetIndex,
+        workers: int = DEFAULT_WORKERS
+    ):
+        self.matcher = matcher
+        self.target_index = target_index
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="matching")
+        self.workers = workers
+        self.latency = LatencyStats()
+        self.loaded_at = time.time()
+
+    @classmethod
+    def from_catalog(
+        cls,
+        path: str,
+        target_column: str,
+        id_column: str = "DataItemID",
+        threshold: int = 70,
+        engine: str = "batch",
+        workers: int = DEFAULT_WORKERS
+    ) -> "MatchingService":
+        """Load a catalog file and index its target column once."""
+        with open(path, "rb") as handle:
+            data = handle.read()
+        target_df = read_column(data, path, target_column, id_column)
+        matcher = FuzzyMatcher(threshold=threshold, engine=engine, workers=1)
+        target_index = matcher.build_target_index(target_df, target_column, id_column)
+        return cls(matcher, target_index, workers)
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "targets": len(self.target_index.values),
+            "unique_targets": len(self.target_index),
+            "fingerprint": self.target_index.fingerprint,
+            "threshold": self.matcher.threshold,
+            "engine": self.matcher.engine,
+            "workers": self.workers,
+            "loaded_at": self.loaded_at
+        }
+
+    def lookup(self, value: str, k: int = 1) -> Dict[str, Any]:
+        """
+        Best target of one value, with the k best candidates when k > 1.
+        Every k is scored by top_k_matches, so the best target is always the
+        first of the k candidates and never depends on k; a single value is
+        one row of the score matrix whatever the engine.
+        """
+        value = str(value).strip()
+        top_k = self.matcher.top_k_matches(
+            pd.DataFrame({"value": [value]}), None, "value", None, k=k,
+            target_index=self.target_index
+        )
+        candidates = [
+            {
+                "rank": int(row["Rank"]),
+                "target_value": row["Target Value"],
+                "data_item_id": row["DataItemID"],
+                "confidence": int(row["Confidence"])
+            }
+            for row in top_k.candidates().to_dict("records")
+        ]
+        if candidates:
+            best = candidates[0]
+            result = self._lookup_result(value, best["target_value"], best["confidence"])
+        else:
+            result = self._lookup_result(value, None, 0)
+        if k > 1:
+            result["candidates"] = candidates
+        return result
+
+    def _lookup_result(self, value: str, target: Optional[str], score) -> Dict[str, Any]:
+        return {
+            "value": value,
+            "best_match": target,
+            "data_item_id": self.target_index.id_of(target) if target is not None else None,
+            "confidence": score,
+            "matched": score >= self.matcher.threshold
+        }
+
+    def match_batch(self, values: Iterable, batch_size: int = 10_000) -> Dict[str, Any]:
+        """
+        Two-way match of a batch of source values against the catalog, with
+        the records match_columns gives.
+        """
+        results = {"matches": [], "source_mismatches": [], "target_mismatches": []}
+        stats = {}
+        for part in self.matcher.iter_matches(values, self.target_index, batch_size):
+            for key in results:
+                results[key].extend(part[key])
+            stats = part["stats"]
+        results["stats"] = stats
+        return results
+
+    def match_upload(self, data: bytes, filename: str, column: str) -> Dict[str, Any]:
+        """match_batch over one column of an uploaded file."""
+        return self.match_batch(column_values(read_column(data, filename, column), column))
+
+    async def run(self, endpoint: str, function: Callable, *args) -> Any:
+        """
+        Run a scoring call in the worker pool and record its latency,
+        queueing included, under endpoint.
+        """
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        try:
+            return await loop.run_in_executor(self.executor, function, *args)
+        finally:
+            self.latency.record(endpoint, time.perf_counter() - start)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,120 @@
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+from batch_engine import ScoreReduction, TermTable
+from pruning import TermProfile, best_term_score, improves_on, score_bound
+
+# Profiles of the target values, installed once per worker process by _init_worker
+_choice_profiles: List[TermProfile] = []
+
+
+def _init_worker(choice_terms: List[Tuple[str, ...]]):
+    global _choice_profiles
+    _choice_profiles = [TermProfile(terms) for terms in choice_terms]
+
+
+def _score_shard(
+    query_terms: List[Tuple[str, ...]],
+    columns: Optional[List[int]] = None
+) -> Tuple[ScoreReduction, int, int]:
+    """
+    Score a shard of query values pair by pair, as calculate_similarity does,
+    against the installed choice values, or those at the given columns.
+
+    A pair only needs its exact score if it can beat the best of its row or
+    of its column so far; anything else is cut off by rapidfuzz or skipped
+    by the length bound, leaving both reductions unchanged. Returns the
+    reduction with the pruned value pairs and skipped term pairs.
+    """
+    choices = _choice_profiles if columns is None else [_choice_profiles[c] for c in columns]
+    reduction = ScoreReduction(len(query_terms), len(choices))
+    pairs_pruned = 0
+    term_pairs_skipped = 0
+    for row, source_terms in enumerate(query_terms):
+        source = TermProfile(source_terms)
+        scores = np.full(len(choices), -1, dtype=np.int16)
+        row_best = -1
+        for column, target in enumerate(choices):
+            cutoff = improves_on(min(row_best, reduction.col_best_score[column]))
+            if cutoff > 100 or score_bound(source, target) < cutoff:
+                pairs_pruned += 1
+                continue
+            max_score, skipped = best_term_score(source.terms, target.terms, cutoff)
+            term_pairs_skipped += skipped
+            scores[column] = int(round(max_score))
+            row_best = max(row_best, scores[column])
+        reduction.update(row, row + 1, scores[np.newaxis, :])
+    return reduction, pairs_pruned, term_pairs_skipped
+
+
+def _value_terms(table: TermTable) -> List[Tuple[str, ...]]:
+    return [
+        tuple(table.terms[t] for t in table.flat[table.offsets[i]:table.offsets[i + 1]])
+        for i in range(len(table))
+    ]
+
+
+class ParallelScorer:
+    """
+    Shard the unique query values across a process pool and score each
+    shard with the pure-Python pair scorer.
+
+    The pool lives until ``close``, so it is started once per run. The
+    choice terms reach every worker once, through the pool initializer;
+    each task only carries its own shard, plus the column positions when
+    the choices were taken from the installed table (TermTable.take), as
+    the reverse pass does. Other choices restart the pool. Shards are
+    merged in order, so the result does not depend on which worker
+    finished first.
+    """
+
+    def __init__(self, workers: Optional[int] = None, chunk_size: int = 256):
+        self.workers = workers if workers and workers > 0 else os.cpu_count()
+        self.chunk_size = chunk_size
+        self.stats = {"pairs_total": 0, "pairs_scored": 0, "pairs_pruned": 0}
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._installed: Optional[TermTable] = None
+
+    def _pool(self, choices: TermTable) -> Tuple[ProcessPoolExecutor, Optional[List[int]]]:
+        """The pool holding choices' table, and the columns of choices in it."""
+        table = choices.base if choices.base is not None else choices
+        if self._installed is not table:
+            self.close()
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(_value_terms(table),)
+            )
+            self._installed = table
+        return self._executor, choices.rows
+
+    def close(self):
+        """Shut the worker pool down; the next score starts a new one."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        self._executor = None
+        self._installed = None
+
+    def score(self, query: TermTable, choices: TermTable) -> ScoreReduction:
+        reduction = ScoreReduction(len(query), len(choices))
+        pairs = len(query) * len(choices)
+        self.stats = {
+            "pairs_total": pairs, "pairs_scored": pairs, "pairs_pruned": 0, "term_pairs_skipped": 0
+        }
+        if pairs == 0:
+            return reduction
+
+        query_terms = _value_terms(query)
+        starts = range(0, len(query_terms), self.chunk_size)
+        shards = [query_terms[start:start + self.chunk_size] for start in starts]
+        executor, columns = self._pool(choices)
+        for start, (shard_reduction, pruned, skipped) in zip(
+            starts, executor.map(_score_shard, shards, [columns] * len(shards))
+        ):
+            reduction.merge(start, shard_reduction)
+            self.stats["pairs_pruned"] += pruned
+            self.stats["term_pairs_skipped"] += skipped
+        self.stats["pairs_scored"] = pairs - self.stats["pairs_pruned"]
+        return reduction
@@ -0,0 +1,107 @@
+import os
+import pandas as pd
+from typing import Dict, Optional, Set, Tuple, Union
+
+from match_results import NO_MATCH, MatchResults
+
+RESULTS_SHEET = "Matching Results"
+
+
+def _confidence(value) -> int:
+    """Confidence from a record or an export cell ("85%" or 85)."""
+    return int(round(float(str(value).strip().rstrip("%"))))
+
+
+def _value(value) -> Optional[str]:
+    """Best-match cell of an export, where a missing match reads "No Match"."""
+    value = str(value).strip()
+    return None if value == NO_MATCH else value
+
+
+class PreviousRun:
+    """
+    What an earlier run reported, as needed to match again incrementally:
+    the best target and score of every source value, the best source and
+    score of every target mismatch, and the sources matched to each target.
+    Targets the run did not report at all are unknown to it.
+    """
+
+    def __init__(
+        self,
+        source_best: Dict[str, Tuple[Optional[str], int]],
+        target_best: Dict[str, Tuple[Optional[str], int]],
+        matched_by: Dict[str, Dict[str, int]]
+    ):
+        self.source_best = source_best
+        self.target_best = target_best
+        self.matched_by = matched_by
+
+    @property
+    def targets(self) -> Set[str]:
+        """Every target value the run mentions."""
+        seen = set(self.target_best) | set(self.matched_by)
+        seen.update(target for target, _ in self.source_best.values() if target is not None)
+        return seen
+
+    @classmethod
+    def from_results(cls, results: Dict) -> "PreviousRun":
+        """Read the dict returned by match_columns or apply_threshold."""
+        run = cls({}, {}, {})
+        for m in results["matches"]:
+            run._add_match(m["source_value"], m["target_value"], m["confidence"])
+        for m in results["source_mismatches"]:
+            run.source_best[m["value"]] = (m["best_match"], int(m["confidence"]))
+        for m in results["target_mismatches"]:
+            run.target_best[m["value"]] = (m["best_match"], int(m["confidence"]))
+        return run
+
+    @classmethod
+    def from_export(cls, df: pd.DataFrame) -> "PreviousRun":
+        """Read a frame in the format_results_for_export layout."""
+        run = cls({}, {}, {})
+        for kind, source, target, confidence in zip(
+            df["Type"], df["Source Value"], df["Target Value"], df["Confidence"]
+        ):
+            confidence = _confidence(confidence)
+            if kind == "Match":
+                run._add_match(str(source).strip(), str(target).strip(), confidence)
+            elif kind == "Source Mismatch":
+                run.source_best[str(source).strip()] = (_value(target), confidence)
+            elif kind == "Target Mismatch":
+                run.target_best[str(target).strip()] = (_value(source), confidence)
+        return run
+
+    @classmethod
+    def load(cls, previous: Union["PreviousRun", Dict, MatchResults, pd.DataFrame, str]) -> "PreviousRun":
+        """
+        Accept results (dicts or a MatchResults), an export frame, or the path
+        of an exported workbook (its "Matching Results" sheets), CSV file or
+        parquet file or directory.
+        """
+        if isinstance(previous, PreviousRun):
+            return previous
+        if isinstance(previous, dict):
+            return cls.from_results(previous)
+        if isinstance(previous, MatchResults):
+            return cls.from_export(previous.to_frame())
+        if isinstance(previous, pd.DataFrame):
+            return cls.from_export(previous)
+        extension = os.path.splitext(str(previous))[1].lower()
+        # Everything as text, so values such as "0012" or "N/A" read back unchanged
+        if extension in (".xlsx", ".xls"):
+            sheets = pd.read_excel(previous, sheet_name=None, dtype=str, keep_default_na=False)
+            # Long results continue on "Matching Results 2", "Matching Results 3", ...
+            df = pd.concat(
+                [sheet for name, sheet in sheets.items()
+                 if name == RESULTS_SHEET or name.startswith(f"{RESULTS_SHEET} ")],
+                ignore_index=True
+            )
+        elif extension == ".csv":
+            df = pd.read_csv(previous, dtype=str, keep_default_na=False)
+        else:
+            df = pd.read_parquet(previous)
+        return cls.from_export(df)
+
+    def _add_match(self, source: str, target: str, confidence):
+        self.source_best[source] = (target, int(confidence))
+        self.matched_by.setdefault(target, {})[source] = int(confidence)
@@ -0,0 +1,79 @@
+from rapidfuzz import fuzz
+from typing import Iterable, Tuple
+
+
+def token_set_length(term: str) -> int:
+    """Length of a term's unique tokens joined by single spaces."""
+    tokens = set(term.split())
+    if not tokens:
+        return 0
+    return sum(len(token) for token in tokens) + len(tokens) - 1
+
+
+class TermProfile:
+    """
+    Expanded terms of one value with the token set and length range needed
+    to bound its token_set_ratio against another value without scoring.
+    """
+
+    __slots__ = ("terms", "tokens", "min_length", "max_length")
+
+    def __init__(self, terms: Iterable[str]):
+        self.terms = tuple(terms)
+        self.tokens = frozenset(token for term in self.terms for token in term.split())
+        lengths = [token_set_length(term) for term in self.terms] or [0]
+        self.min_length = min(lengths)
+        self.max_length = max(lengths)
+
+
+def score_bound(source: TermProfile, target: TermProfile) -> float:
+    """
+    Upper bound on the best token_set_ratio over the term pairs of two values.
+
+    When no token is shared, token_set_ratio is the Indel ratio of the
+    joined token sets, which is at most 200 * shorter / (shorter + longer).
+    Any shared token, or overlapping length ranges, allow a perfect score.
+    """
+    if not source.tokens.isdisjoint(target.tokens):
+        return 100.0
+    if source.max_length < target.min_length:
+        shorter, longer = source.max_length, target.min_length
+    elif target.max_length < source.min_length:
+        shorter, longer = target.max_length, source.min_length
+    else:
+        return 100.0
+    return 200.0 * shorter / (shorter + longer)
+
+
+def best_term_score(
+    source_terms: Tuple[str, ...],
+    target_terms: Tuple[str, ...],
+    score_cutoff: float = 0
+) -> Tuple[float, int]:
+    """
+    Best token_set_ratio over the cross product of two term lists, with the
+    number of term pairs skipped after a perfect score.
+
+    The running best is passed on as rapidfuzz's score_cutoff, so pairs that
+    cannot improve on it exit early. The result is exact when it reaches
+    score_cutoff and is otherwise some value below it.
+    """
+    max_score = 0.0
+    scored = 0
+    for s_term in source_terms:
+        for t_term in target_terms:
+            scored += 1
+            score = fuzz.token_set_ratio(s_term, t_term, score_cutoff=max(max_score, score_cutoff))
+            if score > max_score:
+                max_score = score
+                if max_score == 100:
+                    return max_score, len(source_terms) * len(target_terms) - scored
+    return max_score, 0
+
+
+def improves_on(best_score: int) -> float:
+    """
+    score_cutoff under which a raw score cannot round above best_score, so
+    the candidate can be skipped without changing which one wins.
+    """
+    return best_score + 0.5 if best_score >= 0 else 0
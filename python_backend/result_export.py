@@ -0,0 +1,157 @@
+"""
+Streaming export of match results to .xlsx, .csv or .parquet.
+
+Results are written chunk by chunk straight to a file, so memory stays
+bounded by one chunk whatever the number of records, and the Summary is
+accumulated along the way. Workbooks are written with openpyxl's
+write-only mode; results longer than a worksheet continue on
+"Matching Results 2", "Matching Results 3" and so on.
+"""
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from typing import Dict, Iterable, Iterator, Optional, Union
+
+from match_results import EXPORT_COLUMNS, MatchResults, ResultSummary
+
+FORMATS = ("xlsx", "csv", "parquet")
+DEFAULT_CHUNK_ROWS = 50_000
+RESULTS_SHEET = "Matching Results"
+SUMMARY_SHEET = "Summary"
+# Rows per worksheet, including the header
+EXCEL_MAX_ROWS = 1_048_576
+# Whole numbers shown with a percent sign, without scaling by 100
+PERCENT_FORMAT = '0"%"'
+
+PARQUET_SCHEMA = pa.schema([
+    ("Type", pa.string()),
+    ("Source Value", pa.string()),
+    ("Target Value", pa.string()),
+    ("DataItemID", pa.string()),
+    ("Confidence", pa.int16()),
+    ("Direction", pa.string())
+])
+
+Results = Union[MatchResults, Dict, pd.DataFrame]
+
+
+def file_format(path: str) -> str:
+    """Export format named by a path's extension."""
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    if extension not in FORMATS:
+        raise ValueError(f"Unsupported export format '{extension}', expected one of {FORMATS}")
+    return extension
+
+
+def iter_chunks(results: Union[Results, Iterable[Results]], chunk_rows: int) -> Iterator[pd.DataFrame]:
+    """
+    Frames in the export layout from results (a MatchResults, dict results
+    or a frame) or from an iterable of them, such as streamed batches.
+    """
+    if isinstance(results, (MatchResults, dict, pd.DataFrame)):
+        results = [results]
+    for part in results:
+        if isinstance(part, dict):
+            part = MatchResults.from_results(part)
+        if isinstance(part, MatchResults):
+            yield from part.iter_frames(chunk_rows)
+        else:
+            for start in range(0, len(part), chunk_rows):
+                yield part.iloc[start:start + chunk_rows]
+
+
+def _write_xlsx(chunks: Iterator[pd.DataFrame], path: str, summary: ResultSummary):
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+
+    workbook = Workbook(write_only=True)
+    confidence = EXPORT_COLUMNS.index("Confidence")
+    sheet, sheet_rows, sheets = None, EXCEL_MAX_ROWS, 0
+    for chunk in chunks:
+        summary.add_frame(chunk)
+        ids = chunk["DataItemID"]
+        columns = [chunk[column].tolist() for column in EXPORT_COLUMNS]
+        # Missing ids as empty cells rather than NaN
+        columns[EXPORT_COLUMNS.index("DataItemID")] = ids.astype(object).where(ids.notna(), None).tolist()
+        for row in zip(*columns):
+            if sheet_rows == EXCEL_MAX_ROWS:
+                sheets += 1
+                sheet = workbook.create_sheet(RESULTS_SHEET if sheets == 1 else f"{RESULTS_SHEET} {sheets}")
+                sheet.append(EXPORT_COLUMNS)
+                sheet_rows = 1
+            row = list(row)
+            if not isinstance(row[confidence], str):
+                row[confidence] = WriteOnlyCell(sheet, value=row[confidence])
+                row[confidence].number_format = PERCENT_FORMAT
+            sheet.append(row)
+            sheet_rows += 1
+    if sheet is None:
+        workbook.create_sheet(RESULTS_SHEET).append(EXPORT_COLUMNS)
+
+    summary_sheet = workbook.create_sheet(SUMMARY_SHEET)
+    summary_frame = summary.to_frame()
+    summary_sheet.append(list(summary_frame.columns))
+    for row in summary_frame.itertuples(index=False):
+        summary_sheet.append(list(row))
+    workbook.save(path)
+
+
+def _write_csv(chunks: Iterator[pd.DataFrame], path: str, summary: ResultSummary):
+    with open(path, "w", newline="", encoding="utf-8") as handle:
+        header = True
+        for chunk in chunks:
+            summary.add_frame(chunk)
+            chunk.to_csv(handle, header=header, index=False)
+            header = False
+        if header:
+            pd.DataFrame(columns=EXPORT_COLUMNS).to_csv(handle, index=False)
+
+
+def _write_parquet(chunks: Iterator[pd.DataFrame], path: str, summary: ResultSummary):
+    with pq.ParquetWriter(path, PARQUET_SCHEMA) as writer:
+        for chunk in chunks:
+            summary.add_frame(chunk)
+            ids = chunk["DataItemID"]
+            confidence = chunk["Confidence"]
+            if confidence.dtype == object:
+                confidence = confidence.astype(str).str.rstrip("%").astype(np.int16)
+            # One schema for every chunk: text values and ids, numeric confidences
+            table = pa.table({
+                "Type": chunk["Type"].astype(str).tolist(),
+                "Source Value": chunk["Source Value"].astype(str).tolist(),
+                "Target Value": chunk["Target Value"].astype(str).tolist(),
+                "DataItemID": ids.astype(str).where(ids.notna(), None).tolist(),
+                "Confidence": confidence.to_numpy(dtype=np.int16),
+                "Direction": chunk["Direction"].astype(str).tolist()
+            }, schema=PARQUET_SCHEMA)
+            writer.write_table(table)
+
+
+WRITERS = {"xlsx": _write_xlsx, "csv": _write_csv, "parquet": _write_parquet}
+
+
+def export_results(
+    results: Union[Results, Iterable[Results]],
+    path: str,
+    fmt: Optional[str] = None,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS
+) -> pd.DataFrame:
+    """
+    Stream results to path in the format named by fmt or by the path's
+    extension, and return the summary. Workbooks also get a Summary sheet.
+    The file is written next to path and renamed into place when complete.
+    """
+    fmt = fmt or file_format(path)
+    if fmt not in WRITERS:
+        raise ValueError(f"Unsupported export format '{fmt}', expected one of {FORMATS}")
+    summary = ResultSummary()
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        WRITERS[fmt](iter_chunks(results, chunk_rows), temp_path, summary)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return summary.to_frame()
@@ -0,0 +1,205 @@
+"""
+Persistent cache of similarity scores, shared across runs.
+
+Catalogs are matched against new extracts again and again, and most source
+strings repeat. Scores are stored in a local SQLite file under a namespace
+naming the scorer and the synonym version, so a changed synonym table or
+scorer never reads stale scores. Two kinds of entries are kept:
+
+* pair scores, keyed by the normalized pair (in either order, since the
+  score is symmetric), used by calculate_similarity and the loop engine;
+* best targets, keyed by the normalized source value within a namespace that
+  also names the target catalog, used by the batch pipeline, for which
+  looking up every pair would cost more than scoring it.
+
+Each table holds at most ``max_entries`` rows; the least recently used are
+evicted first. Rows are counted as they are stored, so the table is only
+counted again when that count passes the bound, and reads are recorded in
+memory and written back in batches, with the next store or on close.
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+DEFAULT_SCORE_CACHE_PATH = os.environ.get(
+    "SCORE_CACHE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "score_cache.sqlite")
+)
+DEFAULT_MAX_ENTRIES = 5_000_000
+# Rows per lookup statement, below SQLite's bound variable limit
+LOOKUP_CHUNK = 400
+# Evict down to this fraction of max_entries, so eviction runs rarely
+LOW_WATERMARK = 0.9
+# Recorded reads written back at once, at the latest
+TOUCH_BATCH = 10_000
+
+Pair = Tuple[str, str]
+
+
+def pair_key(a: str, b: str) -> Pair:
+    return (a, b) if a <= b else (b, a)
+
+
+class PairScoreCache:
+    """Bounded SQLite store of pair scores and best targets, with hit counters."""
+
+    def __init__(self, path: str = DEFAULT_SCORE_CACHE_PATH, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._connect()
+
+    def _connect(self):
+        self._lock = threading.Lock()
+        # Upper bounds of the row counts: a replaced row counts as added
+        self._rows = {}
+        # Last read of each key since the last write back, per table
+        self._touched = {"pair_scores": {}, "best_targets": {}}
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS pair_scores ("
+                "namespace TEXT, a TEXT, b TEXT, score INTEGER NOT NULL, used INTEGER NOT NULL, "
+                "PRIMARY KEY (namespace, a, b)) WITHOUT ROWID"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS best_targets ("
+                "namespace TEXT, source TEXT, target INTEGER NOT NULL, score INTEGER NOT NULL, "
+                "used INTEGER NOT NULL, PRIMARY KEY (namespace, source)) WITHOUT ROWID"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS pair_scores_used ON pair_scores (used)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS best_targets_used ON best_targets (used)")
+
+    def __getstate__(self):
+        # The connection stays in this process; a copy reopens the same file
+        return {"path": self.path, "max_entries": self.max_entries}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"], state["max_entries"])
+
+    def close(self):
+        with self._lock:
+            if any(self._touched.values()):
+                with self._conn:
+                    self._flush_touches()
+        self._conn.close()
+
+    def _flush_touches(self):
+        """Write the recorded reads back; call inside a transaction."""
+        for table, touched in self._touched.items():
+            if not touched:
+                continue
+            key_columns = ["a", "b"] if table == "pair_scores" else ["source"]
+            self._conn.executemany(
+                f"UPDATE {table} SET used = ? WHERE namespace = ? AND "
+                + " AND ".join(f"{column} = ?" for column in key_columns),
+                [(used, *key) for key, used in touched.items()]
+            )
+            touched.clear()
+
+    def _lookup(self, table: str, key_columns: Sequence[str], value_columns: Sequence[str],
+                namespace: str, keys: List[Tuple]) -> Dict[Tuple, Tuple]:
+        """Rows of a table for many keys, counting hits and recording the reads."""
+        found = {}
+        width = len(key_columns)
+        placeholders = "(" + ", ".join("?" * width) + ")"
+        with self._lock:
+            for start in range(0, len(keys), LOOKUP_CHUNK):
+                chunk = keys[start:start + LOOKUP_CHUNK]
+                rows = self._conn.execute(
+                    f"SELECT {', '.join(key_columns + value_columns)} FROM {table} "
+                    f"WHERE namespace = ? AND ({', '.join(key_columns)}) IN "
+                    f"(VALUES {', '.join([placeholders] * len(chunk))})",
+                    [namespace] + [part for key in chunk for part in key]
+                ).fetchall()
+                for row in rows:
+                    found[tuple(row[:width])] = tuple(row[width:])
+            if found:
+                now = time.time_ns()
+                touched = self._touched[table]
+                touched.update(((namespace, *key), now) for key in found)
+                if len(touched) >= TOUCH_BATCH:
+                    with self._conn:
+                        self._flush_touches()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def _store(self, table: str, key_columns: Sequence[str], value_columns: Sequence[str],
+               namespace: str, rows: Iterable[Tuple]):
+        now = time.time_ns()
+        values = [(namespace, *row, now) for row in rows]
+        if not values:
+            return
+        columns = [*key_columns, *value_columns]
+        placeholders = ", ".join("?" * (len(columns) + 2))
+        with self._lock, self._conn:
+            self._flush_touches()
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO {table} (namespace, {', '.join(columns)}, used) "
+                f"VALUES ({placeholders})",
+                values
+            )
+            if table not in self._rows:
+                self._rows[table] = self._count(table)
+            else:
+                self._rows[table] += len(values)
+            if self._rows[table] > self.max_entries:
+                self._evict(table, key_columns)
+
+    def _count(self, table: str) -> int:
+        return self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def _evict(self, table: str, key_columns: Sequence[str]):
+        # Other processes may share the file, so the bound is checked on a count
+        count = self._count(table)
+        self._rows[table] = count
+        if count <= self.max_entries:
+            return
+        keys = ", ".join(["namespace", *key_columns])
+        self._conn.execute(
+            f"DELETE FROM {table} WHERE ({keys}) IN "
+            f"(SELECT {keys} FROM {table} ORDER BY used LIMIT ?)",
+            (count - int(self.max_entries * LOW_WATERMARK),)
+        )
+        self._rows[table] = int(self.max_entries * LOW_WATERMARK)
+
+    def get_scores(self, namespace: str, pairs: Iterable[Pair]) -> Dict[Pair, int]:
+        """Cached scores of the given pairs, in either order."""
+        keys = list(dict.fromkeys(pair_key(a, b) for a, b in pairs))
+        found = self._lookup("pair_scores", ["a", "b"], ["score"], namespace, keys)
+        return {key: value[0] for key, value in found.items()}
+
+    def put_scores(self, namespace: str, scores: Dict[Pair, int]):
+        self._store(
+            "pair_scores", ["a", "b"], ["score"], namespace,
+            ((*pair_key(a, b), int(score)) for (a, b), score in scores.items())
+        )
+
+    def get_best(self, namespace: str, sources: Iterable[str]) -> Dict[str, Tuple[int, int]]:
+        """Cached (target index, score) of the given normalized sources."""
+        keys = [(source,) for source in dict.fromkeys(sources)]
+        found = self._lookup("best_targets", ["source"], ["target", "score"], namespace, keys)
+        return {key[0]: value for key, value in found.items()}
+
+    def put_best(self, namespace: str, best: Dict[str, Tuple[int, int]]):
+        self._store(
+            "best_targets", ["source"], ["target", "score"], namespace,
+            ((source, int(target), int(score)) for source, (target, score) in best.items())
+        )
+
+    def stats(self) -> Dict:
+        with self._lock:
+            entries = sum(self._count(table) for table in ("pair_scores", "best_targets"))
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries
+        }
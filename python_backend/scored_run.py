@@ -0,0 +1,29 @@
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+from target_index import TargetIndex
+
+
+class ScoredRun:
+    """
+    Threshold-independent outcome of scoring a source column against a
+    target index: the best target of every unique source value and the best
+    source of every unique target. FuzzyMatcher.apply_threshold turns it
+    into match results for any threshold without rescoring.
+    """
+
+    def __init__(
+        self,
+        source_values: List[str],
+        source_best: Dict[str, Tuple[Optional[str], int]],
+        target_index: TargetIndex,
+        best_source: List[Optional[str]],
+        best_source_score: np.ndarray,
+        stats: Dict
+    ):
+        self.source_values = source_values
+        self.source_best = source_best
+        self.target_index = target_index
+        self.best_source = best_source
+        self.best_source_score = best_source_score
+        self.stats = stats
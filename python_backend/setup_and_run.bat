@@ -29,6 +29,10 @@ call venv\Scripts\activate.bat
 echo Installing requirements...
 pip install -r requirements.txt
 
+:: Compile the offline synonym table
+echo Building synonym table...
+python synonym_table.py
+
 :: Run tests
 echo Running tests...
 python test_matcher.py
@@ -26,6 +26,10 @@ source venv/bin/activate
 echo "Installing requirements..."
 pip install -r requirements.txt
 
+# Compile the offline synonym table
+echo "Building synonym table..."
+python synonym_table.py
+
 # Run tests
 echo "Running tests..."
 python test_matcher.py
@@ -0,0 +1,203 @@
+"""
+Chunked, column-projected reads from SQL tables over pooled connections.
+
+Only the column being matched (and the ID column) leaves the server: rows
+are grouped on the server with a row count per distinct pair, streamed with
+``cursor.fetchmany`` and expanded back to one entry per row only at the end.
+Groups come back in the order of their first row, so the rows of a value
+are kept together at the position where it first appears.
+Any DB-API driver works; SQL Server goes through pyodbc and the tests use
+sqlite3. Identifiers are bracket-quoted, which both dialects accept.
+"""
+import queue
+import threading
+import numpy as np
+import pandas as pd
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_BATCH_SIZE = 10000
+# Legacy SQL Server types that cannot be grouped or sorted
+LONG_TEXT_TYPES = ("text", "ntext")
+
+
+def quote_identifier(name: str) -> str:
+    return "[" + str(name).replace("]", "]]") + "]"
+
+
+def sql_server_connection_string(server: str, database: str) -> str:
+    """Connection string for Windows Authentication (SSO)."""
+    return (
+        "Driver={ODBC Driver 17 for SQL Server};"
+        f"Server={server};"
+        f"Database={database};"
+        "Trusted_Connection=yes;"
+    )
+
+
+class ConnectionPool:
+    """
+    Keep up to ``max_idle`` open connections for reuse instead of
+    connecting again for every query. Connections that raised are closed
+    rather than returned to the pool.
+    """
+
+    def __init__(self, connect: Callable, max_idle: int = 4):
+        self._connect = connect
+        self._idle = queue.LifoQueue(maxsize=max_idle)
+        self.stats = {"opened": 0, "reused": 0}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self):
+        try:
+            conn = self._idle.get_nowait()
+            with self._lock:
+                self.stats["reused"] += 1
+        except queue.Empty:
+            conn = self._connect()
+            with self._lock:
+                self.stats["opened"] += 1
+        try:
+            yield conn
+        except BaseException:
+            # Includes an abandoned fetch generator, whose cursor is mid-result
+            conn.close()
+            raise
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(key: str, connect: Callable, max_idle: int = 4) -> ConnectionPool:
+    """Process-wide pool for a connection string (or any other key)."""
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(connect, max_idle)
+        return _pools[key]
+
+
+class SqlColumnLoader:
+    """Read one column of a table, with its IDs, in fetchmany batches."""
+
+    def __init__(self, pool: ConnectionPool, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.pool = pool
+        self.batch_size = batch_size
+
+    def table_columns(self, table: str) -> List[str]:
+        """Column names from the cursor description of an empty result."""
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(f"SELECT * FROM {quote_identifier(table)} WHERE 1 = 0")
+                return [column[0] for column in cursor.description]
+            finally:
+                cursor.close()
+
+    def long_text_columns(self, table: str) -> List[str]:
+        """
+        Columns of the legacy text and ntext types, from the driver's
+        catalog functions. Drivers without them (sqlite3) report none.
+        """
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                if not hasattr(cursor, "columns"):
+                    return []
+                return [
+                    row.column_name for row in cursor.columns(table=table)
+                    if row.type_name.lower() in LONG_TEXT_TYPES
+                ]
+            finally:
+                cursor.close()
+
+    def iter_batches(
+        self,
+        table: str,
+        columns: Sequence[str],
+        order_column: Optional[str] = None,
+        long_text: Sequence[str] = ()
+    ) -> Iterator[List[Tuple]]:
+        """
+        Yield batches of (value, ..., row_count) tuples, one per distinct
+        combination of the given columns, in the order of each combination's
+        first row: the lowest order_column value when given (a key of the
+        table), otherwise the order the table is scanned in. Columns named
+        in long_text are cast to nvarchar(max) so they can be grouped.
+        """
+        projected = ", ".join(
+            f"CAST({quote_identifier(column)} AS nvarchar(max)) AS {quote_identifier(column)}"
+            if column in long_text else quote_identifier(column)
+            for column in columns
+        )
+        row = (
+            quote_identifier(order_column) if order_column
+            else "ROW_NUMBER() OVER (ORDER BY (SELECT NULL))"
+        )
+        selected = ", ".join(quote_identifier(column) for column in columns)
+        query = (
+            f"SELECT {selected}, COUNT(*) FROM ("
+            f"SELECT {projected}, {row} AS [__row] FROM {quote_identifier(table)}"
+            f") AS [rows] GROUP BY {selected} ORDER BY MIN([__row])"
+        )
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(query)
+                while True:
+                    rows = cursor.fetchmany(self.batch_size)
+                    if not rows:
+                        return
+                    yield [tuple(row) for row in rows]
+            finally:
+                cursor.close()
+
+    def read_column(
+        self,
+        table: str,
+        column: str,
+        id_column: Optional[str] = "DataItemID",
+        table_columns: Optional[List[str]] = None,
+        order_column: Optional[str] = None
+    ) -> pd.DataFrame:
+        """
+        DataFrame holding only ``column`` (and ``id_column`` when the table
+        has it), one entry per table row. Rows are in table order except
+        that repeats of a value follow its first row; pass the table's key
+        as order_column to define that order. ``attrs`` records the row
+        count and how many distinct rows were transferred.
+        """
+        table_columns = table_columns if table_columns is not None else self.table_columns(table)
+        columns = [column]
+        if id_column and id_column != column and id_column in table_columns:
+            columns.append(id_column)
+
+        values = [[] for _ in columns]
+        counts = []
+        long_text = self.long_text_columns(table)
+        for batch in self.iter_batches(table, columns, order_column, long_text):
+            for row in batch:
+                for column_values, value in zip(values, row):
+                    column_values.append(value)
+                counts.append(row[-1])
+
+        counts = np.asarray(counts, dtype=np.intp)
+        df = pd.DataFrame({
+            name: pd.Series(np.repeat(np.asarray(column_values, dtype=object), counts)).infer_objects()
+            for name, column_values in zip(columns, values)
+        }, columns=columns)
+        df.attrs["row_count"] = int(counts.sum())
+        df.attrs["distinct_count"] = len(counts)
+        return df
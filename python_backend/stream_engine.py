@@ -0,0 +1,39 @@
+import numpy as np
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional
+
+
+def iter_batches(values: Iterable, batch_size: int) -> Iterator[List[str]]:
+    """
+    Consecutive lists of at most batch_size values, normalized the same way
+    as column_values, read lazily from any iterable.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    values = iter(values)
+    while True:
+        batch = [str(value).strip() for value in islice(values, batch_size)]
+        if not batch:
+            return
+        yield batch
+
+
+class ReverseBest:
+    """
+    Best source and score of every unique target, and the matched targets,
+    merged over consecutive batches of sources. Strictly greater scores win,
+    so ties keep the earliest source like the in-memory engines do. Memory
+    follows the number of targets, not of sources.
+    """
+
+    def __init__(self, n_targets: int):
+        self.best_source: List[Optional[str]] = [None] * n_targets
+        self.best_score = np.full(n_targets, -1, dtype=np.int16)
+        self.matched = set()
+
+    def add(self, best_source: List[Optional[str]], best_score: np.ndarray, matched: set):
+        improved = np.flatnonzero(best_score > self.best_score)
+        for j in improved:
+            self.best_source[j] = best_source[j]
+        self.best_score[improved] = best_score[improved]
+        self.matched |= matched
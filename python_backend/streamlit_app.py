@@ -4,41 +4,359 @@ import pyodbc
 import sys
 import os
 import tempfile
+import time
+import uuid
 import zipfile
+from copy import copy
 from datetime import datetime
 
 
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from python_backend.fuzzy_matcher import FuzzyMatcher
+from python_backend.synonym_handler import SynonymHandler
+from python_backend import (
+    checkpoint, column_cache, excel_loader, instrumentation, match_jobs, result_export, score_cache, sql_loader
+)
+
+ID_COLUMN = "DataItemID"
+EXPORT_MIME_TYPES = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet"
+}
+# Seconds between refreshes of a running job's progress
+JOB_REFRESH_SECONDS = 1.0
+# Rows of partial results shown while a job runs
+PARTIAL_ROWS = 1000
+# Rows of the result table shown on the page; the export holds all of them
+DISPLAY_ROWS = 1000
 
-def get_sql_server_connection():
+def get_sql_server_loader():
     """
-    Establish SQL Server connection using Windows Authentication (SSO)
+    Column loader for the selected server and database, over a connection
+    pool that is reused across reruns. Uses Windows Authentication (SSO).
     """
+    connection_string = sql_loader.sql_server_connection_string(
+        st.session_state.server, st.session_state.database
+    )
+    pool = sql_loader.get_pool(connection_string, lambda: pyodbc.connect(connection_string))
+    return sql_loader.SqlColumnLoader(pool)
+
+def reuse_while_running(name, key, load):
+    """
+    load() for key, kept in the session under name. While this session's job
+    runs the page refreshes every JOB_REFRESH_SECONDS; the job holds its own
+    copies of the columns, so the kept value is shown instead of querying
+    the server again.
+    """
+    kept = st.session_state.get(name)
+    if job_running and kept is not None and kept[0] == key:
+        return kept[1]
+    value = load()
+    st.session_state[name] = (key, value)
+    return value
+
+def get_sql_tables(loader):
+    """Get list of tables from the selected database"""
+    def list_tables():
+        with loader.pool.connection() as conn:
+            cursor = conn.cursor()
+            tables = cursor.tables(tableType='TABLE')
+            return [table.table_name for table in tables]
+
     try:
-        conn = pyodbc.connect(
-            "Driver={ODBC Driver 17 for SQL Server};"
-            f"Server={st.session_state.server};"
-            f"Database={st.session_state.database};"
-            "Trusted_Connection=yes;"
+        return reuse_while_running(
+            "sql_tables", (st.session_state.server, st.session_state.database), list_tables
         )
-        return conn
     except Exception as e:
         st.error(f"Error connecting to SQL Server: {str(e)}")
         return None
 
-def get_sql_tables(conn):
-    """Get list of tables from the selected database"""
-    cursor = conn.cursor()
-    tables = cursor.tables(tableType='TABLE')
-    return [table.table_name for table in tables]
+def load_sql_column(loader, side, table):
+    """Column picker for a table; fetches only that column and the ID column."""
+    columns = reuse_while_running(
+        f"{side.lower()}_sql_columns", table, lambda: loader.table_columns(table)
+    )
+    selected_column = st.selectbox(f"Select {side} Column", options=columns)
+    st.session_state[f"{side.lower()}_column"] = selected_column
+
+    def read():
+        start = time.perf_counter()
+        df = loader.read_column(table, selected_column, ID_COLUMN, columns)
+        st.session_state[f"{side.lower()}_load_seconds"] = time.perf_counter() - start
+        return df
+
+    df = reuse_while_running(f"{side.lower()}_sql_read", (table, selected_column), read)
+    st.write(f"{df.attrs['row_count']} rows loaded ({df.attrs['distinct_count']} distinct)")
+    st.session_state[f"{side.lower()}_df"] = df
+    # Tables can change between reads, so nothing derived from them is cached
+    st.session_state[f"{side.lower()}_cache_key"] = None
+    return df
+
+def workbook_sheets(data):
+    """Content hash and worksheet names of an uploaded workbook."""
+    file_hash = column_cache.content_hash(data)
+    worksheets = column_cache.default_cache().remember(
+        ("sheets", file_hash), lambda: excel_loader.sheet_names(data)
+    )
+    return file_hash, worksheets
+
+def load_excel_column(data, file_hash, side, worksheets):
+    """
+    Worksheet and column pickers for one side of the match. Only the header
+    row is read to offer the columns; the sheet body is then streamed for
+    the selected column (and the ID column) alone. Both are cached by file
+    content, so reruns and other sessions with the same file skip parsing.
+    """
+    cache = column_cache.default_cache()
+    side_key = side.lower()
+    selected_worksheet = st.selectbox(
+        f"Select {side} Worksheet",
+        options=worksheets,
+        key=f"{side_key}_worksheet"
+    )
+    columns = cache.remember(
+        ("header", file_hash, selected_worksheet),
+        lambda: excel_loader.sheet_header(data, selected_worksheet)
+    )
+    if not columns:
+        st.error("Selected worksheet appears to be empty")
+        return None
+    st.write(f"Available columns: {columns}")
+    selected_column = st.selectbox(f"Select {side} Column", options=columns)
+    st.session_state[f"{side_key}_column"] = selected_column
 
-def get_table_columns(conn, table_name):
-    """Get columns from selected table"""
-    query = f"SELECT TOP 1 * FROM {table_name}"
-    df = pd.read_sql(query, conn)
-    return df.columns.tolist()
+    key = column_cache.cache_key(file_hash, selected_worksheet, selected_column, ID_COLUMN)
+    start = time.perf_counter()
+    df = cache.column(key, lambda: excel_loader.read_columns(
+        data, selected_worksheet, [selected_column, ID_COLUMN], header=columns
+    ))
+    # Near zero when the column came from the cache
+    st.session_state[f"{side_key}_load_seconds"] = time.perf_counter() - start
+    if df.empty:
+        st.error("Selected worksheet appears to be empty")
+        return None
+    st.session_state[f"{side_key}_df"] = df
+    st.session_state[f"{side_key}_cache_key"] = key
+    st.write(f"{side} worksheet loaded successfully")
+    return df
+
+def session_id():
+    """Identifies this browser session to the shared job runner."""
+    return st.session_state.setdefault('session_id', uuid.uuid4().hex)
+
+def start_match_job(matcher, source_df, target_df, source_column, target_column, target_key, run_key,
+                    profile_path=None):
+    """
+    Score the columns in the process-wide job pool. The job keeps its own
+    copy of the matcher, so sidebar changes during the run do not affect it,
+    and a new run from this session cancels the previous one. With a
+    profile_path, the run is profiled with cProfile into that file.
+    """
+    matcher = copy(matcher)
+
+    def work(job):
+        with instrumentation.profiled(profile_path):
+            job.set_stage("Indexing targets")
+            stats = {}
+            with instrumentation.StageTimer(stats).stage("index"):
+                # Reuse the prepared target index of an unchanged target column
+                if target_key:
+                    target_index = column_cache.default_cache().target_index(
+                        (target_key, matcher.synonym_handler.version),
+                        lambda: matcher.build_target_index(target_df, target_column)
+                    )
+                else:
+                    target_index = matcher.build_target_index(target_df, target_column)
+            job.set_stage("Scoring source values")
+            run = matcher.score_columns(
+                source_df, target_df, source_column, target_column,
+                target_index=target_index, progress=job.update
+            )
+        run.stats.update(stats)
+        return run
+
+    return match_jobs.default_runner().submit(session_id(), work, key=run_key)
+
+def show_job_progress(job, threshold):
+    """Progress, throughput, a cancel button and the results scored so far."""
+    runner = match_jobs.default_runner()
+    st.header("Matching in Progress")
+    position = runner.queue_position(job)
+    if job.state == match_jobs.QUEUED:
+        st.info(f"Waiting for a free worker ({position} job(s) ahead, {runner.workers} worker(s) shared by all users)")
+    progress = job.snapshot()
+    st.progress(progress["fraction"], text=f"{progress['stage']}: {progress['done']:,} of {progress['total']:,} unique source values")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Values per second", f"{progress['rate']:,.0f}")
+    with col2:
+        st.metric("Elapsed", f"{progress['elapsed']:.0f} s")
+    with col3:
+        st.metric("Time left", "-" if progress["eta"] is None else f"{progress['eta']:.0f} s")
+    if st.button("Cancel Matching"):
+        job.cancel()
+        st.warning("Cancelling after the current batch...")
+
+    # Each entry is the best targets of one of the latest finished batches
+    partial = [
+        (value, target, score)
+        for batch in list(job.partial)
+        for value, (target, score) in batch.items()
+    ]
+    if partial:
+        matched = sum(1 for _, _, score in partial if score >= threshold)
+        st.write(f"Partial results: {matched:,} of {len(partial):,} unique source values of the latest batches matched")
+        st.dataframe(pd.DataFrame(
+            partial[-PARTIAL_ROWS:], columns=["Source Value", "Best Target", "Confidence"]
+        ))
+
+def show_performance(stats, seconds, profile_path=None):
+    """
+    Where the run's time went: ingestion, the matcher's stages and export,
+    with the pairs it scored, cache hit rates, term-expansion sizes, peak
+    memory and the profile of the run when one was taken.
+    """
+    with st.expander("Performance"):
+        stages = {
+            "ingestion": seconds.get("ingestion"),
+            **instrumentation.stage_seconds(stats),
+            "result table": seconds.get("results"),
+            "export": seconds.get("export")
+        }
+        stages = {stage: value for stage, value in stages.items() if value is not None}
+        col1, col2 = st.columns(2)
+        with col1:
+            st.subheader("Time per stage")
+            st.dataframe(pd.DataFrame({
+                "Stage": list(stages),
+                "Seconds": [round(value, 3) for value in stages.values()]
+            }))
+        with col2:
+            st.subheader("Work")
+            st.metric("Pairs scored", f"{stats.get('pairs_scored', 0):,}")
+            st.metric("Pairs pruned", f"{stats.get('pairs_pruned', 0):,}")
+            peak = stats.get("peak_rss_mb")
+            st.metric("Peak memory", "-" if peak is None else f"{peak:,.0f} MB")
+        st.subheader("Caches and term expansion")
+        caches = {
+            f"synonym {name}": counts for name, counts in stats.get("synonym_cache", {}).items()
+        }
+        if "score_cache" in stats:
+            caches["pair scores"] = stats["score_cache"]
+        st.dataframe(pd.DataFrame([
+            {"Cache": name, "Hits": counts["hits"], "Misses": counts["misses"],
+             "Hit rate": f"{counts['hit_rate']:.0%}"}
+            for name, counts in caches.items()
+        ]))
+        st.write(
+            f"Source terms: {stats.get('source_terms', 0):,} · "
+            f"Target terms: {stats.get('target_terms', 0):,} "
+            f"({stats.get('target_terms_per_value', 0):.1f} per target value)"
+        )
+        if profile_path and os.path.exists(profile_path):
+            with open(profile_path, "rb") as profile_file:
+                st.download_button(
+                    label="📥 Download Profile",
+                    data=profile_file,
+                    file_name=os.path.basename(profile_path),
+                    help="cProfile output of this run; open it with pstats or snakeviz"
+                )
+
+def show_results(run, run_key, threshold, export_format):
+    """Partition a scored run at the threshold, then display and export it."""
+    success = True
+    start = time.perf_counter()
+    results = st.session_state.matcher.result_table(run, threshold)
+    seconds = {
+        "ingestion": st.session_state.get('source_load_seconds', 0.0)
+        + st.session_state.get('target_load_seconds', 0.0),
+        "results": time.perf_counter() - start
+    }
+    results_df = None
+    try:
+        st.write("Formatting results...")
+        # Columnar results: categorical values and numeric confidences; only
+        # the head is built for display
+        if len(results) == 0:
+            st.warning("No matches found between the selected columns")
+            success = False
+        else:
+            results_df = next(results.iter_frames(DISPLAY_ROWS))
+            st.write("✅ Results formatted successfully")
+    except pd.errors.EmptyDataError:
+        st.error("No data to format. The matching process returned empty results.")
+        success = False
+    except Exception as e:
+        st.error(f"Error formatting results: {str(e)}")
+        st.error("There was an issue processing the matching results. Please check your data.")
+        success = False
+
+    if success and results_df is not None:
+        # Display results
+        st.header("Matching Results")
+        
+        # Display summary metrics
+        counts = results.counts()
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Total Matches", counts["Match"])
+        with col2:
+            st.metric("Source Mismatches", counts["Source Mismatch"])
+        with col3:
+            st.metric("Target Mismatches", counts["Target Mismatch"])
+        
+        # Display detailed results
+        if len(results) > len(results_df):
+            st.caption(f"Showing the first {len(results_df):,} of {len(results):,} records")
+        st.dataframe(results_df)
+        
+        # Prepare results for download
+        try:
+            # The export is written only when asked for: streamed to a file in
+            # this session's export directory, chunk by chunk, and kept until
+            # the run, threshold or format changes
+            export_key = (run_key, threshold, export_format)
+            export = st.session_state.get('export')
+            if export is None or export[0] != export_key:
+                export = None
+                if st.button("Prepare Download"):
+                    st.write("Preparing download file...")
+                    export_dir = st.session_state.setdefault(
+                        'export_dir', tempfile.mkdtemp(prefix="fuzzy_matcher_export_")
+                    )
+                    file_name = (
+                        f"fuzzy_matching_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{export_format}"
+                    )
+                    for old_file in os.listdir(export_dir):
+                        os.remove(os.path.join(export_dir, old_file))
+                    export_path = os.path.join(export_dir, file_name)
+                    start = time.perf_counter()
+                    summary_data = result_export.export_results(results, export_path)
+                    export = (export_key, export_path, file_name, summary_data, time.perf_counter() - start)
+                    st.session_state.export = export
+                    st.write("File prepared successfully. Ready for download.")
+            if export is not None:
+                _, export_path, file_name, summary_data, seconds["export"] = export
+                st.dataframe(summary_data)
+                # Create download button
+                with open(export_path, "rb") as export_file:
+                    st.download_button(
+                        label="📥 Download Results",
+                        data=export_file,
+                        file_name=file_name,
+                        mime=EXPORT_MIME_TYPES[export_format],
+                        help="Download the matching results"
+                    )
+        except Exception as e:
+            st.error(f"Could not prepare the download: {str(e)}")
+            st.error("Please try the matching process again.")
+
+        profile = st.session_state.get('profile')
+        show_performance(
+            run.stats, seconds, profile[1] if profile is not None and profile[0] == run_key else None
+        )
 
 # Set page config
 st.set_page_config(
@@ -49,7 +367,13 @@ st.set_page_config(
 
 # Initialize session state
 if 'matcher' not in st.session_state:
-    st.session_state.matcher = FuzzyMatcher()
+    # Runs are checkpointed, so a run restarted after a crash or a session
+    # timeout resumes where it stopped
+    st.session_state.matcher = FuzzyMatcher(checkpoint_dir=checkpoint.DEFAULT_CHECKPOINT_DIR)
+
+# A running job of this session refreshes the page every JOB_REFRESH_SECONDS
+job = match_jobs.default_runner().job(session_id())
+job_running = job is not None and job.key == st.session_state.get('run_key') and not job.finished
 
 # Sidebar for configuration
 with st.sidebar:
@@ -75,6 +399,44 @@ with st.sidebar:
         value=70,
         help="Minimum confidence score required for a match"
     )
+    
+    # Results are streamed to a file in this format
+    export_format = st.selectbox(
+        "Download format",
+        options=list(result_export.FORMATS),
+        help="Excel includes a Summary sheet; CSV and Parquet suit very large results"
+    )
+    
+    # One concept string per value instead of every synonym combination
+    canonical = st.checkbox(
+        "Compare synonym concepts",
+        value=False,
+        help="Map each word to a single concept (abbreviation group or main WordNet sense) "
+             "and compare each pair of values once. Much faster; may miss rarer synonyms"
+    )
+    if canonical != st.session_state.matcher.synonym_handler.canonical:
+        st.session_state.matcher.synonym_handler = SynonymHandler(canonical=canonical)
+    
+    # Persistent score cache
+    reuse_scores = st.checkbox(
+        "Reuse scores from earlier runs",
+        value=False,
+        help="Keep scores in a local cache so repeated source values are not scored again"
+    )
+    if reuse_scores and st.session_state.matcher.score_cache is None:
+        st.session_state.matcher.score_cache = score_cache.PairScoreCache()
+    elif not reuse_scores:
+        st.session_state.matcher.score_cache = None
+    if st.session_state.matcher.score_cache is not None and not job_running:
+        cache_stats = st.session_state.matcher.score_cache.stats()
+        st.caption(f"Score cache: {cache_stats['entries']} entries, {cache_stats['hit_rate']:.0%} hit rate")
+    
+    # cProfile of the scoring job, offered in the Performance panel
+    profile_runs = st.checkbox(
+        "Profile matching runs",
+        value=False,
+        help="Record a cProfile of each run for download. Slows the run down"
+    )
 
 # Title and description
 st.title("🔍 Fuzzy Column Matcher")
@@ -98,7 +460,7 @@ col1, col2 = st.columns(2)
 with col1:
     st.header("Source Data")
     source_df = None
-    source_columns = []
+    source_file = None
     
     if source_type == "Excel File":
         source_file = st.file_uploader("Upload Source Excel File", type=['xlsx', 'xls'])
@@ -106,146 +468,58 @@ with col1:
             try:
                 # Get list of worksheets
                 source_bytes = source_file.getvalue()
-                excel_file = pd.ExcelFile(pd.io.common.BytesIO(source_bytes))
-                worksheets = excel_file.sheet_names
+                st.session_state.source_bytes = source_bytes
+                file_hash, worksheets = workbook_sheets(source_bytes)
                 if not worksheets:
                     st.error("No worksheets found in the source Excel file")
-                    source_df = None
-                    source_columns = []
                 else:
-                    # Let user select worksheet
-                    selected_worksheet = st.selectbox(
-                        "Select Source Worksheet",
-                        options=worksheets,
-                        key="source_worksheet"
-                    )
-                    
-                    # Read the selected worksheet
                     try:
-                        # Create DataFrame from the selected worksheet
-                        df = pd.read_excel(pd.io.common.BytesIO(source_bytes), sheet_name=selected_worksheet)
-                        
-                        # Validate DataFrame
-                        if df is None or df.empty:
-                            st.error("Selected worksheet appears to be empty")
-                            source_df = None
-                            source_columns = []
-                        else:
-                            # Convert to proper DataFrame if needed
-                            if not isinstance(df, pd.DataFrame):
-                                df = pd.DataFrame(df)
-                            
-                            # Store in session state
-                            source_df = df.copy()
-                            st.session_state.source_df = source_df
-                            source_columns = source_df.columns.tolist()
-                            st.write("Source worksheet loaded successfully")
-                            st.write(f"Available columns: {source_columns}")
-                            
-                            # Only show column selector if we have columns
-                            if source_columns:
-                                st.session_state.source_column = st.selectbox(
-                                    "Select Source Column",
-                                    options=source_columns
-                                )
-                    except pd.errors.EmptyDataError:
-                        st.error("The selected worksheet is empty")
-                        source_df = None
-                        source_columns = []
+                        source_df = load_excel_column(source_bytes, file_hash, "Source", worksheets)
                     except Exception as e:
                         st.error(f"Error reading worksheet: {str(e)}")
                         source_df = None
-                        source_columns = []
             except zipfile.BadZipFile:
                 st.error("The uploaded file is not a valid Excel file. Please ensure you're uploading a valid .xlsx or .xls file.")
                 source_df = None
-                source_columns = []
             except Exception as e:
                 st.error(f"Error reading source Excel file: {str(e)}")
                 source_df = None
-                source_columns = []
     else:  # SQL Server
         st.session_state.server = st.text_input("SQL Server Name")
         st.session_state.database = st.text_input("Database Name")
         
         if st.session_state.server and st.session_state.database:
-            conn = get_sql_server_connection()
-            if conn:
-                tables = get_sql_tables(conn)
+            loader = get_sql_server_loader()
+            tables = get_sql_tables(loader)
+            if tables is not None:
                 selected_table = st.selectbox("Select Table", tables)
                 if selected_table:
-                    columns = get_table_columns(conn, selected_table)
-                    st.session_state.source_column = st.selectbox(
-                        "Select Source Column",
-                        options=columns
-                    )
-                    source_df = pd.read_sql(f"SELECT * FROM {selected_table}", conn)
-                    st.session_state.source_df = source_df
+                    try:
+                        source_df = load_sql_column(loader, "Source", selected_table)
+                    except Exception as e:
+                        st.error(f"Error reading table: {str(e)}")
+                        source_df = None
 
 # Target Data Selection
 with col2:
     st.header("Target Data")
     target_df = None
-    target_columns = []
     
     if target_type == "Same Excel File" and source_file:
         # Use the same Excel file as source
         try:
             # Get list of worksheets (excluding the source worksheet)
-            excel_file = pd.ExcelFile(pd.io.common.BytesIO(st.session_state.source_bytes))
-            worksheets = [ws for ws in excel_file.sheet_names if ws != st.session_state.get('source_worksheet')]
+            file_hash, worksheets = workbook_sheets(st.session_state.source_bytes)
+            worksheets = [ws for ws in worksheets if ws != st.session_state.get('source_worksheet')]
             if not worksheets:
                 st.error("No additional worksheets found in the Excel file")
-                target_df = None
-                target_columns = []
             else:
-                # Let user select worksheet
-                selected_worksheet = st.selectbox(
-                    "Select Target Worksheet",
-                    options=worksheets,
-                    key="target_worksheet"
+                target_df = load_excel_column(
+                    st.session_state.source_bytes, file_hash, "Target", worksheets
                 )
-                
-                # Read the selected worksheet
-                try:
-                    # Create DataFrame from the selected worksheet
-                    df = pd.read_excel(pd.io.common.BytesIO(st.session_state.source_bytes), sheet_name=selected_worksheet)
-                    
-                    # Validate DataFrame
-                    if df is None or df.empty:
-                        st.error("Selected worksheet appears to be empty")
-                        target_df = None
-                        target_columns = []
-                    else:
-                        # Convert to proper DataFrame if needed
-                        if not isinstance(df, pd.DataFrame):
-                            df = pd.DataFrame(df)
-                        
-                        # Store in session state
-                        target_df = df.copy()
-                        st.session_state.target_df = target_df
-                        target_columns = target_df.columns.tolist()
-                        st.write("Target worksheet loaded successfully")
-                        st.write(f"Available columns: {target_columns}")
-                        
-                        # Only show column selector if we have columns
-                        if target_columns:
-                            st.session_state.target_column = st.selectbox(
-                                "Select Target Column",
-                                options=target_columns
-                            )
-                except pd.errors.EmptyDataError:
-                    st.error("The selected worksheet is empty")
-                    target_df = None
-                    target_columns = []
-                except Exception as e:
-                    st.error(f"Error reading worksheet: {str(e)}")
-                    target_df = None
-                    target_columns = []
         except Exception as e:
             st.error(f"Error reading target worksheet: {str(e)}")
             target_df = None
-            target_columns = []
     
     elif target_type == "Excel File":
         target_file = st.file_uploader("Upload Target Excel File", type=['xlsx', 'xls'])
@@ -253,60 +527,21 @@ with col2:
             try:
                 # Get list of worksheets
                 target_bytes = target_file.getvalue()
-                excel_file = pd.ExcelFile(pd.io.common.BytesIO(target_bytes))
-                worksheets = excel_file.sheet_names
+                file_hash, worksheets = workbook_sheets(target_bytes)
                 if not worksheets:
                     st.error("No worksheets found in the target Excel file")
-                    target_df = None
-                    target_columns = []
                 else:
-                    # Let user select worksheet
-                    selected_worksheet = st.selectbox(
-                        "Select Target Worksheet",
-                        options=worksheets,
-                        key="target_worksheet"
-                    )
-                    
-                    # Read the selected worksheet
                     try:
-                        # Create DataFrame from the selected worksheet
-                        df = pd.read_excel(pd.io.common.BytesIO(target_bytes), sheet_name=selected_worksheet)
-                        
-                        # Validate DataFrame
-                        if df is None or df.empty:
-                            st.error("Selected worksheet appears to be empty")
-                            target_df = None
-                            target_columns = []
-                        else:
-                            # Convert to proper DataFrame if needed
-                            if not isinstance(df, pd.DataFrame):
-                                df = pd.DataFrame(df)
-                            
-                            # Store in session state
-                            target_df = df.copy()
-                            st.session_state.target_df = target_df
-                            target_columns = target_df.columns.tolist()
-                            st.write("Target worksheet loaded successfully")
-                            st.write(f"Available columns: {target_columns}")
-                            
-                            # Only show column selector if we have columns
-                            if target_columns:
-                                st.session_state.target_column = st.selectbox(
-                                    "Select Target Column",
-                                    options=target_columns
-                                )
+                        target_df = load_excel_column(target_bytes, file_hash, "Target", worksheets)
                     except Exception as e:
                         st.error(f"Error reading worksheet: {str(e)}")
                         target_df = None
-                        target_columns = []
             except zipfile.BadZipFile:
                 st.error("The uploaded file is not a valid Excel file. Please ensure you're uploading a valid .xlsx or .xls file.")
                 target_df = None
-                target_columns = []
             except Exception as e:
                 st.error(f"Error reading target Excel file: {str(e)}")
                 target_df = None
-                target_columns = []
     
     else:  # SQL Server
         if 'server' not in st.session_state:
@@ -314,31 +549,25 @@ with col2:
             st.session_state.database = st.text_input("Database Name ", key="target_db")
         
         if st.session_state.server and st.session_state.database:
-            conn = get_sql_server_connection()
-            if conn:
-                tables = get_sql_tables(conn)
+            loader = get_sql_server_loader()
+            tables = get_sql_tables(loader)
+            if tables is not None:
                 selected_table = st.selectbox("Select Table ", tables)
                 if selected_table:
-                    columns = get_table_columns(conn, selected_table)
-                    st.session_state.target_column = st.selectbox(
-                        "Select Target Column",
-                        options=columns
-                    )
-                    target_df = pd.read_sql(f"SELECT * FROM {selected_table}", conn)
-                    st.session_state.target_df = target_df
+                    try:
+                        target_df = load_sql_column(loader, "Target", selected_table)
+                    except Exception as e:
+                        st.error(f"Error reading table: {str(e)}")
+                        target_df = None
 
 # Process matching
 if st.button("Run Matching"):
     if (hasattr(st.session_state, 'source_df') and hasattr(st.session_state, 'target_df') and 
         st.session_state.source_df is not None and st.session_state.target_df is not None):
-        with st.spinner("Processing matches..."):
+        with st.spinner("Preparing data..."):
             # Update matcher threshold
             st.session_state.matcher.threshold = threshold
             
-            success = True
-            results = None
-            results_df = None
-
             try:
                 # Get DataFrames from session state
                 source_df = st.session_state.source_df
@@ -443,121 +672,89 @@ if st.button("Run Matching"):
                     except Exception as e:
                         raise ValueError(f"Failed to convert data to strings: {str(e)}")
                     
-                    # Perform matching
-                    st.write("Running matching algorithm...")
-                    results = st.session_state.matcher.match_columns(
-                        source_copy,
-                        target_copy,
+                    # Scores do not depend on the threshold: keep the run keyed by
+                    # its inputs and only repartition it when they are unchanged
+                    matcher = st.session_state.matcher
+                    target_key_columns = [
+                        c for c in (st.session_state.target_column, ID_COLUMN) if c in target_copy.columns
+                    ]
+                    run_key = column_cache.cache_key(
+                        column_cache.frame_hash(source_copy, [st.session_state.source_column]),
+                        column_cache.frame_hash(target_copy, target_key_columns),
                         st.session_state.source_column,
-                        st.session_state.target_column
+                        st.session_state.target_column,
+                        matcher.synonym_handler.version,
+                        matcher.engine,
+                        matcher.fast_path
                     )
-                    st.write("✅ Matching process completed successfully")
+                    stored_run = st.session_state.get('scored_run')
+                    if stored_run is not None and stored_run[0] == run_key:
+                        st.write("Inputs unchanged, re-applying the threshold to the stored scores...")
+                    else:
+                        # Score in the shared background pool; progress and
+                        # partial results are shown below while it runs
+                        profile_path = None
+                        if profile_runs:
+                            profile_dir = st.session_state.setdefault(
+                                'profile_dir', tempfile.mkdtemp(prefix="fuzzy_matcher_profile_")
+                            )
+                            for old_file in os.listdir(profile_dir):
+                                os.remove(os.path.join(profile_dir, old_file))
+                            profile_path = os.path.join(
+                                profile_dir, f"match_run_{datetime.now().strftime('%Y%m%d_%H%M%S')}.prof"
+                            )
+                            st.session_state.profile = (run_key, profile_path)
+                        start_match_job(
+                            matcher,
+                            source_copy,
+                            target_copy,
+                            st.session_state.source_column,
+                            st.session_state.target_column,
+                            st.session_state.get('target_cache_key'),
+                            run_key,
+                            profile_path
+                        )
+                        st.write("Matching started in the background")
+                    st.session_state.run_key = run_key
                 except Exception as e:
                     st.error(f"Error during matching: {str(e)}")
                     st.error("Please ensure your data is in the correct format")
-                    success = False
             except ValueError as ve:
                 st.error(f"Validation Error: {str(ve)}")
                 st.error("Please ensure your column selections are correct.")
-                success = False
             except pd.errors.EmptyDataError:
                 st.error("One or both DataFrames are empty. Please check your data.")
                 st.error("Make sure both source and target worksheets contain data.")
-                success = False
             except AttributeError as ae:
                 st.error(f"Data structure error: {str(ae)}")
                 st.error("Please try re-uploading your Excel files.")
-                success = False
             except Exception as e:
                 st.error(f"Unexpected error during matching: {str(e)}")
                 st.error("Please ensure your Excel files are valid and not corrupted.")
                 st.error("Try saving your Excel files again and re-upload them.")
-                success = False
-
-            if success and results is not None:
-                try:
-                    st.write("Formatting results...")
-                    # Format results
-                    results_df = st.session_state.matcher.format_results_for_export(results)
-                    if results_df.empty:
-                        st.warning("No matches found between the selected columns")
-                        success = False
-                    else:
-                        st.write("✅ Results formatted successfully")
-                except pd.errors.EmptyDataError:
-                    st.error("No data to format. The matching process returned empty results.")
-                    success = False
-                except Exception as e:
-                    st.error(f"Error formatting results: {str(e)}")
-                    st.error("There was an issue processing the matching results. Please check your data.")
-                    success = False
-
-            if success and results_df is not None:
-                # Display results
-                st.header("Matching Results")
-                
-                # Display summary metrics
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.metric("Total Matches", len(results["matches"]))
-                with col2:
-                    st.metric("Source Mismatches", len(results["source_mismatches"]))
-                with col3:
-                    st.metric("Target Mismatches", len(results["target_mismatches"]))
-                
-                # Display detailed results
-                st.dataframe(results_df)
-                
-                # Prepare results for download
-                try:
-                    st.write("Preparing download file...")
-                    # Create BytesIO object
-                    output = pd.io.common.BytesIO()
-                    
-                    # Write to BytesIO buffer
-                    with pd.ExcelWriter(output, engine='openpyxl', mode='w') as writer:
-                        # Write main results
-                        results_df.to_excel(writer, sheet_name='Matching Results', index=False)
-                        
-                        # Create summary data
-                        summary_data = pd.DataFrame({
-                            'Metric': [
-                                'Total Records Processed',
-                                'Successful Matches',
-                                'Source Mismatches',
-                                'Target Mismatches',
-                                'Average Confidence Score'
-                            ],
-                            'Value': [
-                                len(results_df),
-                                len(results_df[results_df['Type'] == 'Match']),
-                                len(results_df[results_df['Type'] == 'Source Mismatch']),
-                                len(results_df[results_df['Type'] == 'Target Mismatch']),
-                                f"{results_df['Confidence'].str.rstrip('%').astype(float).mean():.2f}%"
-                            ]
-                        })
-                        
-                        # Write summary sheet
-                        summary_data.to_excel(writer, sheet_name='Summary', index=False)
-                    
-                    # Get the value of the BytesIO buffer
-                    excel_data = output.getvalue()
-                    
-                    st.write("File prepared successfully. Ready for download.")
-                    # Create download button
-                    st.download_button(
-                        label="📥 Download Results",
-                        data=excel_data,
-                        file_name=f"fuzzy_matching_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
-                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                        help="Download the matching results as an Excel file"
-                    )
-                except Exception as e:
-                    st.error(f"Could not prepare the download: {str(e)}")
-                    st.error("Please try the matching process again.")
     else:
         st.error("Please select both source and target data before running the matching process.")
 
+# Background job of this session, and the results of the latest run
+job = match_jobs.default_runner().job(session_id())
+if job is not None and job.key == st.session_state.get('run_key'):
+    if not job.finished:
+        show_job_progress(job, threshold)
+        time.sleep(JOB_REFRESH_SECONDS)
+        st.experimental_rerun()
+    if job.state == match_jobs.DONE:
+        st.session_state.scored_run = (job.key, job.result)
+    elif job.state == match_jobs.CANCELLED:
+        st.warning("Matching was cancelled")
+    else:
+        st.error(f"Error during matching: {job.error}")
+        st.error("Please ensure your data is in the correct format")
+    match_jobs.default_runner().forget(session_id())
+
+stored_run = st.session_state.get('scored_run')
+if stored_run is not None and stored_run[0] == st.session_state.get('run_key'):
+    show_results(stored_run[1], stored_run[0], threshold, export_format)
+
 # Footer
 st.markdown("---")
 st.markdown("""
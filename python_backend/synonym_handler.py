@@ -1,16 +1,22 @@
-import nltk
-from nltk.corpus import wordnet
+import hashlib
+import json
 import re
+import warnings
+from functools import lru_cache
+from typing import Iterable, Optional
+from synonym_table import POS_LIST, load_wordnet, open_table
 
-class SynonymHandler:
-    def __init__(self):
-        # Download required NLTK data
-        try:
-            nltk.download('wordnet', quiet=True)
-            nltk.download('averaged_perceptron_tagger', quiet=True)
-        except:
-            pass
+# Shorter tokens (initials, units, plural "s") keep their own concept
+MIN_CONCEPT_LENGTH = 3
 
+class SynonymHandler:
+    def __init__(
+        self,
+        cache_size: int = 65536,
+        table_path: Optional[str] = None,
+        canonical: bool = False,
+        concept_pos: Optional[Iterable[str]] = None
+    ):
         # Common business abbreviations and their expansions
         self.custom_synonyms = {
             'amt': ['amount'],
@@ -26,26 +32,178 @@ class SynonymHandler:
             # Add more domain-specific synonyms as needed
         }
 
+        # The compiled synonym table replaces WordNet when it is available;
+        # otherwise NLTK is only imported on the first lookup
+        self.table_path = table_path
+        self.table = open_table(table_path)
+        self._wordnet = None
+        if self.table is not None:
+            for term, expansions in self.table.custom_synonyms().items():
+                known = self.custom_synonyms.setdefault(term, [])
+                known.extend(e for e in expansions if e not in known)
+
+        # Canonical mode maps each token to one concept (its abbreviation
+        # group, else its first WordNet sense, for the given parts of speech)
+        # and each value to one string, instead of expanding synonyms
+        self.canonical = canonical
+        self.concept_pos = tuple(concept_pos) if concept_pos else POS_LIST
+
+        # Per-token and per-string expansions are memoized in bounded LRUs
+        self.cache_size = cache_size
+        self.refresh()
+
+    def refresh(self):
+        """
+        Rebuild the abbreviation index and clear the caches.
+        Call this after editing custom_synonyms on a live instance.
+        """
+        self._abbreviation_index = self._build_abbreviation_index()
+        self._concept_index = self._build_concept_index()
+        self.version = self._version()
+        self._token_cache = lru_cache(maxsize=self.cache_size)(self._lookup_synonyms)
+        self._concept_cache = lru_cache(maxsize=self.cache_size)(self._lookup_concept)
+        self._expansion_cache = lru_cache(maxsize=self.cache_size)(self._expand)
+
+    def __getstate__(self):
+        # Caches, the memory map and the WordNet reader stay in this process
+        return {
+            "custom_synonyms": self.custom_synonyms,
+            "cache_size": self.cache_size,
+            "canonical": self.canonical,
+            "concept_pos": self.concept_pos,
+            "table_path": self.table.path if self.table is not None else None,
+            "has_table": self.table is not None
+        }
+
+    def __setstate__(self, state):
+        self.custom_synonyms = state["custom_synonyms"]
+        self.cache_size = state["cache_size"]
+        self.canonical = state["canonical"]
+        self.concept_pos = state["concept_pos"]
+        self.table_path = state["table_path"]
+        self.table = open_table(self.table_path) if state["has_table"] else None
+        self._wordnet = None
+        self.refresh()
+
+    def _version(self) -> str:
+        """
+        Fingerprint of everything expansions depend on, so anything derived
+        from them (such as a prepared target index) can be cached safely.
+        """
+        source = self.table.version if self.table is not None else "wordnet"
+        custom = json.dumps(self.custom_synonyms, sort_keys=True)
+        if self.canonical:
+            custom += f"\ncanonical:{','.join(self.concept_pos)}"
+        return hashlib.blake2b(f"{source}\n{custom}".encode("utf-8"), digest_size=8).hexdigest()
+
+    def _build_abbreviation_index(self) -> dict:
+        """Map every abbreviation to its expansions and every expansion back to its abbreviations."""
+        index = {}
+        for term, expansions in self.custom_synonyms.items():
+            index.setdefault(term, set()).update(expansions)
+            for expansion in expansions:
+                if expansion != term:
+                    index.setdefault(expansion, set()).add(term)
+        return index
+
+    def _build_concept_index(self) -> dict:
+        """Map every abbreviation and expansion to its group's abbreviation, the first in sorted order."""
+        index = {}
+        for term in sorted(self.custom_synonyms):
+            for word in (term, *self.custom_synonyms[term]):
+                index.setdefault(word, term)
+        return index
+
+    def cache_stats(self) -> dict:
+        """Hit/miss counters of the token and expansion caches."""
+        stats = {}
+        for name, cache in (
+            ("synonyms", self._token_cache),
+            ("concepts", self._concept_cache),
+            ("expansions", self._expansion_cache)
+        ):
+            info = cache.cache_info()
+            stats[name] = {
+                "hits": info.hits,
+                "misses": info.misses,
+                "size": info.currsize,
+                "maxsize": info.maxsize
+            }
+        return stats
+
     def get_synonyms(self, word: str) -> set:
         """Get all possible synonyms for a word including custom business terms."""
-        word = word.lower()
+        return set(self._token_cache(word.lower()))
+
+    def _lookup_synonyms(self, word: str) -> frozenset:
         synonyms = set()
 
         # Check custom business synonyms
-        for term, expansions in self.custom_synonyms.items():
-            if term == word:
-                synonyms.update(expansions)
-            elif word in expansions:
-                synonyms.add(term)
+        synonyms.update(self._abbreviation_index.get(word, ()))
 
         # Get WordNet synonyms
-        for syn in wordnet.synsets(word):
-            for lemma in syn.lemmas():
-                synonyms.add(lemma.name().lower())
+        synonyms.update(self._wordnet_synonyms(word))
 
         # Add the original word
         synonyms.add(word)
-        return synonyms
+        return frozenset(synonyms)
+
+    def _load_wordnet(self):
+        """NLTK's WordNet reader, loaded on first use, or False if unavailable."""
+        if self._wordnet is None:
+            try:
+                self._wordnet = load_wordnet()
+            except LookupError:
+                warnings.warn("WordNet is unavailable; using custom synonyms only")
+                self._wordnet = False
+        return self._wordnet
+
+    def _wordnet_synonyms(self, word: str) -> set:
+        if self.table is not None:
+            return self.table.wordnet_synonyms(word)
+
+        wordnet = self._load_wordnet()
+        if not wordnet:
+            return set()
+        return {
+            lemma.name().lower()
+            for syn in wordnet.synsets(word)
+            for lemma in syn.lemmas()
+        }
+
+    def get_concept(self, word: str) -> str:
+        """
+        Concept a token stands for in canonical mode: the abbreviation of its
+        custom synonym group, else the head lemma of its first WordNet synset
+        within concept_pos, else the token itself (always for short tokens).
+        """
+        return self._concept_cache(word.lower())
+
+    def _lookup_concept(self, word: str) -> str:
+        if word in self._concept_index:
+            return self._concept_index[word]
+        if len(word) < MIN_CONCEPT_LENGTH:
+            return word
+        return self._wordnet_concept(word) or word
+
+    def _wordnet_concept(self, word: str) -> Optional[str]:
+        if self.table is not None:
+            return self.table.concept(word, self.concept_pos)
+
+        wordnet = self._load_wordnet()
+        if not wordnet:
+            return None
+        for pos in self.concept_pos:
+            synsets = wordnet.synsets(word, pos)
+            if synsets:
+                return synsets[0].lemmas()[0].name().lower()
+        return None
+
+    def canonical_form(self, column_name: str) -> str:
+        """The preprocessed name with every token replaced by its concept."""
+        return " ".join(
+            self.get_concept(part) for part in self.preprocess_column_name(column_name).split()
+        )
 
     def preprocess_column_name(self, column_name: str) -> str:
         """Preprocess column name for better matching."""
@@ -56,7 +214,17 @@ class SynonymHandler:
         return processed
 
     def get_expanded_terms(self, column_name: str) -> set:
-        """Get all possible variations of a column name including its parts."""
+        """
+        Get all possible variations of a column name including its parts,
+        or in canonical mode only its canonical form.
+        """
+        return set(self._expansion_cache(column_name))
+
+    def _expand(self, column_name: str) -> frozenset:
+        # One term per value, so a value pair is a single comparison
+        if self.canonical:
+            return frozenset([self.canonical_form(column_name)])
+
         processed_name = self.preprocess_column_name(column_name)
         terms = set()
         
@@ -73,4 +241,4 @@ class SynonymHandler:
             combined = f"{parts[i]}{parts[i+1]}"
             terms.add(combined)
             
-        return terms
+        return frozenset(terms)
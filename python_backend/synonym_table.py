@@ -0,0 +1,305 @@
+"""
+Compact, memory-mapped synonym table compiled from WordNet.
+
+The table answers the same question as ``wordnet.synsets(word)`` followed by
+collecting the lemma names, without importing NLTK or loading the corpus, so
+the matcher starts fast and works offline. Build it once with::
+
+    python synonym_table.py [--output synonyms.bin] [--vocabulary words.txt]
+"""
+import argparse
+import bisect
+import hashlib
+import mmap
+import os
+import struct
+import numpy as np
+from typing import Dict, Iterable, List, Optional
+
+DEFAULT_TABLE_PATH = os.environ.get(
+    "SYNONYM_TABLE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "synonyms.bin")
+)
+
+MAGIC = b"SYNTAB01"
+# magic, digest, string count, key count, value count, blob size
+HEADER = struct.Struct("<8s16sIIII")
+
+POS_LIST = ("n", "v", "a", "r")
+
+# Same rules as NLTK's WordNetCorpusReader.MORPHOLOGICAL_SUBSTITUTIONS
+MORPHOLOGICAL_SUBSTITUTIONS = {
+    "n": [("s", ""), ("ses", "s"), ("ves", "f"), ("xes", "x"), ("zes", "z"),
+          ("ches", "ch"), ("shes", "sh"), ("men", "man"), ("ies", "y")],
+    "v": [("s", ""), ("ies", "y"), ("es", "e"), ("es", ""), ("ed", "e"),
+          ("ed", ""), ("ing", "e"), ("ing", "")],
+    "a": [("er", ""), ("est", ""), ("er", "e"), ("est", "e")],
+    "r": [],
+}
+
+
+def lemma_key(pos: str, form: str) -> str:
+    return f"{pos}:{form}"
+
+
+def exception_key(pos: str, form: str) -> str:
+    return f"!{pos}:{form}"
+
+
+def custom_key(term: str) -> str:
+    return f"={term}"
+
+
+def concept_key(pos: str, form: str) -> str:
+    return f"@{pos}:{form}"
+
+
+class SynonymTable:
+    """Read-only view over a compiled table; nothing is copied off the map."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as handle:
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, digest, n_strings, n_keys, n_values, blob_size = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a synonym table")
+        self.path = path
+        self.version = digest.hex()
+
+        offset = HEADER.size
+        self._string_offsets = np.frombuffer(self._map, np.uint32, n_strings + 1, offset)
+        offset += 4 * (n_strings + 1)
+        self._key_ids = np.frombuffer(self._map, np.uint32, n_keys, offset)
+        offset += 4 * n_keys
+        self._value_offsets = np.frombuffer(self._map, np.uint32, n_keys + 1, offset)
+        offset += 4 * (n_keys + 1)
+        self._values = np.frombuffer(self._map, np.uint32, n_values, offset)
+        offset += 4 * n_values
+        self._blob_start = offset
+        self._keys = _KeyView(self)
+
+    def _string(self, string_id: int) -> bytes:
+        start = self._blob_start + int(self._string_offsets[string_id])
+        end = self._blob_start + int(self._string_offsets[string_id + 1])
+        return self._map[start:end]
+
+    def close(self):
+        """Release the memory map; views obtained from the table become invalid."""
+        self._string_offsets = self._key_ids = self._value_offsets = self._values = None
+        self._map.close()
+
+    def _find(self, key: str) -> int:
+        encoded = key.encode("utf-8")
+        position = bisect.bisect_left(self._keys, encoded)
+        if position == len(self._keys) or self._keys[position] != encoded:
+            return -1
+        return position
+
+    def __contains__(self, key: str) -> bool:
+        return self._find(key) >= 0
+
+    def get(self, key: str) -> Optional[List[str]]:
+        """Values stored under a key, or None if the key is absent."""
+        position = self._find(key)
+        if position < 0:
+            return None
+        start, end = self._value_offsets[position], self._value_offsets[position + 1]
+        return [self._string(v).decode("utf-8") for v in self._values[start:end]]
+
+    def custom_synonyms(self) -> Dict[str, List[str]]:
+        """Custom abbreviations compiled into the table."""
+        start = bisect.bisect_left(self._keys, b"=")
+        end = bisect.bisect_left(self._keys, b">")
+        return {
+            self._keys[i].decode("utf-8")[1:]: self.get(self._keys[i].decode("utf-8"))
+            for i in range(start, end)
+        }
+
+    def _morphy(self, form: str, pos: str) -> List[str]:
+        """Base forms of a word for one part of speech, as NLTK's _morphy."""
+        substitutions = MORPHOLOGICAL_SUBSTITUTIONS[pos]
+
+        def apply_rules(forms):
+            return [
+                form[:-len(old)] + new
+                for form in forms
+                for old, new in substitutions
+                if form.endswith(old)
+            ]
+
+        def filter_forms(forms):
+            return list(dict.fromkeys(
+                f for f in forms if lemma_key(pos, f) in self
+            ))
+
+        exceptions = self.get(exception_key(pos, form))
+        if exceptions is not None:
+            return filter_forms([form] + exceptions)
+
+        forms = apply_rules([form])
+        results = filter_forms([form] + forms)
+        if results:
+            return results
+        while forms:
+            forms = apply_rules(forms)
+            results = filter_forms(forms)
+            if results:
+                return results
+        return []
+
+    def wordnet_synonyms(self, word: str) -> set:
+        """Lemma names of every synset of a word, like wordnet.synsets()."""
+        synonyms = set()
+        for pos in POS_LIST:
+            for form in self._morphy(word, pos):
+                synonyms.update(self.get(lemma_key(pos, form)))
+        return synonyms
+
+    def concept(self, word: str, pos_list: Iterable[str] = POS_LIST) -> Optional[str]:
+        """
+        Head lemma of the first synset of a word, like
+        ``wordnet.synsets(word, pos)[0]`` for the first part of speech that
+        has one. None for unknown words and for tables built without concepts.
+        """
+        for pos in pos_list:
+            for form in self._morphy(word, pos):
+                concept = self.get(concept_key(pos, form))
+                if concept:
+                    return concept[0]
+        return None
+
+
+class _KeyView:
+    """Sorted sequence of key bytes, so bisect can search the map directly."""
+
+    def __init__(self, table: SynonymTable):
+        self._table = table
+
+    def __len__(self) -> int:
+        return len(self._table._key_ids)
+
+    def __getitem__(self, index: int) -> bytes:
+        return self._table._string(int(self._table._key_ids[index]))
+
+
+def open_table(path: Optional[str] = None) -> Optional[SynonymTable]:
+    """Open the table at path (or the default location) if it exists."""
+    path = path or DEFAULT_TABLE_PATH
+    if not os.path.exists(path):
+        return None
+    return SynonymTable(path)
+
+
+def load_wordnet():
+    """
+    Import NLTK's WordNet reader on demand, downloading the corpus only if it
+    is not installed yet. Raises LookupError when it cannot be obtained.
+    """
+    import nltk
+    from nltk.corpus import wordnet
+
+    try:
+        nltk.data.find("corpora/wordnet")
+    except LookupError:
+        nltk.download("wordnet", quiet=True)
+    wordnet.ensure_loaded()
+    return wordnet
+
+
+def _wordnet_entries(vocabulary: Optional[Iterable[str]]) -> Dict[str, List[str]]:
+    """Collect lemma and exception entries, for all of WordNet or a vocabulary."""
+    wordnet = load_wordnet()
+    entries = {}
+
+    def add_lemma(pos, form):
+        key = lemma_key(pos, form)
+        if key not in entries:
+            offsets = wordnet._lemma_pos_offset_map[form][pos]
+            entries[key] = sorted({
+                lemma.name().lower()
+                for offset in offsets
+                for lemma in wordnet.synset_from_pos_and_offset(pos, offset).lemmas()
+            })
+            # Synsets are listed most frequent sense first
+            first = wordnet.synset_from_pos_and_offset(pos, offsets[0])
+            entries[concept_key(pos, form)] = [first.lemmas()[0].name().lower()]
+
+    if vocabulary is None:
+        for form, pos_offsets in wordnet._lemma_pos_offset_map.items():
+            for pos in POS_LIST:
+                if pos in pos_offsets:
+                    add_lemma(pos, form)
+        for pos in POS_LIST:
+            for form, bases in wordnet._exception_map[pos].items():
+                entries[exception_key(pos, form)] = list(bases)
+    else:
+        for word in vocabulary:
+            word = word.lower()
+            for pos in POS_LIST:
+                if word in wordnet._exception_map[pos]:
+                    entries[exception_key(pos, word)] = list(wordnet._exception_map[pos][word])
+                for form in wordnet._morphy(word, pos):
+                    add_lemma(pos, form)
+    return entries
+
+
+def write_table(path: str, entries: Dict[str, List[str]]):
+    """Serialize key -> list of strings entries into the table format."""
+    strings = sorted({s.encode("utf-8") for key, values in entries.items() for s in [key, *values]})
+    string_ids = {s: i for i, s in enumerate(strings)}
+    keys = sorted(key.encode("utf-8") for key in entries)
+
+    string_offsets = np.zeros(len(strings) + 1, dtype=np.uint32)
+    string_offsets[1:] = np.cumsum([len(s) for s in strings])
+    key_ids = np.asarray([string_ids[k] for k in keys], dtype=np.uint32)
+    values = [string_ids[v.encode("utf-8")] for k in keys for v in entries[k.decode("utf-8")]]
+    value_offsets = np.zeros(len(keys) + 1, dtype=np.uint32)
+    value_offsets[1:] = np.cumsum([len(entries[k.decode("utf-8")]) for k in keys])
+    values = np.asarray(values, dtype=np.uint32)
+    blob = b"".join(strings)
+
+    payload = b"".join([
+        string_offsets.tobytes(), key_ids.tobytes(), value_offsets.tobytes(), values.tobytes(), blob
+    ])
+    digest = hashlib.blake2b(payload, digest_size=16).digest()
+    header = HEADER.pack(MAGIC, digest, len(strings), len(keys), len(values), len(blob))
+    # Write next to the target and swap it in, so open maps stay valid
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as handle:
+        handle.write(header)
+        handle.write(payload)
+    os.replace(temp_path, path)
+
+
+def build_table(
+    path: str = DEFAULT_TABLE_PATH,
+    custom_synonyms: Optional[Dict[str, List[str]]] = None,
+    vocabulary: Optional[Iterable[str]] = None
+) -> SynonymTable:
+    """
+    Compile WordNet lemmas plus custom synonyms into a table at path.
+    With a vocabulary only the entries those words can reach are kept.
+    """
+    entries = _wordnet_entries(vocabulary)
+    for term, expansions in (custom_synonyms or {}).items():
+        entries[custom_key(term)] = list(expansions)
+    write_table(path, entries)
+    return SynonymTable(path)
+
+
+if __name__ == "__main__":
+    from synonym_handler import SynonymHandler
+
+    parser = argparse.ArgumentParser(description="Compile the offline synonym table")
+    parser.add_argument("--output", default=DEFAULT_TABLE_PATH)
+    parser.add_argument("--vocabulary", help="file with one word per line to restrict the table to")
+    args = parser.parse_args()
+
+    vocabulary = None
+    if args.vocabulary:
+        with open(args.vocabulary, encoding="utf-8") as handle:
+            vocabulary = [line.strip() for line in handle if line.strip()]
+
+    handler = SynonymHandler()
+    table = build_table(args.output, handler.custom_synonyms, vocabulary)
+    print(f"Wrote {len(table._keys)} entries to {args.output} (version {table.version})")
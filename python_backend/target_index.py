@@ -0,0 +1,82 @@
+import hashlib
+from typing import Any, Dict, List, Optional
+
+from batch_engine import TermTable
+
+
+def column_values(df, column: str) -> List[str]:
+    """Normalize a column the same way the row-by-row matcher does."""
+    return [str(value).strip() for value in df[column].tolist()]
+
+
+class TargetIndex:
+    """
+    Prepared target column: row values and ids, the unique values in
+    first-occurrence order and their expanded terms. Build it once and
+    match any number of sources against it.
+    """
+
+    def __init__(self, values: List[str], ids: List[Any], synonym_handler):
+        self.values = values
+        self.ids = ids
+        self.first_row: Dict[str, int] = {}
+        for row, value in enumerate(values):
+            self.first_row.setdefault(value, row)
+        # First-occurrence order, so argmax ties resolve to the same row the
+        # row-by-row loop would pick
+        self.unique_values = list(self.first_row)
+        self._fingerprint = None
+        self.table = TermTable(self.unique_values, synonym_handler)
+
+        # Hash-join keys for the exact fast path: the normalized value and
+        # the same with spaces collapsed, mapped to their first unique target
+        self.exact_keys: Dict[str, int] = {}
+        self.collapsed_keys: Dict[str, int] = {}
+        for index, value in enumerate(self.unique_values):
+            key = synonym_handler.preprocess_column_name(value)
+            if key:
+                self.exact_keys.setdefault(key, index)
+                self.collapsed_keys.setdefault(key.replace(" ", ""), index)
+
+    @classmethod
+    def from_dataframe(cls, df, column: str, id_column: str, synonym_handler) -> "TargetIndex":
+        values = column_values(df, column)
+        if id_column in df.columns:
+            ids = df[id_column].tolist()
+        else:
+            ids = [None] * len(values)
+        return cls(values, ids, synonym_handler)
+
+    def __len__(self) -> int:
+        return len(self.unique_values)
+
+    @property
+    def fingerprint(self) -> str:
+        """Hash of the unique values, identifying the catalog across runs."""
+        if self._fingerprint is None:
+            digest = hashlib.blake2b(digest_size=16)
+            for value in self.unique_values:
+                digest.update(value.encode("utf-8"))
+                digest.update(b"\0")
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def value(self, index: int) -> Optional[str]:
+        """Unique value at index, or None for the -1 'no target' index."""
+        return self.unique_values[index] if index >= 0 else None
+
+    def exact_match(self, key: str) -> int:
+        """
+        Unique target whose normalized value equals a normalized key, with or
+        without spaces, or -1.
+        """
+        if not key:
+            return -1
+        index = self.exact_keys.get(key)
+        if index is None:
+            index = self.collapsed_keys.get(key.replace(" ", ""), -1)
+        return index
+
+    def id_of(self, value: str) -> Any:
+        """Id of the first row holding a value."""
+        return self.ids[self.first_row[value]]
@@ -1,5 +1,20 @@
 import pandas as pd
 from .fuzzy_matcher import FuzzyMatcher
+from .batch_engine import BatchScorer, TermTable
+from .parallel_engine import ParallelScorer
+from .synonym_handler import SynonymHandler
+from .synonym_table import build_table
+from .pruning import TermProfile, score_bound
+from . import checkpoint, column_cache, excel_loader, instrumentation, result_export, sql_loader
+from .score_cache import PairScoreCache
+from .benchmark_canonical import compare_modes
+from .benchmark_suite import compare, run_suite, synthetic_columns
+from .match_results import MatchResults
+from .matching_service import MatchingService
+from .match_jobs import JobRunner, MatchJob, CANCELLED, DONE, QUEUED
+import asyncio
+import sqlite3
+import threading
 import tempfile
 import os
 
@@ -140,6 +155,967 @@ def test_synonym_matching():
     print("\nSynonym Matching Results:")
     print(results_df)
 
+RESULT_KEYS = ('matches', 'source_mismatches', 'target_mismatches')
+
+def test_batch_engine_parity():
+    """The batch engine must return exactly what the row-by-row loop returns"""
+    
+    source_df, target_df = create_sample_data()
+    
+    # Add duplicates, blanks and synonym-heavy values on both sides
+    source_df = pd.concat([source_df, pd.DataFrame({
+        'Attribute in ProjABS': ['Cash', 'Amt Due', 'Acct Balance', None, ' Cash '],
+        'DataItemID': ['', '', '', '', '']
+    })], ignore_index=True)
+    target_df = pd.concat([target_df, pd.DataFrame({
+        'DataItemID': ['7', '8', '9', '10'],
+        'DataItemName': ['Amount Outstanding', 'Account Bal', 'Cash(s)', 'Cust Identifier']
+    })], ignore_index=True)
+    
+    for threshold in (0, 60, 70, 95):
+        loop_results = FuzzyMatcher(threshold=threshold, engine="loop").match_columns(
+            source_df, target_df, 'Attribute in ProjABS', 'DataItemName'
+        )
+        batch_results = FuzzyMatcher(threshold=threshold, engine="batch", fast_path=False).match_columns(
+            source_df, target_df, 'Attribute in ProjABS', 'DataItemName'
+        )
+        for key in RESULT_KEYS:
+            assert batch_results[key] == loop_results[key]
+    
+    # Empty target column
+    empty_df = target_df.iloc[0:0]
+    loop_results = FuzzyMatcher(engine="loop").match_columns(
+        source_df, empty_df, 'Attribute in ProjABS', 'DataItemName'
+    )
+    batch_results = FuzzyMatcher(engine="batch", fast_path=False).match_columns(
+        source_df, empty_df, 'Attribute in ProjABS', 'DataItemName'
+    )
+    for key in RESULT_KEYS:
+        assert batch_results[key] == loop_results[key]
+
+def test_two_way_reduction_across_blocks():
+    """Column-wise best matches must not depend on how the matrix is blocked"""
+    
+    matcher = FuzzyMatcher(engine="loop")
+    sources = ['Cash', 'Amt Due', 'Cash', 'Acct Balance', 'Prod Desc']
+    targets = ['Cash(s)', 'Amount Outstanding', 'Account Bal', 'Product Description']
+    source_table = TermTable(list(dict.fromkeys(sources)), matcher.synonym_handler)
+    target_table = TermTable(targets, matcher.synonym_handler)
+    
+    # One value per block forces every column update to cross block boundaries
+    reduction = BatchScorer(block_bytes=1).score(source_table, target_table)
+    best_source, best_score = reduction.col_best()
+    
+    for j, target in enumerate(targets):
+        scores = [matcher.calculate_similarity(target, s) for s in source_table.values]
+        assert best_score[j] == max(scores)
+        assert best_source[j] == scores.index(max(scores))
+
+def test_index_engine_recall():
+    """The candidate index must prune pairs without losing any match"""
+    
+    source_df, target_df = create_sample_data()
+    batch_results = FuzzyMatcher(threshold=70, engine="batch").match_columns(
+        source_df, target_df, 'Attribute in ProjABS', 'DataItemName'
+    )
+    index_results = FuzzyMatcher(threshold=70, engine="index").match_columns(
+        source_df, target_df, 'Attribute in ProjABS', 'DataItemName'
+    )
+    
+    assert index_results['matches'] == batch_results['matches']
+    stats = index_results['stats']
+    assert stats['pairs_pruned'] > 0
+    assert stats['pairs_scored'] + stats['pairs_pruned'] == stats['pairs_total']
+    assert batch_results['stats']['pairs_total'] == stats['pairs_total']
+    
+    # Blank and gram-less values have no candidates; they are scored against
+    # every target and agree with the loop engine, down to threshold 0
+    source_df = pd.DataFrame({'Attribute': ['Net Income', '', 'zzz', 'Qx', 'Cash']})
+    target_df = pd.DataFrame({
+        'DataItemName': ['NetIncome', 'Cash Flow', 'Assets total', ''],
+        'DataItemID': [1, 2, 3, 4]
+    })
+    for threshold in (0, 70, 95):
+        loop_results = FuzzyMatcher(threshold=threshold, engine="loop").match_columns(
+            source_df, target_df, 'Attribute', 'DataItemName'
+        )
+        index_results = FuzzyMatcher(threshold=threshold, engine="index").match_columns(
+            source_df, target_df, 'Attribute', 'DataItemName'
+        )
+        for key in RESULT_KEYS:
+            assert index_results[key] == loop_results[key]
+
+def test_synonym_cache():
+    """Expansions are memoized and abbreviations resolve in both directions"""
+    
+    handler = SynonymHandler(cache_size=16)
+    assert 'amount' in handler.get_synonyms('AMT')
+    assert 'amt' in handler.get_synonyms('amount')
+    assert {'cust', 'identifier'} <= handler.get_expanded_terms('Customer ID')
+    
+    first = handler.get_expanded_terms('Acct Balance')
+    first.add('mutated')
+    assert 'mutated' not in handler.get_expanded_terms('Acct Balance')
+    stats = handler.cache_stats()
+    assert stats['expansions']['hits'] == 1
+    assert stats['expansions']['maxsize'] == 16
+    
+    # Edits to custom_synonyms apply after a refresh
+    handler.custom_synonyms['yr'] = ['year']
+    handler.refresh()
+    assert 'yr' in handler.get_synonyms('year')
+    assert handler.cache_stats()['synonyms']['hits'] == 0
+
+def test_synonym_table():
+    """A compiled table answers exactly like WordNet, without loading it"""
+    
+    words = ['cash', 'expenses', 'equity', 'preferred', 'geese', 'stops', 'amt']
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'synonyms.bin')
+        build_table(path, custom_synonyms={'yr': ['year']}, vocabulary=words)
+        
+        table_handler = SynonymHandler(table_path=path)
+        wordnet_handler = SynonymHandler(table_path=os.path.join(tmp_dir, 'missing.bin'))
+        assert table_handler.table is not None
+        assert wordnet_handler.table is None
+        
+        for word in words:
+            assert table_handler.get_synonyms(word) == wordnet_handler.get_synonyms(word)
+        assert 'yr' in table_handler.get_synonyms('year')
+        
+        # The map must be released before the directory is removed on Windows
+        table_handler.table.close()
+
+def test_parallel_engine_parity():
+    """Sharded process-pool scoring must merge back to the loop's results"""
+    
+    source_df, target_df = create_sample_data()
+    loop_results = FuzzyMatcher(threshold=70, engine="loop").match_columns(
+        source_df, target_df, 'Attribute in ProjABS', 'DataItemName'
+    )
+    # Two rows per shard so the merge crosses shard boundaries
+    parallel_results = FuzzyMatcher(
+        threshold=70, engine="parallel", workers=2, chunk_size=2, fast_path=False
+    ).match_columns(source_df, target_df, 'Attribute in ProjABS', 'DataItemName')
+    
+    for key in RESULT_KEYS:
+        assert parallel_results[key] == loop_results[key]
+    
+    # One pool per run: tables taken from the installed targets reuse it
+    handler = SynonymHandler()
+    query = TermTable(source_df['Attribute in ProjABS'].tolist(), handler)
+    choices = TermTable(target_df['DataItemName'].tolist(), handler)
+    subset = choices.take([3, 0, 5])
+    scorer = ParallelScorer(workers=2, chunk_size=2)
+    try:
+        full = scorer.score(query, choices)
+        executor = scorer._executor
+        part = scorer.score(query, subset)
+        assert scorer._executor is executor
+    finally:
+        scorer.close()
+    assert scorer._executor is None
+    for reduction, table in ((full, choices), (part, subset)):
+        expected = BatchScorer(workers=1).score(query, table)
+        assert (reduction.row_best_score == expected.row_best_score).all()
+        assert (reduction.col_best_score == expected.col_best_score).all()
+
+def test_dask_matching():
+    """Partition-by-partition matching writes the same rows as match_columns"""
+    import dask.dataframe as dd
+    
+    source_df, target_df = create_sample_data()
+    source_df = pd.concat([source_df, source_df], ignore_index=True)
+    matcher = FuzzyMatcher(threshold=70)
+    results = matcher.match_columns(source_df, target_df, 'Attribute in ProjABS', 'DataItemName')
+    expected = matcher.format_results_for_export(results).astype(str)
+    
+    with tempfile.TemporaryDirectory() as output_path:
+        summary = matcher.match_columns_dask(
+            dd.from_pandas(source_df, npartitions=3),
+            target_df,
+            'Attribute in ProjABS',
+            'DataItemName',
+            output_path
+        )
+        written = pd.read_parquet(output_path)
+    
+    assert summary['stats']['partitions'] == 3
+    assert summary['match_count'] == len(results['matches'])
+    assert summary['target_mismatches'] == results['target_mismatches']
+    sort_columns = ['Type', 'Source Value', 'Target Value']
+    pd.testing.assert_frame_equal(
+        written.sort_values(sort_columns).reset_index(drop=True),
+        expected.sort_values(sort_columns).reset_index(drop=True)
+    )
+
+def test_exact_fast_path():
+    """Values equal after normalization are hash-joined at 100 before fuzzy scoring"""
+    
+    source_df, target_df = create_sample_data()
+    results = FuzzyMatcher(threshold=70).match_columns(
+        source_df, target_df, 'Attribute in ProjABS', 'DataItemName'
+    )
+    
+    match = next(m for m in results['matches'] if m['source_value'] == 'Cash and Cash equivalents')
+    assert match['target_value'] == 'CashandCashequivalents'
+    assert match['confidence'] == 100
+    assert results['stats']['fast_path_rows'] == 1
+    
+    # The reverse direction is unaffected by which sources took the fast path
+    slow_results = FuzzyMatcher(threshold=70, fast_path=False).match_columns(
+        source_df, target_df, 'Attribute in ProjABS', 'DataItemName'
+    )
+    assert results['target_mismatches'] == slow_results['target_mismatches']
+    assert results['stats']['pairs_scored'] < slow_results['stats']['pairs_scored']
+
+def test_score_pruning():
+    """Cutoffs and length bounds must skip pairs without changing any best match"""
+    
+    source_df, target_df = create_sample_data()
+    matcher = FuzzyMatcher(threshold=70, engine="loop")
+    sources = [str(v).strip() for v in source_df['Attribute in ProjABS']]
+    targets = [str(v).strip() for v in target_df['DataItemName']]
+    
+    for source in sources:
+        scores = [matcher.calculate_similarity(source, target) for target in targets]
+        for target, score in zip(targets, scores):
+            # The bound never undercuts the real score
+            profiles = [TermProfile(matcher.synonym_handler.get_expanded_terms(v)) for v in (source, target)]
+            assert score_bound(*profiles) >= score
+            # Scores below the cutoff read as 0, anything else is exact
+            assert matcher.calculate_similarity(source, target, score_cutoff=score) == score
+            if score > 0:
+                assert matcher.calculate_similarity(source, target, score_cutoff=score + 1) == 0
+    
+    # Exhaustive search keeping the first of equal scores
+    results = matcher.match_columns(source_df, target_df, 'Attribute in ProjABS', 'DataItemName')
+    found = {m['source_value']: (m['target_value'], m['confidence']) for m in results['matches']}
+    found.update({m['value']: (m['best_match'], m['confidence']) for m in results['source_mismatches']})
+    for source in sources:
+        scores = [matcher.calculate_similarity(source, target) for target in targets]
+        best = scores.index(max(scores))
+        assert found[source] == (targets[best], scores[best])
+    
+    stats = results['stats']
+    assert stats['pairs_pruned'] > 0
+    assert stats['pairs_scored'] + stats['pairs_pruned'] == stats['pairs_total']
+
+def test_excel_column_projection():
+    """Streaming a projected column must give what pd.read_excel gives for it"""
+    
+    source_df, target_df = create_sample_data()
+    buffer = pd.io.common.BytesIO()
+    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+        source_df.to_excel(writer, sheet_name='Source', index=False)
+        target_df.to_excel(writer, sheet_name='Target', index=False)
+    data = buffer.getvalue()
+    
+    assert excel_loader.sheet_names(data) == ['Source', 'Target']
+    header = excel_loader.sheet_header(data, 'Target')
+    assert header == target_df.columns.tolist()
+    
+    projected = excel_loader.read_columns(data, 'Target', ['DataItemName', 'DataItemID'], header)
+    expected = pd.read_excel(pd.io.common.BytesIO(data), sheet_name='Target')
+    assert projected.columns.tolist() == ['DataItemName', 'DataItemID']
+    pd.testing.assert_frame_equal(projected, expected[['DataItemName', 'DataItemID']])
+    
+    # Unknown columns are skipped rather than failing the read
+    assert excel_loader.read_columns(data, 'Source', ['Missing']).empty
+
+def test_sql_column_loader():
+    """Grouped, batched SQL reads must give back every row of the selected column"""
+    
+    _, target_df = create_sample_data()
+    target_df = pd.concat([target_df, target_df.head(2)], ignore_index=True)
+    target_df['Unused'] = range(len(target_df))
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'catalog.db')
+        with sqlite3.connect(path) as conn:
+            target_df.to_sql('Data Items', conn, index=False)
+        pool = sql_loader.ConnectionPool(lambda: sqlite3.connect(path))
+        loader = sql_loader.SqlColumnLoader(pool, batch_size=2)
+        
+        assert loader.table_columns('Data Items') == ['DataItemID', 'DataItemName', 'Unused']
+        loaded = loader.read_column('Data Items', 'DataItemName')
+        loaded_by_key = loader.read_column('Data Items', 'DataItemName', order_column='Unused')
+        pool.close()
+    
+    # Only the selected column and the IDs are fetched, duplicates once each
+    assert loaded.columns.tolist() == ['DataItemName', 'DataItemID']
+    assert loaded.attrs['row_count'] == len(target_df)
+    assert loaded.attrs['distinct_count'] == len(target_df) - 2
+    assert pool.stats['opened'] == 1 and pool.stats['reused'] == 6
+    
+    # Table order, with the repeats of a row after its first occurrence
+    key = ['DataItemName', 'DataItemID']
+    first_seen = target_df.groupby(key, sort=False).ngroup()
+    pd.testing.assert_frame_equal(
+        loaded,
+        target_df[key].iloc[first_seen.argsort(kind='stable')].reset_index(drop=True),
+        check_dtype=False
+    )
+    assert loaded_by_key['DataItemName'].tolist() == loaded['DataItemName'].tolist()
+
+def test_column_cache():
+    """Cached columns and target indexes must be reused and give unchanged results"""
+    
+    source_df, target_df = create_sample_data()
+    loads = []
+    
+    def load():
+        loads.append(1)
+        return target_df
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = column_cache.ColumnCache(tmp, max_bytes=10 ** 6)
+        key = column_cache.cache_key(column_cache.content_hash(b'workbook'), 'Target', 'DataItemName')
+        first = cache.column(key, load)
+        second = cache.column(key, load)
+        assert len(loads) == 1
+        pd.testing.assert_frame_equal(first, second)
+        
+        # Mixed-type columns are stored as text, on a miss as on a hit
+        mixed = cache.column('mixed', lambda: pd.DataFrame({'DataItemID': [1, 'A2', None]}))
+        assert mixed['DataItemID'].tolist() == ['1', 'A2', None]
+        pd.testing.assert_frame_equal(cache.column('mixed', load), mixed)
+        
+        # Shrinking the budget evicts least recently used files first
+        os.utime(os.path.join(tmp, f'{key}.parquet'), (0, 0))
+        cache.max_bytes = os.path.getsize(os.path.join(tmp, 'mixed.parquet'))
+        cache._evict()
+        assert os.listdir(tmp) == ['mixed.parquet']
+        
+        # A directory others can write to may hold planted files
+        shared = os.path.join(tmp, 'shared')
+        os.mkdir(shared)
+        os.chmod(shared, 0o777)
+        try:
+            column_cache.ColumnCache(shared)
+            assert False, "a shared cache directory must be refused"
+        except PermissionError:
+            pass
+        
+        matcher = FuzzyMatcher(threshold=70)
+        build = lambda: matcher.build_target_index(target_df, 'DataItemName')
+        index_key = (key, matcher.synonym_handler.version)
+        target_index = cache.target_index(index_key, build)
+        assert cache.target_index(index_key, build) is target_index
+        assert cache.stats()['indexes'] == {'hits': 1, 'misses': 1}
+    
+    cached = matcher.match_columns(
+        source_df, target_df, 'Attribute in ProjABS', 'DataItemName', target_index=target_index
+    )
+    fresh = matcher.match_columns(source_df, target_df, 'Attribute in ProjABS', 'DataItemName')
+    for result_key in RESULT_KEYS:
+        assert cached[result_key] == fresh[result_key]
+    
+    # Editing the synonyms changes the version, so stale indexes are not reused
+    matcher.synonym_handler.custom_synonyms['eqty'] = ['equity']
+    matcher.synonym_handler.refresh()
+    assert matcher.synonym_handler.version != index_key[1]
+
+def test_top_k_matches():
+    """Top-k candidates must be ranked like an exhaustive search and agree with the best match"""
+    
+    source_df, target_df = create_sample_data()
+    matcher = FuzzyMatcher(threshold=70, fast_path=False)
+    top = matcher.top_k_matches(source_df, target_df, 'Attribute in ProjABS', 'DataItemName', k=3)
+    
+    assert top.indices.shape == (len(source_df), 3)
+    for i, source in enumerate(top.source_values):
+        # Exhaustive ranking by score, earliest target first on ties
+        scores = [matcher.calculate_similarity(source, target) for target in top.target_values]
+        ranking = sorted(range(len(scores)), key=lambda j: (-scores[j], j))[:3]
+        assert top.indices[i].tolist() == ranking
+        assert top.scores[i].tolist() == [scores[j] for j in ranking]
+    
+    # The first candidate is the match_columns best match
+    results = matcher.match_columns(source_df, target_df, 'Attribute in ProjABS', 'DataItemName')
+    best_index, best_score = top.best()
+    for match in results['matches']:
+        i = top.source_values.index(match['source_value'])
+        assert top.target_values[best_index[i]] == match['target_value']
+        assert best_score[i] == match['confidence']
+    
+    # Re-thresholding is a filter over the stored candidates
+    candidates = top.candidates(threshold=70)
+    assert (candidates['Confidence'] >= 70).all()
+    assert len(candidates) == int((top.scores >= 70).sum())
+    
+    # With the fast path, exact matches rank first among equal scores
+    fast = FuzzyMatcher(threshold=70)
+    top_fast = fast.top_k_matches(source_df, target_df, 'Attribute in ProjABS', 'DataItemName', k=1)
+    fast_results = fast.match_columns(source_df, target_df, 'Attribute in ProjABS', 'DataItemName')
+    best = {m['source_value']: m['target_value'] for m in fast_results['matches']}
+    best.update({m['value']: m['best_match'] for m in fast_results['source_mismatches']})
+    for i, source in enumerate(top_fast.source_values):
+        assert top_fast.target_values[top_fast.indices[i, 0]] == best[source]
+    
+    # More candidates than targets are padded
+    padded = matcher.top_k_matches(source_df, target_df, 'Attribute in ProjABS', 'DataItemName', k=10)
+    assert (padded.indices[:, len(top.target_values):] == -1).all()
+
+def test_rethreshold_scored_run():
+    """A scored run must repartition to match_columns' results at any threshold"""
+    
+    source_df, target_df = create_sample_data()
+    matcher = FuzzyMatcher(threshold=70)
+    run = matcher.score_columns(source_df, target_df, 'Attribute in ProjABS', 'DataItemName')
+    
+    for threshold in (0, 50, 70, 90, 100):
+        expected = FuzzyMatcher(threshold=threshold).match_columns(
+            source_df, target_df, 'Attribute in ProjABS', 'DataItemName'
+        )
+        results = matcher.apply_threshold(run, threshold)
+        for key in RESULT_KEYS:
+            assert results[key] == expected[key]
+    
+    # Without a threshold the matcher's own is used
+    assert matcher.apply_threshold(run)['matches'] == matcher.apply_threshold(run, 70)['matches']
+    
+    # Exact values are not rescored against the targets they match at 100,
+    # only the fuzzy value is scored against those
+    targets = target_df['DataItemName'].drop_duplicates().tolist()
+    exact = [target for target in targets if target]
+    exact_df = pd.DataFrame({'Attribute': exact + ['Cash Equivalents']})
+    run = matcher.score_columns(exact_df, target_df, 'Attribute', 'DataItemName')
+    assert run.stats['fast_path_values'] == len(exact)
+    open_targets = len(targets) - len(exact)
+    assert run.stats['pairs_scored'] == len(targets) + len(exact) * open_targets
+    for threshold in (0, 70, 100):
+        expected = FuzzyMatcher(threshold=threshold).match_columns(
+            exact_df, target_df, 'Attribute', 'DataItemName'
+        )
+        for key in RESULT_KEYS:
+            assert matcher.apply_threshold(run, threshold)[key] == expected[key]
+    
+    # Runs are keyed by content, so an edited column gets a new key
+    column = ['Attribute in ProjABS']
+    edited = source_df.copy()
+    edited.loc[0, 'Attribute in ProjABS'] = 'Other Reserves'
+    assert column_cache.frame_hash(source_df.copy(), column) == column_cache.frame_hash(source_df, column)
+    assert column_cache.frame_hash(edited, column) != column_cache.frame_hash(source_df, column)
+
+def test_score_cache():
+    """Scores reused from earlier runs must not change any result"""
+    
+    source_df, target_df = create_sample_data()
+    columns = ('Attribute in ProjABS', 'DataItemName')
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = PairScoreCache(os.path.join(tmp, 'scores.sqlite'))
+        for engine, fast_path in (("batch", True), ("batch", False), ("loop", False)):
+            expected = FuzzyMatcher(threshold=70, engine=engine, fast_path=fast_path).match_columns(
+                source_df, target_df, *columns
+            )
+            matcher = FuzzyMatcher(threshold=70, engine=engine, fast_path=fast_path, score_cache=cache)
+            first = matcher.match_columns(source_df, target_df, *columns)
+            second = matcher.match_columns(source_df, target_df, *columns)
+            for key in RESULT_KEYS:
+                assert first[key] == expected[key]
+                assert second[key] == expected[key]
+        
+        # The second batch run takes every fuzzy source's best from the cache
+        assert second['stats']['score_cache_hits'] > 0
+        batch = FuzzyMatcher(threshold=70, fast_path=False, score_cache=cache)
+        stats = batch.match_columns(source_df, target_df, *columns)['stats']
+        assert stats['score_cache_values'] == source_df[columns[0]].nunique()
+        
+        # Pair scores are symmetric and keyed by normalized values
+        plain = FuzzyMatcher()
+        assert batch.calculate_similarity('Cash', 'Cash(s)') == plain.calculate_similarity('Cash', 'Cash(s)')
+        hits = cache.hits
+        assert batch.calculate_similarity('CASH(S)', 'cash') == plain.calculate_similarity('Cash', 'Cash(s)')
+        assert cache.hits == hits + 1
+        assert 0 < cache.stats()['hit_rate'] <= 1
+        
+        # A row of targets is looked up and stored at once, with the same scores
+        row = ['Cash(s)', 'Account Number', 'cash', 'Cash(s)']
+        assert batch.similarity_scores('Cash', row, 60) == [
+            plain.calculate_similarity('Cash', target, 60) for target in row
+        ]
+        hits = cache.hits
+        assert batch.similarity_scores('Cash', row, 60) == plain.similarity_scores('Cash', row, 60)
+        # Two distinct normalized pairs; the score cut off below 60 is not kept
+        assert cache.hits == hits + 2
+        
+        # The store never grows past its bound
+        small = PairScoreCache(os.path.join(tmp, 'small.sqlite'), max_entries=10)
+        small.put_scores('ns', {(f'a{i}', f'b{i}'): i for i in range(25)})
+        assert small.stats()['entries'] <= 10
+        assert small.get_scores('ns', [('a24', 'b24')]) == {('a24', 'b24'): 24}
+        
+        # Reads kept in memory still protect entries from eviction
+        small.put_scores('ns', {(f'c{i}', f'd{i}'): i for i in range(5)})
+        assert small.stats()['entries'] <= 10
+        assert small.get_scores('ns', [('a24', 'b24')]) == {('a24', 'b24'): 24}
+        small.close()
+        cache.close()
+
+def test_delta_matching():
+    """Delta runs from earlier results or their export must equal a full run"""
+    
+    source_df, target_df = create_sample_data()
+    columns = ('Attribute in ProjABS', 'DataItemName')
+    new_source = pd.concat([
+        source_df.drop(index=[0]),
+        pd.DataFrame({columns[0]: ['Property Expense', 'Cash']})
+    ], ignore_index=True)
+    new_target = pd.concat([
+        target_df.drop(index=[2]),
+        pd.DataFrame({'DataItemID': ['7'], columns[1]: ['Other Reserves']})
+    ], ignore_index=True)
+    
+    for engine, fast_path in (("batch", True), ("batch", False), ("parallel", True)):
+        matcher = FuzzyMatcher(threshold=70, engine=engine, fast_path=fast_path)
+        previous = matcher.match_columns(source_df, target_df, *columns)
+        expected = matcher.match_columns(new_source, new_target, *columns)
+        export = matcher.format_results_for_export(previous)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'results.xlsx')
+            export.to_excel(path, sheet_name='Matching Results', index=False)
+            for earlier in (previous, export, path):
+                delta = matcher.match_delta(earlier, new_source, new_target, *columns)
+                for key in RESULT_KEYS:
+                    assert delta[key] == expected[key]
+        
+        # Unchanged inputs need no scoring beyond unreported targets
+        same = matcher.match_delta(previous, source_df, target_df, *columns)
+        assert same['stats']['sources_rescored'] == 0
+        assert same['stats']['pairs_scored'] < expected['stats']['pairs_total']
+    
+    # The added and dropped source values are counted once each
+    stats = delta['stats']
+    assert stats['sources_added'] == 1
+    assert stats['sources_removed'] == 1
+
+def test_canonical_concepts():
+    """Canonical mode compares one concept string per value, on every engine"""
+    
+    handler = SynonymHandler(canonical=True)
+    assert handler.get_expanded_terms('Acct Amt') == {handler.canonical_form('Account amount')}
+    assert handler.get_concept('acct') == handler.get_concept('account')
+    assert handler.get_concept('expenses') == handler.get_concept('expense')
+    assert handler.get_concept('s') == 's'
+    assert handler.version != SynonymHandler().version
+    
+    # The compiled table agrees with WordNet on concepts too
+    words = ['cash', 'expenses', 'equity', 'preferred', 'geese', 'stops']
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'synonyms.bin')
+        build_table(path, vocabulary=words)
+        table_handler = SynonymHandler(table_path=path, canonical=True, concept_pos=['n'])
+        wordnet_handler = SynonymHandler(
+            table_path=os.path.join(tmp_dir, 'missing.bin'), canonical=True, concept_pos=['n']
+        )
+        for word in words:
+            assert table_handler.get_concept(word) == wordnet_handler.get_concept(word)
+        table_handler.table.close()
+    
+    source_df, target_df = create_sample_data()
+    columns = ('Attribute in ProjABS', 'DataItemName')
+    loop = FuzzyMatcher(threshold=70, engine="loop", canonical=True).match_columns(
+        source_df, target_df, *columns
+    )
+    batch = FuzzyMatcher(threshold=70, fast_path=False, canonical=True).match_columns(
+        source_df, target_df, *columns
+    )
+    for key in RESULT_KEYS:
+        assert batch[key] == loop[key]
+    
+    report = compare_modes(source_df, target_df, *columns)
+    assert report['canonical']['terms_per_value'] == 1
+    assert report['canonical']['term_pairs'] < report['expansion']['term_pairs']
+    assert 0 <= report['canonical']['recall'] <= 1
+
+def test_columnar_results():
+    """Columnar results hold the same records, with numeric confidences"""
+    
+    source_df, target_df = create_sample_data()
+    columns = ('Attribute in ProjABS', 'DataItemName')
+    matcher = FuzzyMatcher(threshold=70)
+    run = matcher.score_columns(source_df, target_df, *columns)
+    
+    for threshold in (0, 50, 70, 101):
+        results = matcher.apply_threshold(run, threshold)
+        table = matcher.result_table(run, threshold)
+        expected = matcher.format_results_for_export(results)
+        assert matcher.format_results_for_export(table).equals(expected)
+        assert MatchResults.from_results(results).to_frame().astype(str).equals(
+            table.to_frame().astype(str)
+        )
+        assert table.counts() == {
+            'Match': len(results['matches']),
+            'Source Mismatch': len(results['source_mismatches']),
+            'Target Mismatch': len(results['target_mismatches'])
+        }
+    
+    frame = table.to_frame()
+    assert frame['Confidence'].dtype.kind == 'i'
+    assert str(frame['Source Value'].dtype) == 'category'
+    summary = dict(zip(*table.summary().to_dict('list').values()))
+    assert summary['Total Records Processed'] == len(frame)
+    assert summary['Average Confidence Score (%)'] == round(frame['Confidence'].mean(), 2)
+    
+    # A workbook with numeric confidences reads back as a previous run
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'results.xlsx')
+        frame.to_excel(path, sheet_name='Matching Results', index=False)
+        delta = matcher.match_delta(path, source_df, target_df, *columns)
+        assert delta['stats']['sources_rescored'] == 0
+
+def test_streaming_export():
+    """Exports streamed in chunks hold every record and the same summary"""
+    
+    source_df, target_df = create_sample_data()
+    columns = ('Attribute in ProjABS', 'DataItemName')
+    matcher = FuzzyMatcher(threshold=70)
+    run = matcher.score_columns(source_df, target_df, *columns)
+    table = matcher.result_table(run, 70)
+    expected = matcher.format_results_for_export(table)
+    
+    max_rows = result_export.EXCEL_MAX_ROWS
+    with tempfile.TemporaryDirectory() as tmp:
+        # Small sheets, so the workbook continues on a second results sheet
+        result_export.EXCEL_MAX_ROWS = 4
+        try:
+            for fmt in result_export.FORMATS:
+                path = os.path.join(tmp, f'results.{fmt}')
+                summary = result_export.export_results(table, path, chunk_rows=2)
+                assert summary.equals(table.summary())
+                
+                if fmt == 'xlsx':
+                    sheets = pd.read_excel(path, sheet_name=None)
+                    assert 'Matching Results 2' in sheets and 'Summary' in sheets
+                    frame = pd.concat(
+                        [sheet for name, sheet in sheets.items() if name != 'Summary'],
+                        ignore_index=True
+                    )
+                elif fmt == 'csv':
+                    frame = pd.read_csv(path)
+                else:
+                    frame = pd.read_parquet(path)
+                assert len(frame) == len(expected)
+                assert (frame['Confidence'].astype(str) + '%').tolist() == expected['Confidence'].tolist()
+                assert frame['Source Value'].tolist() == expected['Source Value'].tolist()
+                
+                # Every format reads back as a previous run
+                delta = matcher.match_delta(path, source_df, target_df, *columns)
+                assert delta['stats']['sources_rescored'] == 0
+        finally:
+            result_export.EXCEL_MAX_ROWS = max_rows
+
+def test_streaming_matches():
+    """Streamed batches give the records of one in-memory run"""
+    
+    source_df, target_df = create_sample_data()
+    matcher = FuzzyMatcher(threshold=70)
+    expected = matcher.match_columns(source_df, target_df, 'Attribute in ProjABS', 'DataItemName')
+    target_index = matcher.build_target_index(target_df, 'DataItemName')
+    
+    # Any iterable of values, read lazily two at a time
+    values = iter(source_df['Attribute in ProjABS'])
+    batches = list(matcher.iter_matches(values, target_index, batch_size=2))
+    assert [b['stats'].get('rows') for b in batches] == [2, 2, 1, None]
+    assert all(not b['target_mismatches'] for b in batches[:-1])
+    for key in ('matches', 'source_mismatches', 'target_mismatches'):
+        assert [r for b in batches for r in b[key]] == expected[key]
+    assert batches[-1]['stats']['source_rows'] == len(source_df)
+    assert batches[-1]['stats']['pairs_total'] == sum(b['stats']['pairs_total'] for b in batches[:-1])
+
+def test_matching_service():
+    """A warm service gives the results of match_columns, off the event loop"""
+    
+    source_df, target_df = create_sample_data()
+    columns = ('Attribute in ProjABS', 'DataItemName')
+    matcher = FuzzyMatcher(threshold=70, workers=1)
+    expected = matcher.match_columns(source_df, target_df, *columns)
+    service = MatchingService(matcher, matcher.build_target_index(target_df, columns[1]), workers=2)
+    try:
+        assert service.match_batch(source_df[columns[0]])['matches'] == expected['matches']
+        
+        # Lookups agree with the forward direction of a full run
+        best = {m['source_value']: m['target_value'] for m in expected['matches']}
+        best.update({m['value']: m['best_match'] for m in expected['source_mismatches']})
+        
+        async def lookups():
+            return await asyncio.gather(*[
+                service.run('match', service.lookup, value, 3) for value in best
+            ])
+        for result in asyncio.run(lookups()):
+            assert result['best_match'] == best[result['value']]
+            assert result['candidates'][0]['target_value'] == result['best_match']
+        
+        # The best target does not depend on k, with any engine
+        indexed = FuzzyMatcher(threshold=70, engine='index', workers=1)
+        indexed_service = MatchingService(indexed, service.target_index, workers=1)
+        for lookup_service in (service, indexed_service):
+            for value in list(best) + ['', 'no such attribute']:
+                single = lookup_service.lookup(value, 1)
+                first = lookup_service.lookup(value, 3)['candidates'][0]
+                assert single['best_match'] == first['target_value']
+                assert single['confidence'] == first['confidence']
+        indexed_service.close()
+        
+        latency = service.latency.percentiles()['match']
+        assert latency['count'] == len(best)
+        assert latency['p50_ms'] <= latency['p99_ms'] <= latency['max_ms']
+        
+        # Uploaded files are read by extension, one column only
+        upload = source_df.to_csv(index=False).encode('utf-8')
+        assert service.match_upload(upload, 'source.csv', columns[0])['matches'] == expected['matches']
+    finally:
+        service.close()
+
+def test_matching_api():
+    """The HTTP endpoints answer with the service's results"""
+    
+    import pytest
+    pytest.importorskip('fastapi')
+    from fastapi.testclient import TestClient
+    from .api import create_app
+    
+    source_df, target_df = create_sample_data()
+    matcher = FuzzyMatcher(threshold=70, workers=1)
+    service = MatchingService(matcher, matcher.build_target_index(target_df, 'DataItemName'))
+    with TestClient(create_app(service)) as client:
+        assert client.get('/health').json()['unique_targets'] == len(service.target_index)
+        
+        target = target_df['DataItemName'][0]
+        lookup = client.get('/match', params={'value': target, 'k': 2}).json()
+        assert lookup['best_match'] == target and lookup['matched']
+        assert len(lookup['candidates']) == 2
+        
+        values = source_df['Attribute in ProjABS'].tolist()
+        expected = service.match_batch(values)
+        batch = client.post('/match/batch', json={'values': values}).json()
+        assert batch['matches'] == expected['matches']
+        
+        upload = client.post(
+            '/match/upload',
+            files={'file': ('source.csv', source_df.to_csv(index=False).encode('utf-8'), 'text/csv')},
+            data={'column': 'Attribute in ProjABS'}
+        ).json()
+        assert upload['matches'] == expected['matches']
+        assert client.post(
+            '/match/upload',
+            files={'file': ('source.txt', b'x', 'text/plain')},
+            data={'column': 'Attribute in ProjABS'}
+        ).status_code == 400
+        
+        latency = client.get('/stats').json()['latency']
+        assert set(latency) == {'match', 'match_batch', 'match_upload'}
+
+def test_match_jobs():
+    """Background jobs report progress, can be cancelled and share a bounded pool"""
+    
+    source_df, target_df = create_sample_data()
+    columns = ('Attribute in ProjABS', 'DataItemName')
+    matcher = FuzzyMatcher(threshold=70)
+    expected = matcher.score_columns(source_df, target_df, *columns)
+    
+    runner = JobRunner(workers=1)
+    try:
+        job = runner.submit('alice', lambda job: matcher.score_columns(
+            source_df, target_df, *columns, progress=job.update, batch_size=2
+        ))
+        runner.executor.submit(lambda: None).result()
+        assert job.state == DONE and job.fraction == 1.0
+        assert (job.done, job.total) == (5, 5) and len(job.partial) == 3
+        assert job.result.source_best == expected.source_best
+        assert job.result.best_source == expected.best_source
+        first_values = source_df[columns[0]].tolist()[:2]
+        assert job.partial[0] == {v: expected.source_best[v] for v in first_values}
+        
+        # One worker: a second user's job waits behind a running one
+        release = threading.Event()
+        started = threading.Event()
+        
+        def blocked(job):
+            started.set()
+            for step in range(10):
+                release.wait()
+                job.update(step + 1, 10)
+        
+        running = runner.submit('alice', blocked)
+        started.wait()
+        waiting = runner.submit('bob', lambda job: 'done')
+        assert waiting.state == QUEUED and runner.queue_position(waiting) == 0
+        
+        # A cancelled job stops at its next progress report
+        running.cancel()
+        release.set()
+        runner.executor.submit(lambda: None).result()
+        assert running.state == CANCELLED and running.done == 1
+        assert waiting.state == DONE and waiting.result == 'done'
+        
+        # A new job from the same owner supersedes the previous one
+        release.clear()
+        first = runner.submit('carol', blocked)
+        second = runner.submit('carol', lambda job: 'again')
+        release.set()
+        runner.executor.submit(lambda: None).result()
+        assert first.state == CANCELLED and second.result == 'again'
+        assert runner.job('carol') is second and not runner.active()
+        
+        # Only the latest partial results are kept
+        bounded = MatchJob('dave', lambda job: [job.update(step, 5, step) for step in range(5)], partial_limit=2)
+        bounded.run()
+        assert list(bounded.partial) == [3, 4]
+    finally:
+        runner.shutdown()
+
+def test_checkpoint_resume():
+    """A run that dies part way resumes from its checkpoint with the same result"""
+    
+    source_df, target_df = create_sample_data()
+    columns = ('Attribute in ProjABS', 'DataItemName')
+    expected = FuzzyMatcher(threshold=70).match_columns(source_df, target_df, *columns)
+    
+    class Crash(Exception):
+        pass
+    
+    def crash_after_two(done, total, batch_best):
+        if done >= 2:
+            raise Crash()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        matcher = FuzzyMatcher(threshold=70, checkpoint_dir=tmp, checkpoint_interval=0)
+        try:
+            matcher.score_columns(source_df, target_df, *columns, progress=crash_after_two, batch_size=1)
+        except Crash:
+            pass
+        # One run directory, with JSON and numpy segments rather than pickles
+        run_dirs = [name for name in os.listdir(tmp) if not name.endswith('.lock')]
+        assert len(run_dirs) == 1
+        assert {name.rsplit('.', 1)[1] for name in os.listdir(os.path.join(tmp, run_dirs[0]))} == {'json', 'npy'}
+        
+        # A fresh matcher with the same inputs only scores what is left
+        resumed = []
+        matcher = FuzzyMatcher(threshold=70, checkpoint_dir=tmp, checkpoint_interval=0)
+        run = matcher.score_columns(
+            source_df, target_df, *columns,
+            progress=lambda done, total, batch_best: resumed.append((done, len(batch_best))),
+            batch_size=1
+        )
+        # The checkpoint, reported as one batch, then the three values left
+        assert resumed == [(2, 2), (3, 1), (4, 1), (5, 1)]
+        results = matcher.apply_threshold(run)
+        for key in ('matches', 'source_mismatches', 'target_mismatches'):
+            assert results[key] == expected[key]
+        # Completed runs leave no checkpoint behind
+        assert os.listdir(tmp) == []
+        
+        # Other inputs do not pick up the checkpoint of a run
+        try:
+            matcher.score_columns(source_df, target_df, *columns, progress=crash_after_two, batch_size=1)
+        except Crash:
+            pass
+        resumed.clear()
+        matcher.score_columns(
+            source_df.iloc[::-1], target_df, *columns,
+            progress=lambda done, total, batch_best: resumed.append(done),
+            batch_size=1
+        )
+        assert resumed == [1, 2, 3, 4, 5]
+        
+        # While a run holds the checkpoint of its inputs, another run of the
+        # same inputs scores without it and leaves it untouched
+        key = run_dirs[0]
+        held = checkpoint.Checkpoint(tmp, key)
+        try:
+            checkpoint.Checkpoint(tmp, key)
+            assert False, "a held checkpoint must not be shared"
+        except checkpoint.CheckpointBusy:
+            pass
+        resumed.clear()
+        run = matcher.score_columns(
+            source_df, target_df, *columns,
+            progress=lambda done, total, batch_best: resumed.append(done),
+            batch_size=1
+        )
+        assert resumed == [1, 2, 3, 4, 5]
+        assert matcher.apply_threshold(run)['matches'] == expected['matches']
+        assert held.load()['done'] == 2
+        held.release()
+        
+        # A checkpoint directory others can write to is refused
+        shared = os.path.join(tmp, 'shared')
+        os.mkdir(shared)
+        os.chmod(shared, 0o777)
+        try:
+            checkpoint.Checkpoint(shared, key)
+            assert False, "a shared checkpoint directory must be refused"
+        except PermissionError:
+            pass
+
+def test_benchmark_suite():
+    """The benchmark generator is reproducible and regressions are flagged"""
+    
+    source_df, target_df, expected = synthetic_columns(30, 20, seed=1)
+    again, _, _ = synthetic_columns(30, 20, seed=1)
+    assert source_df.equals(again)
+    assert len(source_df) == 30 and target_df['DataItemName'].is_unique
+    assert set(expected.values()) <= set(target_df['DataItemName'])
+    
+    rows = run_suite(sizes=[(30, 20)], engines=['batch'], repeat=1)
+    assert {row['case'] for row in rows} == {
+        'get_expanded_terms', 'calculate_similarity', 'match_columns',
+        'export_xlsx', 'export_csv', 'export_parquet'
+    }
+    assert all(row['seconds'] > 0 and row['peak_mb'] > 0 for row in rows)
+    
+    baseline = {'results': rows}
+    assert not compare(rows, baseline)['regression'].any()
+    # Twice as fast a baseline makes every measurable case a regression
+    faster = {'results': [{**row, 'seconds': row['seconds'] / 2} for row in rows]}
+    report = compare(rows, faster, tolerance=0.25)
+    assert report.loc[report['seconds'] > 1e-3, 'regression'].all()
+
+def test_instrumentation():
+    """Runs report stage timings, cache hit rates and term sizes, and can be profiled"""
+    import pstats
+    
+    source_df, target_df = create_sample_data()
+    source_column, target_column = 'Attribute in ProjABS', 'DataItemName'
+    matcher = FuzzyMatcher(threshold=70, engine='batch')
+    stats = matcher.match_columns(source_df, target_df, source_column, target_column)['stats']
+    assert list(instrumentation.stage_seconds(stats)) == list(instrumentation.STAGES)
+    assert all(seconds >= 0 for seconds in instrumentation.stage_seconds(stats).values())
+    assert stats['seconds_total'] >= stats['seconds_score']
+    assert stats['pairs_scored'] + stats['pairs_pruned'] == stats['pairs_total']
+    assert stats['source_terms'] > 0 and stats['target_terms'] >= len(target_df)
+    assert 0 <= stats['synonym_cache']['expansions']['hit_rate'] <= 1
+    assert stats['peak_rss_mb'] is None or stats['peak_rss_mb'] > 0
+    
+    # Batched runs sum their counters and timings over the batches
+    batched = matcher.score_columns(
+        source_df, target_df, source_column, target_column, batch_size=2
+    ).stats
+    assert batched['pairs_total'] == stats['pairs_total']
+    assert batched['source_terms'] == stats['source_terms']
+    assert 'seconds_score' in batched and 'seconds_index' in batched
+    # Thresholding a stored run times the records without touching its stats
+    run = matcher.score_columns(source_df, target_df, source_column, target_column)
+    assert 'seconds_records' in matcher.apply_threshold(run, 80)['stats']
+    assert 'seconds_records' not in run.stats
+    
+    totals = {}
+    instrumentation.add_stats(totals, {'pairs_total': 2, 'engine': 'batch', 'flag': True})
+    instrumentation.add_stats(totals, {'pairs_total': 3})
+    assert totals == {'pairs_total': 5}
+    
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'run.prof')
+        with instrumentation.profiled(path):
+            matcher.match_columns(source_df, target_df, source_column, target_column)
+        profile = pstats.Stats(path)
+        assert any(name == 'match_columns' for _, _, name in profile.stats)
+        with instrumentation.profiled(None):
+            pass
+
 if __name__ == "__main__":
     print("=== Fuzzy Column Matcher Tests ===\n")
     
@@ -151,4 +1127,32 @@ if __name__ == "__main__":
     # Run synonym matching test
     test_synonym_matching()
     
+    # Check the batch engine against the reference loop
+    test_batch_engine_parity()
+    test_two_way_reduction_across_blocks()
+    test_index_engine_recall()
+    test_synonym_cache()
+    test_synonym_table()
+    test_parallel_engine_parity()
+    test_dask_matching()
+    test_exact_fast_path()
+    test_score_pruning()
+    test_excel_column_projection()
+    test_sql_column_loader()
+    test_column_cache()
+    test_top_k_matches()
+    test_rethreshold_scored_run()
+    test_score_cache()
+    test_delta_matching()
+    test_canonical_concepts()
+    test_columnar_results()
+    test_streaming_export()
+    test_streaming_matches()
+    test_matching_service()
+    test_matching_api()
+    test_match_jobs()
+    test_checkpoint_resume()
+    test_benchmark_suite()
+    test_instrumentation()
+    
     print("\nTests completed successfully!")
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+from typing import Any, List, Tuple
+
+TOP_K_COLUMNS = ["Source Value", "Rank", "Target Value", "DataItemID", "Confidence"]
+
+
+def top_k_columns(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Indices and scores of the k best columns of every row of a rounded score
+    block, best first. Equal scores keep the earliest column, as the best
+    match does; rows with fewer than k columns are padded with -1.
+    """
+    n_rows, n_cols = scores.shape
+    indices = np.full((n_rows, k), -1, dtype=np.intp)
+    best_scores = np.full((n_rows, k), -1, dtype=np.int16)
+    if n_cols == 0 or n_rows == 0:
+        return indices, best_scores
+
+    # One integer per cell ordering by score, then by earlier column
+    keys = scores.astype(np.int64) * n_cols + (n_cols - 1 - np.arange(n_cols))
+    kept = min(k, n_cols)
+    if kept < n_cols:
+        keys = np.take_along_axis(
+            keys, np.argpartition(keys, n_cols - kept, axis=1)[:, n_cols - kept:], axis=1
+        )
+    keys = -np.sort(-keys, axis=1)[:, :kept]
+    indices[:, :kept] = n_cols - 1 - keys % n_cols
+    best_scores[:, :kept] = keys // n_cols
+    return indices, best_scores
+
+
+class TopKMatches:
+    """
+    The k best targets of every unique source value, stored column-wise.
+
+    ``indices`` and ``scores`` have one row per unique source value, best
+    candidate first, with -1 where there are fewer than k targets.
+    ``row_sources`` maps every source row to its unique value, so any
+    threshold can be applied afterwards without rescoring.
+    """
+
+    def __init__(
+        self,
+        source_values: List[str],
+        row_sources: np.ndarray,
+        target_values: List[str],
+        target_ids: List[Any],
+        indices: np.ndarray,
+        scores: np.ndarray
+    ):
+        self.source_values = source_values
+        self.row_sources = row_sources
+        self.target_values = target_values
+        self.target_ids = target_ids
+        self.indices = indices
+        self.scores = scores
+
+    @property
+    def k(self) -> int:
+        return self.indices.shape[1]
+
+    def __len__(self) -> int:
+        return len(self.source_values)
+
+    def best(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Best target index and score per unique source value."""
+        return self.indices[:, 0], self.scores[:, 0]
+
+    def candidates(self, threshold: int = 0) -> pd.DataFrame:
+        """
+        One row per (source value, candidate) scoring at least threshold,
+        ordered by source value and rank.
+        """
+        source, rank = np.nonzero((self.indices >= 0) & (self.scores >= threshold))
+        targets = self.indices[source, rank]
+        return pd.DataFrame({
+            "Source Value": [self.source_values[i] for i in source],
+            "Rank": rank + 1,
+            "Target Value": [self.target_values[j] for j in targets],
+            "DataItemID": [self.target_ids[j] for j in targets],
+            "Confidence": self.scores[source, rank].astype(int)
+        }, columns=TOP_K_COLUMNS)